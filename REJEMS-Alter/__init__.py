@@ -8,15 +8,21 @@ bl_info = {
     "category": "Animation",
 }
 
-import bpy
+try:
+    import bpy
+except ImportError:  # Imported outside Blender, by worker processes or the command line
+    bpy = None
 
-# Import modules from subfolders
-# from .operators import register_operators, unregister_operators
-from . import operators
-# from .panels import register_panels, unregister_panels
-from . import panels
-# from .properties import register_properties, unregister_properties
-from . import properties
+if bpy is not None:
+    # Import modules from subfolders
+    # from .operators import register_operators, unregister_operators
+    from . import operators
+    # from .panels import register_panels, unregister_panels
+    from . import panels
+    # from .properties import register_properties, unregister_properties
+    from . import properties
+    from . import parallel
+    from . import preview
 
 # --- Registration ---
 
@@ -26,6 +32,8 @@ def register():
     panels.register()
 
 def unregister():
+    preview.stop()
+    parallel.shutdown_pool()
     properties.unregister()
     operators.unregister()
     panels.unregister()
@@ -0,0 +1,420 @@
+import time
+from functools import lru_cache
+from math import comb, lgamma
+
+import numpy as np
+
+from .utils import (
+    MAD_SCALE,
+    STABLE_BASIS_DEGREE,
+    BezierCurve,
+    PipelineResult,
+    StageStats,
+    classify_stage,
+    fit_curve,
+    key_budget,
+    keyframes_from_fit,
+    mocap_cleaning_pipeline,
+    reduction_stage,
+)
+
+# --- Batched Simplification ---
+# Facial and finger rigs have hundreds of short fcurves, where the per-call
+# overhead of mocap_cleaning_pipeline costs more than the math. simplify_batch
+# packs many short channels into padded (batch, length, dim) arrays, bucketed
+# by length, and runs outlier detection, the global fit and its error
+# evaluation once per bucket. Curves of different degrees share one padded
+# basis with zero columns past each curve's degree, and padded samples are
+# masked out of the errors. Reduction and piecewise fits stay per channel.
+
+BATCH_MAX_KEYS = 256  # Longer channels go through mocap_cleaning_pipeline one by one
+BUCKET_SIZE = 32      # Channel lengths are padded up to a multiple of this
+FIT_BUCKET_SIZE = 8   # Finer buckets for the fit, whose basis grows with the square of the length
+MAX_BASIS_ELEMENTS = 2 ** 22  # Fit buckets are split so one padded basis stays below this many floats
+
+def pack(channels, length):
+    """
+    Packs (n, dim) channels into a (batch, length, dim) array, each padded with
+    copies of its last point. Returns the array and the channel lengths.
+    """
+    lengths = np.array([len(channel) for channel in channels])
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    index = starts[:, np.newaxis] + np.minimum(np.arange(length), lengths[:, np.newaxis] - 1)
+    return np.concatenate(channels)[index], lengths
+
+def buckets(channels, bucket_size: int=BUCKET_SIZE):
+    """Groups channel positions by (padded length, dim). Returns {(length, dim): [position, ...]}."""
+    groups = {}
+    for position, channel in enumerate(channels):
+        length = -(-len(channel) // bucket_size) * bucket_size
+        groups.setdefault((length, channel.shape[1]), []).append(position)
+    return groups
+
+def batched_outliers(points, lengths, threshold=3, method: str='NEIGHBOR', window: int=7):
+    """detect_outliers for a batch of padded channels. Returns the (batch, length) outlier mask."""
+    batch, length = points.shape[:2]
+    rows = np.arange(batch)
+
+    if method == 'HAMPEL':
+        # Padding with the last point matches hampel_outliers' edge padding at the end
+        values = points[..., 1:]
+        half_window = max(1, window // 2)
+        padded = np.concatenate([np.repeat(values[:, :1], half_window, axis=1), values,
+                                 np.repeat(values[:, -1:], half_window, axis=1)], axis=1)
+        windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * half_window + 1, axis=1)
+        medians = np.median(windows, axis=-1)
+        mad = np.median(np.abs(windows - medians[..., np.newaxis]), axis=-1)
+        outliers = np.any(np.abs(values - medians) > threshold * MAD_SCALE * mad, axis=-1)
+    else:
+        outliers = np.zeros((batch, length), dtype=bool)
+        median_points = (points[:, :-2] + points[:, 2:]) / 2
+        outliers[:, 1:-1] = np.linalg.norm(points[:, 1:-1] - median_points, axis=-1) > threshold
+        outliers[:, 0] = np.linalg.norm(points[:, 0] - points[:, 1], axis=-1) > threshold
+        last = lengths - 1
+        outliers[rows, last] = np.linalg.norm(points[rows, last] - points[rows, np.maximum(last - 1, 0)], axis=-1) > threshold
+
+    outliers &= np.arange(length) < lengths[:, np.newaxis]
+    outliers[lengths < 3] = False
+    return outliers
+
+@lru_cache(maxsize=32)
+def _binomial_tables(max_degree):
+    """Binomial coefficients and log-factorials up to max_degree, computed as in the single-curve bases. Read-only."""
+    binomials = np.zeros((max_degree + 1, max_degree + 1))
+    for degree in range(min(max_degree, STABLE_BASIS_DEGREE) + 1):
+        binomials[degree, :degree + 1] = [comb(degree, k) for k in range(degree + 1)]
+    log_factorials = np.array([lgamma(k + 1) for k in range(max_degree + 1)])
+    binomials.flags.writeable = log_factorials.flags.writeable = False
+    return binomials, log_factorials
+
+def padded_basis(degrees, t_values, columns: int):
+    """
+    Bernstein bases of a batch of curves with different degrees, as a (batch, samples,
+    columns) array. Columns past a curve's own degree are zero, so padded control
+    points never contribute. Every row is computed as bernstein_basis would compute it.
+    """
+    degrees = np.asarray(degrees)
+    max_degree = columns - 1
+    binomials, log_factorials = _binomial_tables(max_degree)
+    i = np.arange(columns)
+    powers = np.maximum(degrees[:, np.newaxis] - i, 0)  # (batch, max degree + 1)
+    valid = i <= degrees[:, np.newaxis]
+    t = t_values[..., np.newaxis]
+    basis = np.zeros(t_values.shape + (columns,))
+
+    direct = degrees <= STABLE_BASIS_DEGREE
+    if direct.any():
+        coeffs = binomials[degrees[direct]][:, np.newaxis]
+        basis[direct] = coeffs * t[direct] ** i * (1 - t[direct]) ** powers[direct][:, np.newaxis]
+    if (~direct).any():
+        log_coeffs = (log_factorials[degrees[~direct]][:, np.newaxis] - log_factorials[i] - log_factorials[powers[~direct]])[:, np.newaxis]
+        with np.errstate(divide='ignore'):
+            log_t = np.log(t[~direct])
+            log_one_minus_t = np.log1p(-t[~direct])
+        # Skip the 0 * -inf terms at t == 0 and t == 1, they contribute a factor of 1
+        shape = log_t.shape[:-1] + (columns,)
+        log_basis = log_coeffs + np.multiply(i, log_t, out=np.zeros(shape), where=i > 0)
+        log_basis += np.multiply(powers[~direct][:, np.newaxis], log_one_minus_t, out=np.zeros(shape), where=powers[~direct][:, np.newaxis] > 0)
+        basis[~direct] = np.exp(log_basis)
+    return np.where(valid[:, np.newaxis], basis, 0.0)
+
+def padded_samples(points, lengths, parameterization: str='CHORD'):
+    """
+    _fit_samples for a batch of padded channels. Returns the (batch, samples) t_values,
+    the (batch, samples, dim) target points and the (batch, samples) mask of real samples.
+    """
+    batch, length = points.shape[:2]
+    rows = np.arange(batch)
+    if parameterization in ('CHORD', 'TIME'):
+        if parameterization == 'CHORD':
+            # The padding repeats the last point, so it adds no chord length
+            parameters = np.concatenate([np.zeros((batch, 1)), np.cumsum(np.linalg.norm(np.diff(points, axis=1), axis=-1), axis=1)], axis=1)
+        else:
+            parameters = points[..., 0] - points[:, :1, 0]
+        spans = parameters[rows, lengths - 1][:, np.newaxis]
+        uniform = np.arange(length) / np.maximum(lengths - 1, 1)[:, np.newaxis]
+        t_values = np.where(spans > 0, parameters / np.where(spans > 0, spans, 1.0), np.minimum(uniform, 1.0))
+        return t_values, points, np.arange(length) < lengths[:, np.newaxis]
+
+    # 'UNIFORM': max(100, 2n) evenly spaced t over truncated sample indices, as np.linspace computes them
+    counts = np.maximum(100, lengths * 2)
+    j = np.arange(counts.max())
+    t_values = np.minimum(j * (1.0 / (counts - 1))[:, np.newaxis], 1.0)
+    samples = np.minimum((j * ((lengths - 1) / (counts - 1))[:, np.newaxis]).astype(int), (lengths - 1)[:, np.newaxis])
+    mask = j < counts[:, np.newaxis]
+    t_values[rows, counts - 1] = 1.0
+    samples[rows, counts - 1] = lengths - 1
+    return t_values, points[rows[:, np.newaxis], samples], mask
+
+def _masked_errors(distances, mask):
+    """Max and average of each row's real samples."""
+    return np.where(mask, distances, -np.inf).max(axis=1), np.where(mask, distances, 0.0).sum(axis=1) / mask.sum(axis=1)
+
+def padded_newton_parameters(control_points, degrees, t_values, target_points):
+    """_newton_parameters for a batch of curves with different degrees and zero-padded control points."""
+    # Zero-padding the control points keeps the padded derivative control points zero as well
+    control_points = np.concatenate([control_points, np.zeros_like(control_points[:, :1])], axis=1)
+    columns = control_points.shape[1]
+    degree_column = degrees[:, np.newaxis, np.newaxis]
+    i = np.arange(columns - 1)[:, np.newaxis]
+    first = np.where(i < degree_column, degree_column * np.diff(control_points, axis=1), 0.0)
+    second = np.where(i[:-1] < degree_column - 1, (degree_column - 1) * np.diff(first, axis=1), 0.0)
+    diff = padded_basis(degrees, t_values, columns) @ control_points - target_points
+    d1 = padded_basis(degrees - 1, t_values, columns - 1) @ first
+    d2 = padded_basis(np.maximum(degrees - 2, 0), t_values, columns - 2) @ second
+    numerator = np.einsum('...ij,...ij->...i', diff, d1)
+    gauss_newton = np.einsum('...ij,...ij->...i', d1, d1)
+    denominator = gauss_newton + np.einsum('...ij,...ij->...i', diff, d2)
+    denominator = np.where(denominator > 1e-12, denominator, np.maximum(gauss_newton, 1e-12))
+    return np.clip(t_values - numerator / denominator, 0.0, 1.0)
+
+def batched_least_squares(points, lengths, error_threshold: float=0.05, gauss_newton_steps: int=0, parameterization: str='CHORD'):
+    """
+    least_squares_jems_algorithm for a batch of padded channels, each fitted with a
+    curve of degree length - 1. Returns (control points, iterations, max errors, average errors),
+    the control points zero-padded to the longest channel.
+    """
+    degrees = lengths - 1
+    t_values, target_points, mask = padded_samples(points, lengths, parameterization)
+    # Padded samples get zero basis rows and targets, so they drop out of the solve
+    target_points = np.where(mask[..., np.newaxis], target_points, 0.0)
+
+    def solve(t_values, target_points, degrees, mask):
+        basis = np.where(mask[..., np.newaxis], padded_basis(degrees, t_values, points.shape[1]), 0.0)
+        # Minimum-norm least squares through a batched SVD, with lstsq's default singular value cutoff
+        u, singular_values, vt = np.linalg.svd(basis, full_matrices=False)
+        cutoff = np.finfo(float).eps * max(basis.shape[-2:]) * singular_values[..., :1]
+        inverse = np.where(singular_values > cutoff, 1.0 / np.where(singular_values > cutoff, singular_values, 1.0), 0.0)
+        control_points = np.swapaxes(vt, -1, -2) @ (inverse[..., np.newaxis] * (np.swapaxes(u, -1, -2) @ target_points))
+        return control_points, np.linalg.norm(target_points - basis @ control_points, axis=-1)
+
+    control_points, distances = solve(t_values, target_points, degrees, mask)
+    iterations = np.ones(len(points), dtype=int)
+    active = np.ones(len(points), dtype=bool)
+
+    for _ in range(gauss_newton_steps):
+        active &= _masked_errors(distances, mask)[0] > error_threshold
+        if not active.any():
+            break
+        rows = np.flatnonzero(active)
+        new_t_values = padded_newton_parameters(control_points[rows], degrees[rows], t_values[rows], target_points[rows])
+        new_control_points, new_distances = solve(new_t_values, target_points[rows], degrees[rows], mask[rows])
+        # Channels whose step did not reduce the squared error keep their previous solve and stop
+        improved = np.sum(new_distances ** 2, axis=1) < np.sum(distances[rows] ** 2, axis=1)
+        accepted = rows[improved]
+        control_points[accepted] = new_control_points[improved]
+        distances[accepted] = new_distances[improved]
+        t_values[accepted] = new_t_values[improved]
+        iterations[accepted] += 1
+        active[rows[~improved]] = False
+
+    max_errors, average_errors = _masked_errors(distances, mask)
+    return control_points, iterations, max_errors, average_errors
+
+def batched_gradient(points, lengths, error_threshold: float=0.05, max_iterations: int=100, initial_learning_rate: float=0.2, convergence_window: int=5, parameterization: str='CHORD', newton_interval: int=5):
+    """
+    adaptive_jems_algorithm for a batch of padded channels, each fitted with a curve of
+    degree length - 1. Every channel stops on its own convergence test, the loop ends once
+    all have. Returns (control points, iterations, max errors, average errors, converged),
+    the control points zero-padded to the longest channel.
+    """
+    batch = len(points)
+    degrees = lengths - 1
+    rows = np.arange(batch)
+    t_values, target_points, mask = padded_samples(points, lengths, parameterization)
+    basis = padded_basis(degrees, t_values, points.shape[1])
+    control_points = np.where((np.arange(points.shape[1]) < lengths[:, np.newaxis])[..., np.newaxis], points, 0.0)
+
+    history = np.zeros((batch, max_iterations))
+    iterations = np.full(batch, max_iterations)
+    max_errors = np.zeros(batch)
+    average_errors = np.zeros(batch)
+    converged = np.zeros(batch, dtype=bool)
+    active = np.ones(batch, dtype=bool)
+
+    for iteration in range(max_iterations):
+        learning_rate = initial_learning_rate * (0.99 ** iteration)
+
+        if newton_interval and iteration and iteration % newton_interval == 0:
+            # Only channels still iterating, the others keep the basis they converged with
+            moving = np.flatnonzero(active)
+            new_t_values = padded_newton_parameters(control_points[moving], degrees[moving], t_values[moving], target_points[moving])
+            new_basis = padded_basis(degrees[moving], new_t_values, points.shape[1])
+            closer = (np.linalg.norm(new_basis @ control_points[moving] - target_points[moving], axis=-1)
+                      < np.linalg.norm(basis[moving] @ control_points[moving] - target_points[moving], axis=-1))
+            t_values[moving] = np.where(closer, new_t_values, t_values[moving])
+            basis[moving] = np.where(closer[..., np.newaxis], new_basis, basis[moving])
+
+        curve_points = basis @ control_points
+        distances = np.linalg.norm(curve_points - target_points, axis=-1)
+        max_error, average_error = _masked_errors(distances, mask)
+        history[:, iteration] = average_error
+        max_errors[active] = max_error[active]
+        average_errors[active] = average_error[active]
+
+        # Same test as adaptive_jems_algorithm: within the threshold and, once the
+        # window is full, with the average error no longer changing
+        if iteration + 1 > convergence_window:
+            recent = history[:, iteration + 1 - convergence_window:iteration + 1]
+            settled = recent.max(axis=1) - recent.min(axis=1) < error_threshold / 10
+        else:
+            settled = np.ones(batch, dtype=bool)
+        done = active & (max_error <= error_threshold) & settled
+        iterations[done] = iteration + 1
+        converged[done] = True
+        active &= ~done
+        if not active.any():
+            break
+
+        # Nudge every active channel's control points toward its worst sample
+        worst = np.argmax(np.where(mask, distances, -np.inf), axis=1)
+        error_vectors = target_points[rows, worst] - curve_points[rows, worst]
+        adjustment = learning_rate * basis[rows, worst][..., np.newaxis] * error_vectors[:, np.newaxis, :]
+        control_points[active] += np.clip(adjustment[active], -0.5, 0.5)
+
+    return control_points, iterations, max_errors, average_errors, converged
+
+def simplify_batch(channels, vw_tolerance: float=None, error_threshold: float=0.05, max_iterations: int=100, initial_learning_rate: float=0.2, outlier_threshold: float=3, use_outlier_detection: bool=True, outlier_method: str='NEIGHBOR', outlier_window: int=7, solver: str='GRADIENT', gauss_newton_steps: int=0, fit_mode: str='GLOBAL', target_keys: int=0, target_ratio: float=0.0, use_fast_path: bool=True, parameterization: str='CHORD', reducer: str='VW'):
+    """
+    Simplifies many short channels together. Takes the settings of mocap_cleaning_pipeline
+    and returns one PipelineResult per channel, as mocap_cleaning_pipeline would.
+
+    The time of a batched stage is shared evenly between the channels it ran on.
+    If a batched stage fails numerically, every channel is simplified on its own
+    instead and the reason is kept in the `fallback` of each result.
+    """
+    kwargs = dict(vw_tolerance=vw_tolerance, error_threshold=error_threshold, max_iterations=max_iterations,
+                  initial_learning_rate=initial_learning_rate, outlier_threshold=outlier_threshold,
+                  use_outlier_detection=use_outlier_detection, outlier_method=outlier_method, outlier_window=outlier_window,
+                  solver=solver, gauss_newton_steps=gauss_newton_steps, fit_mode=fit_mode, target_keys=target_keys,
+                  target_ratio=target_ratio, use_fast_path=use_fast_path, parameterization=parameterization, reducer=reducer)
+    channels = [np.asarray(channel, dtype=float) for channel in channels]
+    if max_iterations < 1:
+        return [mocap_cleaning_pipeline(channel, **kwargs) for channel in channels]
+
+    try:
+        return _simplify_batch(channels, **kwargs)
+    except (np.linalg.LinAlgError, ValueError) as e:
+        fallback = f"Batched simplification failed: {e}"
+    results = [mocap_cleaning_pipeline(channel, **kwargs) for channel in channels]
+    for result in results:
+        result.fallback = fallback
+    return results
+
+def _shared_stages(name, positions, start_time):
+    """One StageStats per channel of a batched stage, each with an even share of its time."""
+    share = (time.perf_counter() - start_time) / max(len(positions), 1)
+    stages = {}
+    for position in positions:
+        stages[position] = StageStats(name)
+        stages[position].time = share
+    return stages
+
+def _simplify_batch(channels, vw_tolerance, error_threshold, max_iterations, initial_learning_rate, outlier_threshold, use_outlier_detection, outlier_method, outlier_window, solver, gauss_newton_steps, fit_mode, target_keys, target_ratio, use_fast_path, parameterization, reducer):
+    results = [PipelineResult(points_in=len(channel)) for channel in channels]
+    remaining = list(range(len(channels)))
+
+    # 0. Constant, linear and stepped channels skip the rest of the pipeline, unless they have more keys than the budget
+    if use_fast_path:
+        still_remaining = []
+        for position in remaining:
+            start_time = time.perf_counter()
+            (kind, curve), stage = classify_stage(channels[position], error_threshold)
+            stage.time = time.perf_counter() - start_time
+            budget = key_budget(len(channels[position]), target_keys, target_ratio)
+            if curve is None or (budget and len(curve.co) > budget):
+                still_remaining.append(position)
+                continue
+            result = results[position]
+            result.stages[stage.name] = stage
+            result.curve, result.data, result.solver = curve, curve.co, kind
+        remaining = still_remaining
+
+    # 1. Outlier detection, one padded array per length bucket
+    cleaned = {position: channels[position] for position in remaining}
+    if use_outlier_detection and remaining:
+        for (length, _), positions in buckets([channels[position] for position in remaining]).items():
+            positions = [remaining[i] for i in positions]
+            start_time = time.perf_counter()
+            points, lengths = pack([channels[position] for position in positions], length)
+            outliers = batched_outliers(points, lengths, outlier_threshold, outlier_method, outlier_window)
+            for row, position in enumerate(positions):
+                cleaned[position] = channels[position][~outliers[row, :lengths[row]]]
+            stages = _shared_stages('outliers', positions, start_time)
+            for row, position in enumerate(positions):
+                stage = stages[position]
+                stage.points_in = int(lengths[row])
+                stage.points_out = len(cleaned[position])
+                stage.outliers_removed = int(outliers[row].sum())
+                results[position].stages['outliers'] = stage
+
+    still_remaining = []
+    for position in remaining:
+        if len(cleaned[position]) < 2:
+            results[position].error = "Not enough points after outlier removal to fit a Bezier curve."
+        else:
+            still_remaining.append(position)
+    remaining = still_remaining
+
+    # 2. Reduction, per channel
+    reduced = {}
+    for position in remaining:
+        budget = key_budget(len(channels[position]), target_keys, target_ratio)
+        if budget or vw_tolerance is not None:
+            start_time = time.perf_counter()
+            indices, stage = reduction_stage(cleaned[position], vw_tolerance, budget, fit_mode, error_threshold, reducer)
+            reduced[position] = cleaned[position][indices]
+            stage.time = time.perf_counter() - start_time
+            results[position].stages['reduction'] = stage
+            if len(reduced[position]) < 2:
+                results[position].error = "Not enough points after simplification to fit a Bezier curve."
+                continue
+        else:
+            reduced[position] = cleaned[position]
+    remaining = [position for position in remaining if results[position].error is None]
+
+    # 3. Fitting, global fits batched per length bucket
+    if fit_mode == 'PIECEWISE':
+        for position in remaining:
+            start_time = time.perf_counter()
+            stage = StageStats('fit', len(reduced[position]))
+            curve, _ = fit_curve(reduced[position], error_threshold, fit_mode, stats=stage)
+            stage.time = time.perf_counter() - start_time
+            if curve is not None:
+                stage.points_out = len(keyframes_from_fit(curve, reduced[position])[0])
+            _finish_fit(results[position], curve, reduced[position], stage, 'PIECEWISE')
+        return results
+
+    chunks = []
+    for (length, _), bucket in buckets([reduced[position] for position in remaining], FIT_BUCKET_SIZE).items():
+        samples = max(100, length * 2) if parameterization == 'UNIFORM' else length
+        size = max(1, MAX_BASIS_ELEMENTS // (samples * length))
+        chunks += [(length, [remaining[i] for i in bucket[start:start + size]]) for start in range(0, len(bucket), size)]
+    for length, positions in chunks:
+        start_time = time.perf_counter()
+        points, lengths = pack([reduced[position] for position in positions], length)
+        if solver == 'LEAST_SQUARES':
+            control_points, iterations, max_errors, average_errors = batched_least_squares(points, lengths, error_threshold, gauss_newton_steps, parameterization)
+            converged = max_errors <= error_threshold
+        else:
+            control_points, iterations, max_errors, average_errors, converged = batched_gradient(
+                points, lengths, error_threshold, max_iterations, initial_learning_rate, parameterization=parameterization)
+        stages = _shared_stages('fit', positions, start_time)
+        for row, position in enumerate(positions):
+            stage = stages[position]
+            stage.points_in = stage.points_out = int(lengths[row])
+            stage.iterations = int(iterations[row])
+            stage.max_error = float(max_errors[row])
+            stage.average_error = float(average_errors[row])
+            stage.converged = bool(converged[row])
+            _finish_fit(results[position], BezierCurve(control_points[row, :lengths[row]]), reduced[position], stage, solver)
+    return results
+
+def _finish_fit(result, curve, data, stage, solver):
+    result.stages[stage.name] = stage
+    result.curve = curve
+    result.iterations = stage.iterations
+    result.data = data
+    result.solver = solver
+    if curve is None:
+        result.error = "Not enough points to fit a Bezier curve."
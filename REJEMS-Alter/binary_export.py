@@ -0,0 +1,196 @@
+import json
+import os
+
+import numpy as np
+
+from .keyframe_io import INTERPOLATION
+
+# --- Binary Curve Export ---
+# A compact file of simplified keys for engine pipelines, struct-of-arrays per channel:
+#
+#     MAGIC | uint32 version | uint32 header size | JSON header | aligned array blocks
+#
+# The JSON header lists every channel with the dtype, offset, scale and bias of
+# each field. Blocks start on ALIGNMENT byte boundaries, so a reader can map the
+# file and view every field in place without copying.
+
+MAGIC = b'RJEMSCRV'
+FORMAT_VERSION = 1
+ALIGNMENT = 16
+FILE_EXTENSION = ".rjc"
+
+QUANTIZATIONS = ('NONE', 'FLOAT16', 'FIXED16')
+TIME_FIELDS = ('time', 'handle_left_time', 'handle_right_time')
+
+# Share of the fit's error threshold the quantization may add to a value
+ERROR_SHARE = 0.1
+# Largest quantization error allowed on key and handle times, in frames
+TIME_ERROR = 0.01
+
+def _fixed16(values):
+    bias = float(values.min())
+    scale = (float(values.max()) - bias) / 65535.0 or 1.0
+    quantized = np.round((values - bias) / scale).astype(np.uint16)
+    return quantized, scale, bias
+
+def _decode(array, scale, bias):
+    if array.dtype.kind == 'f' and scale == 1.0 and bias == 0.0:
+        return array
+    return array.astype(float) * scale + bias
+
+def quantize(values, quantization='NONE', max_error=0.0):
+    """
+    Quantizes a float array. Returns (array, scale, bias, error) where error is the
+    largest difference between the decoded array and `values`.
+
+    Falls back to float32, then float64, when the requested quantization would
+    exceed `max_error`, so the stored values are always within the bound.
+    """
+    values = np.asarray(values, dtype=float)
+    candidates = []
+    if len(values):
+        if quantization == 'FLOAT16':
+            with np.errstate(over='ignore'):  # Out of range values become inf and fail the bound
+                candidates.append((values.astype(np.float16), 1.0, 0.0))
+        elif quantization == 'FIXED16':
+            candidates.append(_fixed16(values))
+    candidates += [(values.astype(np.float32), 1.0, 0.0), (values, 1.0, 0.0)]
+
+    for array, scale, bias in candidates:
+        error = float(np.max(np.abs(_decode(array, scale, bias) - values))) if len(values) else 0.0
+        if error <= max_error or array.dtype == np.float64:
+            return array, scale, bias, error
+
+def channel_fields(co, handle_left, handle_right, interpolation='BEZIER'):
+    """Splits (n, 2) keyframe arrays into the struct-of-arrays fields of one channel."""
+    count = len(co)
+    if isinstance(interpolation, str):
+        interpolation = np.full(count, INTERPOLATION[interpolation], dtype=np.uint8)
+    return dict(
+        time=co[:, 0], value=co[:, 1],
+        handle_left_time=handle_left[:, 0], handle_left_value=handle_left[:, 1],
+        handle_right_time=handle_right[:, 0], handle_right_value=handle_right[:, 1],
+        interpolation=np.asarray(interpolation, dtype=np.uint8),
+    )
+
+def _aligned(size):
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+def write_curve_file(path, channels, quantization='NONE', error_threshold=0.05):
+    """
+    Writes simplified channels to a binary curve file.
+
+    Args:
+        path (str): The file to write.
+        channels (iterable): One dict per channel with "name", "co", "handle_left" and
+            "handle_right" ((n, 2) arrays), and optional "interpolation" (name or per-key
+            INTERPOLATION values), "data_path", "array_index" and "error_threshold".
+        quantization (str, optional): 'NONE' (float32), 'FLOAT16' or 'FIXED16' (uint16 with
+            a per-field scale and bias). Defaults to 'NONE'.
+        error_threshold (float, optional): The fit's error threshold. Values are quantized
+            within ERROR_SHARE of it, times within TIME_ERROR frames. Defaults to 0.05.
+
+    Returns:
+        int: The size of the file in bytes.
+    """
+    entries, blocks = [], []
+    offset = 0
+    for channel in channels:
+        bound = ERROR_SHARE * channel.get('error_threshold', error_threshold)
+        fields = channel_fields(channel['co'], channel['handle_left'], channel['handle_right'], channel.get('interpolation', 'BEZIER'))
+        layout = {}
+        for name, values in fields.items():
+            if name == 'interpolation':
+                array, scale, bias, error = values, 1.0, 0.0, 0.0
+            else:
+                array, scale, bias, error = quantize(values, quantization, TIME_ERROR if name in TIME_FIELDS else bound)
+            layout[name] = dict(dtype=array.dtype.str, offset=offset, scale=scale, bias=bias, error=error)
+            blocks.append((offset, np.ascontiguousarray(array)))
+            offset = _aligned(offset + array.nbytes)
+        entries.append(dict(
+            name=channel['name'],
+            data_path=channel.get('data_path', channel['name']),
+            array_index=channel.get('array_index', 0),
+            count=len(channel['co']),
+            fields=layout,
+        ))
+
+    header = json.dumps(dict(quantization=quantization, channels=entries)).encode('utf-8')
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+    header = header.ljust(data_start - len(MAGIC) - 8, b' ')
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.array([FORMAT_VERSION, len(header)], dtype='<u4').tobytes())
+        f.write(header)
+        for block_offset, array in blocks:
+            f.seek(data_start + block_offset)
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    return os.path.getsize(path)
+
+class CurveChannel:
+    """One channel of a CurveFile. Fields are numpy views into the mapped file."""
+    def __init__(self, entry, data):
+        self.name = entry['name']
+        self.data_path = entry['data_path']
+        self.array_index = entry['array_index']
+        self.count = entry['count']
+        self.layout = entry['fields']
+        self._data = data
+
+    def raw(self, field):
+        """The stored array of a field, a view with its quantized dtype."""
+        layout = self.layout[field]
+        dtype = np.dtype(layout['dtype'])
+        start = layout['offset']
+        return self._data[start:start + self.count * dtype.itemsize].view(dtype)
+
+    def field(self, field):
+        """The decoded values of a field. Float fields stored unquantized and the interpolation are returned as views."""
+        if field == 'interpolation':
+            return self.raw(field)
+        layout = self.layout[field]
+        return _decode(self.raw(field), layout['scale'], layout['bias'])
+
+    def error(self, field):
+        """The largest quantization error of a field, measured when the file was written."""
+        return self.layout[field]['error']
+
+    def keyframes(self):
+        """Returns decoded (co, handle_left, handle_right) as (n, 2) arrays."""
+        return (np.column_stack([self.field('time'), self.field('value')]),
+                np.column_stack([self.field('handle_left_time'), self.field('handle_left_value')]),
+                np.column_stack([self.field('handle_right_time'), self.field('handle_right_value')]))
+
+class CurveFile:
+    """
+    Memory-maps a binary curve file written by write_curve_file. Nothing is
+    read from disk until a field is accessed.
+    """
+    def __init__(self, path):
+        self.path = path
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a RE:JEMS-Alter curve file")
+        version, header_size = buffer[len(MAGIC):len(MAGIC) + 8].view('<u4')
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {version}, this reader supports up to {FORMAT_VERSION}")
+        header_start = len(MAGIC) + 8
+        header = json.loads(bytes(buffer[header_start:header_start + header_size]).decode('utf-8'))
+        data = buffer[header_start + header_size:]
+        self.quantization = header['quantization']
+        self.channels = [CurveChannel(entry, data) for entry in header['channels']]
+        self._by_name = {channel.name: channel for channel in self.channels}
+
+    def __len__(self):
+        return len(self.channels)
+
+    def __iter__(self):
+        return iter(self.channels)
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+def read_curve_file(path):
+    return CurveFile(path)
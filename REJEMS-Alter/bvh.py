@@ -0,0 +1,214 @@
+import os
+import tempfile
+
+import numpy as np
+
+from .channels import ChannelData
+
+# --- Streaming BVH Reader ---
+# The HIERARCHY is parsed line by line, the MOTION block CHUNK_BYTES of text at
+# a time straight into a float32 (frames, channels) np.memmap. Neither the text
+# nor a dense float64 copy of the take is ever held in memory, and channels are
+# read from the map one column at a time, converted to the pose values Blender
+# uses, so they can go straight into the simplification pipeline.
+
+CHUNK_BYTES = 1 << 22
+# Length of bones without a child or end site, in BVH units
+BONE_LENGTH = 1.0
+
+POSITION_CHANNELS = ('Xposition', 'Yposition', 'Zposition')
+ROTATION_CHANNELS = ('Xrotation', 'Yrotation', 'Zrotation')
+
+class BvhJoint:
+    """One joint of the HIERARCHY: its offset from the parent and its columns in the motion array."""
+    def __init__(self, name: str, parent: 'BvhJoint'=None, offset=(0.0, 0.0, 0.0)):
+        self.name = name
+        self.parent = parent
+        self.offset = np.asarray(offset, dtype=float)
+        self.channels = []
+        self.first_column = 0
+        self.children = []
+        self.end_offset = None
+
+    @property
+    def rotation_order(self):
+        """Axes of the rotation channels in file order, e.g. 'ZXY'."""
+        return "".join(channel[0] for channel in self.channels if channel in ROTATION_CHANNELS)
+
+    def columns(self, kinds):
+        """Returns {axis index: motion column} for the channels listed in kinds."""
+        return {kinds.index(channel): self.first_column + i for i, channel in enumerate(self.channels) if channel in kinds}
+
+    def bone_length(self):
+        """Distance to the first child or the end site, BONE_LENGTH if both are at the joint."""
+        tail = self.children[0].offset if self.children else self.end_offset
+        length = float(np.linalg.norm(tail)) if tail is not None else 0.0
+        return length if length > 1e-6 else BONE_LENGTH
+
+class PoseChannel:
+    """The data_path and array_index of a pose channel, standing in for an fcurve that does not exist yet."""
+    def __init__(self, data_path: str, array_index: int):
+        self.data_path = data_path
+        self.array_index = array_index
+
+def _bone_path(name):
+    escaped = name.replace('\\', '\\\\').replace('"', '\\"')
+    return f'pose.bones["{escaped}"]'
+
+def parse_hierarchy(lines):
+    """
+    Parses the HIERARCHY lines of a BVH file. Returns the joints in file order,
+    the first one is the root. Unknown keywords are skipped.
+    """
+    joints = []
+    stack = []
+    in_end_site = False
+    tokens = iter(" ".join(line.strip() for line in lines).split())
+    for token in tokens:
+        if token in ('ROOT', 'JOINT'):
+            parent = stack[-1] if stack else None
+            joint = BvhJoint(next(tokens), parent)
+            joint.first_column = sum(len(other.channels) for other in joints)
+            if parent is not None:
+                parent.children.append(joint)
+            joints.append(joint)
+        elif token == 'End':
+            next(tokens)  # Site
+            in_end_site = True
+        elif token == '{':
+            if not in_end_site:
+                stack.append(joints[-1])
+        elif token == '}':
+            if in_end_site:
+                in_end_site = False
+            else:
+                stack.pop()
+        elif token == 'OFFSET':
+            offset = [float(next(tokens)) for _ in range(3)]
+            if in_end_site:
+                stack[-1].end_offset = np.array(offset)
+            else:
+                joints[-1].offset = np.array(offset)
+        elif token == 'CHANNELS':
+            joints[-1].channels = [next(tokens) for _ in range(int(next(tokens)))]
+    if not joints:
+        raise ValueError("BVH file has no ROOT joint")
+    return joints
+
+class BvhMotion:
+    """
+    A BVH take: the joints, the frame time and a float32 (frames, channels) array,
+    memory-mapped from a temporary file unless the take was read into memory.
+    Call close() to remove the temporary file.
+    """
+    def __init__(self, joints, frame_time: float, frames: np.ndarray, map_path: str=None):
+        self.joints = joints
+        self.frame_time = frame_time
+        self.frames = frames
+        self.map_path = map_path
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def channel_count(self):
+        return self.frames.shape[1]
+
+    def pose_channels(self, scale: float=1.0, frame_start: int=1, joints=None):
+        """
+        Yields (PoseChannel, (frame, value) points of a float32 ChannelData) for every
+        channel of `joints` (all joints by default), one motion column at a time. Positions become pose
+        locations relative to the joint's rest offset, rotations become radians,
+        unwrapped so they never jump by a full turn.
+        """
+        times = np.arange(frame_start, frame_start + len(self.frames), dtype=float)
+        for joint in self.joints if joints is None else joints:
+            path = _bone_path(joint.name)
+            for axis, column in sorted(joint.columns(POSITION_CHANNELS).items()):
+                values = (self.frames[:, column].astype(float) - joint.offset[axis]) * scale
+                yield PoseChannel(f"{path}.location", axis), ChannelData(times, [values]).points
+            for axis, column in sorted(joint.columns(ROTATION_CHANNELS).items()):
+                values = np.unwrap(np.radians(self.frames[:, column].astype(float)))
+                yield PoseChannel(f"{path}.rotation_euler", axis), ChannelData(times, [values]).points
+
+    def close(self):
+        """Drops the array and removes its temporary file."""
+        self.frames = None
+        if self.map_path is not None:
+            try:
+                os.remove(self.map_path)
+            except OSError:
+                pass  # Still mapped on Windows, it stays in the temp folder
+            self.map_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def read_bvh(path: str, map_directory: str=None, chunk_bytes: int=CHUNK_BYTES, use_map: bool=True):
+    """
+    Reads a BVH file. The MOTION block is parsed chunk by chunk into a float32
+    array of one row per frame and one column per channel.
+
+    Args:
+        path (str): The .bvh file.
+        map_directory (str, optional): Folder of the temporary memory-mapped file. Defaults to None, the system temp folder.
+        chunk_bytes (int, optional): Bytes of motion text parsed at a time. Defaults to CHUNK_BYTES.
+        use_map (bool, optional): Map the array from a temporary file instead of holding it in memory. Defaults to True.
+
+    Returns:
+        BvhMotion: The take. Use it as a context manager, or call close(), to remove the temporary file.
+    """
+    with open(path, 'rb') as f:
+        hierarchy = []
+        for line in f:
+            if line.strip().upper() == b'MOTION':
+                break
+            hierarchy.append(line.decode('utf-8', 'replace'))
+        else:
+            raise ValueError(f"{path} has no MOTION block")
+        joints = parse_hierarchy(hierarchy)
+
+        frame_count = int(f.readline().split(b':')[1])
+        frame_time = float(f.readline().split(b':')[1])
+        channel_count = sum(len(joint.channels) for joint in joints)
+
+        map_path = None
+        if use_map and frame_count:
+            handle, map_path = tempfile.mkstemp(suffix='.f32', dir=map_directory)
+            os.close(handle)
+            frames = np.memmap(map_path, dtype=np.float32, mode='w+', shape=(frame_count, channel_count))
+        else:
+            frames = np.empty((frame_count, channel_count), dtype=np.float32)
+
+        try:
+            row = 0
+            leftover = b''
+            while row < frame_count:
+                chunk = f.read(chunk_bytes)
+                text = leftover + chunk
+                if chunk:
+                    # Only whole lines are parsed, the rest waits for the next chunk
+                    cut = text.rfind(b'\n') + 1
+                    text, leftover = text[:cut], text[cut:]
+                if not text.strip():
+                    if not chunk:
+                        break
+                    continue
+                values = np.fromstring(text, dtype=np.float32, sep=' ')
+                if len(values) % channel_count:
+                    raise ValueError(f"{path}: frame {row + 1} does not have {channel_count} channels")
+                block = values.reshape(-1, channel_count)[:frame_count - row]
+                frames[row:row + len(block)] = block
+                row += len(block)
+                if not chunk:
+                    break
+        except Exception:
+            BvhMotion(joints, frame_time, frames, map_path).close()
+            raise
+
+    if isinstance(frames, np.memmap):
+        frames.flush()
+    return BvhMotion(joints, frame_time, frames[:row], map_path)
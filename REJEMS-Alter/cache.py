@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from .utils import BezierCurve, ConstantKeys, LinearKeys, PiecewiseCubicCurve, PipelineResult
+
+# Bump whenever the pipeline output changes for the same inputs, old disk entries are then ignored
+CACHE_VERSION = 4
+
+CURVE_TYPES = {'BEZIER': BezierCurve, 'PIECEWISE': PiecewiseCubicCurve, 'LINEAR': LinearKeys, 'CONSTANT': ConstantKeys}
+
+def _encode(result):
+    arrays = dict(result=np.array(json.dumps(result.to_dict())))
+    if result.curve is not None:
+        if isinstance(result.curve, PiecewiseCubicCurve):
+            arrays['curve_type'], arrays['curve'] = np.array('PIECEWISE'), result.curve.segments
+        elif isinstance(result.curve, LinearKeys):
+            arrays['curve_type'], arrays['curve'] = np.array(result.curve.INTERPOLATION), result.curve.co
+        else:
+            arrays['curve_type'], arrays['curve'] = np.array('BEZIER'), result.curve.control_points
+    if result.data is not None:
+        arrays['data'] = np.asarray(result.data)
+    return arrays
+
+def _decode(arrays):
+    curve = None
+    if 'curve_type' in arrays:
+        curve = CURVE_TYPES[str(arrays['curve_type'])](arrays['curve'])
+    data = arrays['data'] if 'data' in arrays else None
+    return PipelineResult.from_dict(json.loads(str(arrays['result'])), curve, data)
+
+def _hash_columns(digest, data):
+    """
+    Adds an array's dtype, shape and bytes to a digest one column at a time, so the
+    contiguous columns of a ChannelData are hashed without a row-major copy.
+    """
+    data = np.asarray(data)
+    digest.update(f"{data.dtype.str}|{data.shape}|".encode())
+    for column in (data.T if data.ndim > 1 else [data]):
+        digest.update(np.ascontiguousarray(column))
+
+# --- Result Cache ---
+class ResultCache:
+    """
+    Pipeline results keyed by a hash of the raw keyframe bytes and the pipeline
+    arguments. Entries live in an in-memory LRU and, when a directory is set,
+    as .npz files on disk, evicted oldest-first past `max_disk_bytes`.
+    """
+    def __init__(self, max_entries: int=4096, directory: str=None, max_disk_bytes: int=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(data, kwargs: dict):
+        digest = hashlib.sha1(f"{CACHE_VERSION}|".encode())
+        _hash_columns(digest, data)
+        digest.update(repr(sorted(kwargs.items())).encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        """Returns the cached PipelineResult for a key, or None."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        if self.directory:
+            path = self._path(key)
+            try:
+                with np.load(path, allow_pickle=False) as arrays:
+                    entry = _decode(arrays)
+                os.utime(path)  # Keep recently used files away from eviction
+            except (OSError, ValueError, KeyError):
+                entry = None
+            if entry is not None:
+                self._remember(key, entry)
+                self.hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    def put(self, key, result):
+        self._remember(key, result)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                np.savez(f, **_encode(result))
+            os.replace(temp_path, self._path(key))
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def prune_disk(self):
+        """Deletes the least recently used disk entries until the cache fits in max_disk_bytes."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npz"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self._memory.clear()
+        if self.directory and os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".npz"):
+                    os.remove(entry.path)
+
+# Shared by every operator run, so re-runs in the same session skip unchanged channels
+result_cache = ResultCache()
+
+# --- Stage Memo ---
+class StageCache:
+    """
+    In-memory LRU of intermediate stage outputs for mocap_cleaning_pipeline's
+    stage_cache. Keys are built from a hash of the raw keys plus the settings
+    each stage depends on, so changing the error threshold reuses the outlier
+    and reduction results. Outputs are shared, callers must not modify them.
+    """
+    def __init__(self, max_entries: int=512):
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def data_key(data):
+        digest = hashlib.sha1()
+        _hash_columns(digest, data)
+        return digest.hexdigest()
+
+    def get(self, key):
+        entry = self._memory.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._memory.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        self._memory.clear()
+
+# Used by the live preview, which re-runs the same channels with small setting changes
+stage_cache = StageCache()
\ No newline at end of file
@@ -0,0 +1,55 @@
+import numpy as np
+
+# --- Channel Store ---
+# A channel is held as a struct of arrays: its key times and each of its value
+# columns are contiguous rows of one (1 + values, n) array of a single dtype.
+# points is the (n, 1 + values) transposed view of that array, which every
+# pipeline stage takes as it is, so (frame, value) rows are never built.
+# float32 matches Blender's keyframe storage and is half the size of float64,
+# the stages compute in float64 on the rows they read.
+
+CHANNEL_DTYPE = np.float32
+
+class ChannelData:
+    """
+    Key times and values of one channel, or of jointly fitted channels that share
+    their key times, as contiguous columns.
+
+    Args:
+        times (array): The key frames.
+        values (iterable): One value array per channel, each as long as times.
+        dtype (np.dtype, optional): Storage type of the columns. Defaults to CHANNEL_DTYPE.
+    """
+    def __init__(self, times, values, dtype=CHANNEL_DTYPE):
+        values = list(values)
+        self.columns = np.empty((1 + len(values), len(times)), dtype=dtype)
+        self.columns[0] = times
+        for row, column in enumerate(values, start=1):
+            self.columns[row] = column
+
+    @classmethod
+    def from_points(cls, points, dtype=CHANNEL_DTYPE):
+        """Stores (frame, value, ...) points."""
+        points = np.asarray(points)
+        return cls(points[:, 0], points[:, 1:].T, dtype)
+
+    @property
+    def times(self):
+        return self.columns[0]
+
+    @property
+    def values(self):
+        """The (values, n) value columns."""
+        return self.columns[1:]
+
+    @property
+    def points(self):
+        """The (n, 1 + values) points, a view of the columns."""
+        return self.columns.T
+
+    @property
+    def nbytes(self):
+        return self.columns.nbytes
+
+    def __len__(self):
+        return self.columns.shape[1]
@@ -0,0 +1,232 @@
+"""
+Headless batch simplification, no Blender required.
+
+    python REJEMS-Alter/cli.py INPUT_DIR OUTPUT_DIR [--workers N] [options]
+
+Every .npz or .csv file in INPUT_DIR holds one take with one channel per column.
+CSV files need a header row, NPZ files hold one 1-D array per channel (2-D arrays
+are split per column, or fitted as one vector channel with --joint). A column
+or array named "frame" gives the key times, otherwise the row index is used.
+BVH files are read into a memory-mapped array, see bvh.py, and give one channel
+per pose location and rotation axis (one per bone property with --joint).
+
+For every take a <name>.npz with "<channel>/co", "<channel>/handle_left" and
+"<channel>/handle_right" arrays is written to OUTPUT_DIR, plus one summary.csv
+row with input keys, output keys, max error and time. With --format rjc a
+<name>.rjc binary curve file is written instead, see binary_export.py.
+"""
+import argparse
+import csv
+import importlib
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+if __package__ in (None, ""):
+    # Run as a script: import the add-on folder as a package so relative imports work
+    _addon_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.dirname(_addon_dir))
+    __package__ = os.path.basename(_addon_dir)
+    importlib.import_module(__package__)
+
+import numpy as np
+
+from .binary_export import FILE_EXTENSION, QUANTIZATIONS, write_curve_file
+from .bvh import read_bvh
+from .channels import ChannelData
+from .streaming import run_pipeline
+from .parallel import default_worker_count, get_pool, shutdown_pool
+from .utils import REDUCERS
+
+INPUT_EXTENSIONS = ('.npz', '.csv', '.bvh')
+FRAME_COLUMNS = ('frame', 'time')
+SUMMARY_FIELDS = ['file', 'channels', 'input_keys', 'output_keys', 'max_error', 'time']
+
+def iter_input_files(input_dir):
+    for name in sorted(os.listdir(input_dir)):
+        if name.lower().endswith(INPUT_EXTENSIONS):
+            yield os.path.join(input_dir, name)
+
+def read_channels(path, joint=False):
+    """
+    Yields (channel name, (frame, value) array) for every channel of one take.
+    With joint on, 2-D arrays are yielded whole as (frame, value, value, ...) arrays.
+    """
+    if path.lower().endswith('.bvh'):
+        yield from read_bvh_channels(path, joint)
+        return
+    if path.lower().endswith('.csv'):
+        with open(path, newline='') as f:
+            header = [name.strip() for name in next(csv.reader(f))]
+        data = np.loadtxt(path, delimiter=',', skiprows=1, ndmin=2)
+        columns = {name: data[:, i] for i, name in enumerate(header)}
+    else:
+        # np.load on an .npz is lazy, arrays are only read when accessed
+        columns = np.load(path)
+
+    names = list(columns.keys())
+    frame_name = next((name for name in names if name.lower() in FRAME_COLUMNS), None)
+    frames = np.asarray(columns[frame_name], dtype=float) if frame_name else None
+
+    for name in names:
+        if name == frame_name:
+            continue
+        values = np.asarray(columns[name], dtype=float)
+        if values.ndim == 1 or joint:
+            channels = [(name, values)]
+        else:
+            channels = [(f"{name}[{i}]", values[:, i]) for i in range(values.shape[1])]
+        for channel_name, channel_values in channels:
+            times = frames if frames is not None else np.arange(len(channel_values), dtype=float)
+            yield channel_name, np.column_stack([times, channel_values])
+
+def read_bvh_channels(path, joint=False):
+    """
+    Yields (channel name, (frame, value) array) for the pose channels of a BVH take,
+    reading one column of the memory-mapped motion at a time. With joint on, the
+    axes of each bone's location and rotation are yielded together.
+    """
+    with read_bvh(path) as motion:
+        channels = motion.pose_channels(frame_start=0)
+        if not joint:
+            for channel, data in channels:
+                yield f"{channel.data_path}[{channel.array_index}]", data
+            return
+        for data_path, group in itertools.groupby(channels, key=lambda item: item[0].data_path):
+            group = [data for _, data in group]
+            yield data_path, ChannelData(group[0][:, 0], [data[:, 1] for data in group]).points
+
+def process_file(path, output_dir, kwargs, joint=False, output_format='npz', quantization='NONE'):
+    """Simplifies every channel of one take and writes its keys. Returns the summary row."""
+    start_time = time.perf_counter()
+    output = {}
+    curves = []
+    input_keys = output_keys = 0
+    max_error = 0.0
+
+    for name, data in read_channels(path, joint):
+        result = run_pipeline(data, **kwargs)
+        columns = data.shape[1] - 1
+        input_keys += len(data) * columns
+        if result.curve is None:
+            continue
+        co, handle_left, handle_right = result.keyframes()
+        if output_format == 'rjc':
+            # One channel per column, joint channels share their key times
+            for column in range(1, columns + 1):
+                channel_name = name if columns == 1 else f"{name}[{column - 1}]"
+                curves.append(dict(name=channel_name, co=co[:, [0, column]], handle_left=handle_left[:, [0, column]],
+                                   handle_right=handle_right[:, [0, column]], interpolation=getattr(result.curve, 'INTERPOLATION', 'BEZIER')))
+        output[f"{name}/co"] = co
+        output[f"{name}/handle_left"] = handle_left
+        output[f"{name}/handle_right"] = handle_right
+        output_keys += len(co) * columns
+        max_error = max(max_error, result.max_error)
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if output_format == 'rjc':
+        write_curve_file(os.path.join(output_dir, stem + FILE_EXTENSION), curves, quantization, kwargs['error_threshold'])
+    else:
+        np.savez(os.path.join(output_dir, f"{stem}.npz"), **output)
+
+    return dict(
+        file=os.path.basename(path),
+        channels=len(output) // 3,
+        input_keys=input_keys,
+        output_keys=output_keys,
+        max_error=f"{max_error:.6f}",
+        time=f"{time.perf_counter() - start_time:.4f}",
+    )
+
+def run(input_dir, output_dir, kwargs, workers=0, joint=False, output_format='npz', quantization='NONE'):
+    """
+    Simplifies every take in input_dir and yields the summary rows as takes finish.
+    Only about two takes per worker are in flight, so the corpus is never loaded at once.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    files = iter_input_files(input_dir)
+    workers = workers or default_worker_count()
+
+    if workers <= 1:
+        for path in files:
+            yield process_file(path, output_dir, kwargs, joint, output_format, quantization)
+        return
+
+    # Submit through the package-qualified module so workers can unpickle the function
+    worker = importlib.import_module(f"{__package__}.cli").process_file
+    pool = get_pool(workers)
+    pending = set()
+    try:
+        for path in files:
+            pending.add(pool.submit(worker, path, output_dir, kwargs, joint, output_format, quantization))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+    finally:
+        shutdown_pool()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simplify mocap channels with the RE:JEMS-Alter pipeline, without Blender.")
+    parser.add_argument("input_dir", help="Folder of .npz or .csv takes with one column per channel, or .bvh takes")
+    parser.add_argument("output_dir", help="Folder for the simplified keys and summary.csv")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes, 0 uses all cores, 1 runs serially")
+    parser.add_argument("--vw-tolerance", type=float, default=0.05, help="Tolerance of the reducer, negative disables reduction")
+    parser.add_argument("--reducer", choices=list(REDUCERS), default='VW', help="Reduction strategy applied with --vw-tolerance")
+    parser.add_argument("--error-threshold", type=float, default=0.05)
+    parser.add_argument("--max-iterations", type=int, default=100)
+    parser.add_argument("--learning-rate", type=float, default=0.2)
+    parser.add_argument("--outlier-threshold", type=float, default=3.0)
+    parser.add_argument("--no-outliers", action="store_true", help="Disable outlier detection")
+    parser.add_argument("--outlier-method", choices=['NEIGHBOR', 'HAMPEL'], default='NEIGHBOR')
+    parser.add_argument("--outlier-window", type=int, default=7, help="Window size of the Hampel filter")
+    parser.add_argument("--solver", choices=['GRADIENT', 'LEAST_SQUARES'], default='GRADIENT')
+    parser.add_argument("--gauss-newton-steps", type=int, default=0)
+    parser.add_argument("--fit-mode", choices=['GLOBAL', 'PIECEWISE'], default='GLOBAL')
+    parser.add_argument("--parameterization", choices=['CHORD', 'TIME', 'UNIFORM'], default='CHORD')
+    parser.add_argument("--joint", action="store_true", help="Fit the columns of 2-D arrays together with shared key times")
+    parser.add_argument("--target-keys", type=int, default=0, help="Keyframe budget per channel, replaces --vw-tolerance")
+    parser.add_argument("--target-ratio", type=float, default=0.0, help="Keep at most this fraction of each channel's keys, replaces --vw-tolerance")
+    parser.add_argument("--format", choices=['npz', 'rjc'], default='npz', help="Write .npz keys or a binary .rjc curve file per take")
+    parser.add_argument("--quantization", choices=list(QUANTIZATIONS), default='NONE', help="Quantization of the .rjc values, kept within a share of --error-threshold")
+    parser.add_argument("--stream-window", type=int, default=0, help="Stream channels longer than this many keys in windows of this size, 0 disables streaming")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    kwargs = dict(
+        vw_tolerance=args.vw_tolerance if args.vw_tolerance >= 0 else None,
+        error_threshold=args.error_threshold,
+        max_iterations=args.max_iterations,
+        initial_learning_rate=args.learning_rate,
+        outlier_threshold=args.outlier_threshold,
+        use_outlier_detection=not args.no_outliers,
+        outlier_method=args.outlier_method,
+        outlier_window=args.outlier_window,
+        solver=args.solver,
+        gauss_newton_steps=args.gauss_newton_steps,
+        fit_mode=args.fit_mode,
+        parameterization=args.parameterization,
+        reducer=args.reducer,
+        stream_window=args.stream_window,
+        target_keys=args.target_keys,
+        target_ratio=args.target_ratio,
+    )
+
+    summary_path = os.path.join(args.output_dir, "summary.csv")
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(summary_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        for row in run(args.input_dir, args.output_dir, kwargs, args.workers, args.joint, args.format, args.quantization):
+            writer.writerow(row)
+            f.flush()
+            print(f"{row['file']}: {row['input_keys']} -> {row['output_keys']} keys, max error {row['max_error']}, {row['time']}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+import json
+import time
+
+import numpy as np
+
+from .keyframe_io import HANDLE_TYPE, INTERPOLATION
+from .utils import StageStats, _normalize, detect_outliers, mocap_cleaning_pipeline
+
+# --- Incremental Re-simplification ---
+# After a few frames of a long take are fixed, only the edited region is
+# simplified again. Changed regions are found by comparing per-block fingerprints
+# of the source keys with the ones stored when the action was simplified. Each
+# region is re-simplified between two existing keys of the Simplified_ action
+# (the anchors) and the new keys replace the old ones between them. The anchors
+# keep their position and outer handle, and their inner handle is aligned with
+# the outer one, so the curve stays smooth across the splice.
+
+# Frames per fingerprint block
+FINGERPRINT_BLOCK = 64
+# Frames re-simplified on each side of an edit
+SPLICE_MARGIN = 8
+# Source keys of context on each side of a window for outlier detection
+CONTEXT_KEYS = 16
+# Custom property of the Simplified_ action that holds the source fingerprints
+FINGERPRINT_PROPERTY = "rejems_fingerprints"
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+def _mix(values):
+    """The splitmix64 finalizer, scrambles every bit of uint64 values."""
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+def fingerprint(data: np.ndarray, block_size: int=FINGERPRINT_BLOCK):
+    """
+    Returns {block: digest} for (frame, value, ...) keys, one 64-bit digest per block of
+    block_size frames. Each key is hashed from its exact bits and the keys of a block
+    are combined with xor, so the whole channel is hashed in a few vectorized passes.
+    """
+    data = np.ascontiguousarray(data, dtype=float)
+    if not len(data):
+        return {}
+    bits = data.view(np.uint64).reshape(len(data), -1)
+    digests = _mix(bits[:, 0] + _GOLDEN)
+    for column in range(1, bits.shape[1]):
+        digests = _mix(digests ^ bits[:, column])
+    blocks = np.floor(data[:, 0] / block_size).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, np.diff(blocks) != 0])
+    return dict(zip(blocks[starts].tolist(), np.bitwise_xor.reduceat(digests, starts).tolist()))
+
+def encode_fingerprints(fingerprints: dict, block_size: int=FINGERPRINT_BLOCK):
+    """
+    Encodes {channel: fingerprint} as a JSON string for FINGERPRINT_PROPERTY. Each channel
+    stores its first block and the hex digests of every block up to its last one,
+    empty blocks as zero.
+    """
+    channels = {}
+    for name, blocks in fingerprints.items():
+        if not blocks:
+            channels[name] = [0, ""]
+            continue
+        first, last = min(blocks), max(blocks)
+        digests = np.array([blocks.get(block, 0) for block in range(first, last + 1)], dtype='>u8')
+        channels[name] = [first, digests.tobytes().hex()]
+    return json.dumps(dict(block_size=block_size, channels=channels))
+
+def decode_fingerprints(text: str):
+    """Returns (block_size, {channel: fingerprint}) from encode_fingerprints."""
+    stored = json.loads(text)
+    fingerprints = {}
+    for name, (first, digests) in stored['channels'].items():
+        values = np.frombuffer(bytes.fromhex(digests), dtype='>u8')
+        fingerprints[name] = {first + block: int(value) for block, value in enumerate(values) if value}
+    return stored['block_size'], fingerprints
+
+def changed_ranges(old: dict, new: dict, block_size: int=FINGERPRINT_BLOCK):
+    """Returns the (start_frame, end_frame) ranges of the blocks whose digests differ."""
+    blocks = sorted(block for block in set(old) | set(new) if old.get(block) != new.get(block))
+    ranges = []
+    for block in blocks:
+        if ranges and ranges[-1][1] == block * block_size:
+            ranges[-1][1] = (block + 1) * block_size
+        else:
+            ranges.append([block * block_size, (block + 1) * block_size])
+    return [tuple(frame_range) for frame_range in ranges]
+
+def merge_ranges(ranges, gap: float=0.0):
+    """Merges (start_frame, end_frame) ranges that overlap or are less than gap frames apart."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start - merged[-1][1] < gap:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(frame_range) for frame_range in merged]
+
+class Splice:
+    """
+    New keys for one re-simplified window of an existing simplified channel.
+
+    The existing keys left..right (both anchors included) are replaced by co,
+    handle_left and handle_right. left is -1 when the window starts at the first
+    source key and right is the number of existing keys when it runs to the
+    last one; the window then has no anchor on that side.
+    """
+    def __init__(self, left: int, right: int, co, handle_left, handle_right, result):
+        self.left = left
+        self.right = right
+        self.co = co
+        self.handle_left = handle_left
+        self.handle_right = handle_right
+        self.result = result
+
+def _outer_tangent(key, outer_handle):
+    """Unit direction from an anchor's outer handle through the key, None for a zero-length handle."""
+    direction = key - outer_handle
+    return _normalize(direction) if np.linalg.norm(direction) > 1e-12 else None
+
+def resimplify_window(data: np.ndarray, co: np.ndarray, handle_left: np.ndarray, handle_right: np.ndarray, start_frame: float, end_frame: float, margin: float=SPLICE_MARGIN, target_keys: int=0, stream_window: int=0, **kwargs):
+    """
+    Re-simplifies the source keys between start_frame and end_frame. Takes the
+    settings of mocap_cleaning_pipeline.
+
+    The window runs from the last existing key at least `margin` frames before
+    start_frame to the first one at least `margin` frames after end_frame. Those
+    two keys are the anchors: the window is fitted through them and, in 'PIECEWISE'
+    mode, along their outer handles. Outlier detection sees CONTEXT_KEYS source
+    keys past each anchor but never removes the anchors.
+
+    Args:
+        data (np.ndarray): The current (frame, value, ...) source keys.
+        co, handle_left, handle_right (np.ndarray): The existing simplified keys, with the same columns as data.
+        start_frame, end_frame (float): The frames to re-simplify.
+        margin (float, optional): Frames re-simplified on each side of the range. Defaults to SPLICE_MARGIN.
+        target_keys (int, optional): Key budget of the whole channel, applied to the window as a ratio. Defaults to 0.
+
+    Returns:
+        Splice: The new keys, or None if the window could not be fitted.
+    """
+    data = np.asarray(data)
+    frames = np.asarray(co)[:, 0]
+    left = int(np.searchsorted(frames, start_frame - margin, side='right')) - 1
+    right = int(np.searchsorted(frames, end_frame + margin, side='left'))
+    has_left, has_right = left >= 0, right < len(frames)
+
+    # 1. Source keys strictly between the anchors, outliers detected with context
+    start_time = time.perf_counter()
+    low = np.searchsorted(data[:, 0], frames[left], side='right') if has_left else 0
+    high = np.searchsorted(data[:, 0], frames[right], side='left') if has_right else len(data)
+    outliers = StageStats('outliers', high - low)
+    inside = np.asarray(data[low:high], dtype=float)
+    if kwargs.get('use_outlier_detection', True) and len(inside):
+        context = max(CONTEXT_KEYS, kwargs.get('outlier_window', 7) // 2 + 1)
+        context_start = max(low - context, 0)
+        mask = detect_outliers(data[context_start:high + context], threshold=kwargs.get('outlier_threshold', 3),
+                               method=kwargs.get('outlier_method', 'NEIGHBOR'), window=kwargs.get('outlier_window', 7))
+        mask = mask[low - context_start:high - context_start]
+        inside = inside[~mask]
+        outliers.outliers_removed = int(mask.sum())
+    outliers.points_out = len(inside)
+    outliers.time = time.perf_counter() - start_time
+
+    window = [inside]
+    left_tangent = right_tangent = None
+    if has_left:
+        window.insert(0, co[left][np.newaxis])
+        left_tangent = _outer_tangent(co[left], handle_left[left])
+    if has_right:
+        window.append(co[right][np.newaxis])
+        right_tangent = _outer_tangent(co[right], handle_right[right])
+    window = np.concatenate(window)
+    if len(window) < 2:
+        return None
+
+    # 2. Reduction and fit of the window, its end points are the anchors
+    if target_keys > 0 and len(data):
+        ratio = target_keys / len(data)
+        kwargs['target_ratio'] = min(ratio, kwargs.get('target_ratio') or ratio)
+    kwargs.update(use_outlier_detection=False, use_fast_path=False)
+    result = mocap_cleaning_pipeline(window, left_tangent=left_tangent, right_tangent=right_tangent, **kwargs)
+    if result.curve is None:
+        return None
+    result.stages = dict(outliers=outliers, **result.stages)
+    result.points_in = high - low
+    window_co, window_left, window_right = result.keyframes()
+    return Splice(left, right, window_co, window_left, window_right, result)
+
+def _aligned_handle(key, outer_handle, inner_handle, window_key):
+    """The anchor's inner handle: collinear with its outer handle, as long as the window fit's handle."""
+    length = np.linalg.norm(inner_handle - window_key)
+    direction = _outer_tangent(key, outer_handle)
+    if direction is None:
+        return key + (inner_handle - window_key)
+    return key + direction * length
+
+def splice_keyframes(attributes: dict, splice: Splice, column: int=1, types=None):
+    """
+    Applies a splice to one fcurve of the simplified action.
+
+    Args:
+        attributes (dict): The fcurve's keys as returned by read_keyframe_attributes.
+        splice (Splice): The window from resimplify_window.
+        column (int, optional): The splice's value column that belongs to this fcurve. Defaults to 1.
+        types (tuple, optional): Per-key (interpolation, handle_left_type, handle_right_type) arrays for
+            the splice's keys. Defaults to None, 'BEZIER' keys with 'FREE' handles.
+
+    Returns:
+        dict: The new keys, ready for write_keyframes.
+    """
+    count = len(attributes['co'])
+    start, stop = max(splice.left, 0), min(splice.right + 1, count)
+    columns = [0, column]
+    co = splice.co[:, columns]
+    handle_left = splice.handle_left[:, columns].copy()
+    handle_right = splice.handle_right[:, columns].copy()
+    if types is None:
+        types = (np.full(len(co), INTERPOLATION['BEZIER']), np.full(len(co), HANDLE_TYPE['FREE']), np.full(len(co), HANDLE_TYPE['FREE']))
+    interpolation, handle_left_type, handle_right_type = (np.array(values, dtype=np.int32) for values in types)
+
+    # The anchors keep their key and outer handle, both handles become FREE so Blender keeps them
+    if splice.left >= 0:
+        key, outer = attributes['co'][splice.left], attributes['handle_left'][splice.left]
+        co[0], handle_left[0] = key, outer
+        handle_right[0] = _aligned_handle(key, outer, splice.handle_right[0, columns], splice.co[0, columns])
+        handle_left_type[0] = handle_right_type[0] = HANDLE_TYPE['FREE']
+    if splice.right < count:
+        key, outer = attributes['co'][splice.right], attributes['handle_right'][splice.right]
+        co[-1], handle_right[-1] = key, outer
+        handle_left[-1] = _aligned_handle(key, outer, splice.handle_left[-1, columns], splice.co[-1, columns])
+        handle_left_type[-1] = handle_right_type[-1] = HANDLE_TYPE['FREE']
+        interpolation[-1] = attributes['interpolation'][splice.right]  # The segment after the anchor is unchanged
+
+    new = dict(co=co, handle_left=handle_left, handle_right=handle_right, interpolation=interpolation,
+               handle_left_type=handle_left_type, handle_right_type=handle_right_type)
+    return {name: np.concatenate([np.asarray(attributes[name])[:start], values, np.asarray(attributes[name])[stop:]])
+            for name, values in new.items()}
@@ -0,0 +1,121 @@
+import numpy as np
+
+from .channels import CHANNEL_DTYPE, ChannelData
+
+# --- Bulk Keyframe I/O ---
+# foreach_get/foreach_set move whole keyframe arrays in one RNA call each,
+# instead of one call (plus a re-sort and handle recalculation) per key.
+
+# Enum values of the keyframe properties as exposed to foreach_get/foreach_set
+INTERPOLATION = {'CONSTANT': 0, 'LINEAR': 1, 'BEZIER': 2}
+HANDLE_TYPE = {'FREE': 0, 'AUTO': 1, 'VECTOR': 2, 'ALIGNED': 3, 'AUTO_CLAMPED': 4}
+
+def _get_vectors(keyframe_points, attribute, count):
+    # Blender stores keyframes as float32, matching the buffer lets foreach_get copy it directly
+    buffer = np.empty(count * 2, dtype=np.float32)
+    keyframe_points.foreach_get(attribute, buffer)
+    return buffer.reshape(count, 2).astype(float)
+
+def _get_enum(keyframe_points, attribute, count):
+    buffer = np.empty(count, dtype=np.int32)
+    keyframe_points.foreach_get(attribute, buffer)
+    return buffer
+
+def read_keyframes(fcurve, handles: bool=False):
+    """
+    Returns the (n, 2) keyframe coordinates of an fcurve, or
+    (co, handle_left, handle_right) if `handles` is True.
+    """
+    keyframe_points = fcurve.keyframe_points
+    count = len(keyframe_points)
+    co = _get_vectors(keyframe_points, "co", count)
+    if not handles:
+        return co
+    return co, _get_vectors(keyframe_points, "handle_left", count), _get_vectors(keyframe_points, "handle_right", count)
+
+def read_channel(fcurve, dtype=CHANNEL_DTYPE):
+    """
+    Returns the keyframe coordinates of an fcurve as a ChannelData. The float32
+    buffer is only held until its columns are copied out, read_keyframes keeps a
+    float64 (n, 2) copy instead.
+    """
+    keyframe_points = fcurve.keyframe_points
+    buffer = np.empty(len(keyframe_points) * 2, dtype=np.float32)
+    keyframe_points.foreach_get("co", buffer)
+    return ChannelData(buffer[0::2], [buffer[1::2]], dtype)
+
+def read_keyframe_attributes(fcurve):
+    """Returns every attribute write_keyframes can restore, as a dict of arrays."""
+    keyframe_points = fcurve.keyframe_points
+    count = len(keyframe_points)
+    co, handle_left, handle_right = read_keyframes(fcurve, handles=True)
+    return dict(
+        co=co,
+        handle_left=handle_left,
+        handle_right=handle_right,
+        interpolation=_get_enum(keyframe_points, "interpolation", count),
+        handle_left_type=_get_enum(keyframe_points, "handle_left_type", count),
+        handle_right_type=_get_enum(keyframe_points, "handle_right_type", count),
+    )
+
+def _enum_buffer(value, lookup, count):
+    if isinstance(value, str):
+        return np.full(count, lookup[value], dtype=np.int32)
+    return np.ascontiguousarray(value, dtype=np.int32)
+
+def write_keyframes(fcurve, co, handle_left=None, handle_right=None, interpolation='BEZIER', handle_left_type=None, handle_right_type=None):
+    """
+    Appends keyframes to an fcurve with keyframe_points.add() and foreach_set,
+    then calls fcurve.update() once.
+
+    Args:
+        fcurve (bpy.types.FCurve): The fcurve to write to.
+        co (np.ndarray): (n, 2) keyframe coordinates.
+        handle_left, handle_right (np.ndarray, optional): (n, 2) handle coordinates.
+        interpolation (str or array, optional): One interpolation name for all keys or
+            per-key INTERPOLATION values. Defaults to 'BEZIER'.
+        handle_left_type, handle_right_type (str or array, optional): One handle type name for
+            all keys or per-key HANDLE_TYPE values. Defaults to Blender's default handle type.
+    """
+    co = np.asarray(co)
+    count = len(co)
+    keyframe_points = fcurve.keyframe_points
+    start = len(keyframe_points)
+    keyframe_points.add(count)
+
+    def set_all(attribute, values):
+        if start:
+            # Appending to existing keys: read everything back, overwrite the new tail
+            width = values.size // count
+            buffer = np.empty((start + count) * width, dtype=values.dtype)
+            keyframe_points.foreach_get(attribute, buffer)
+            buffer[start * width:] = values.ravel()
+            values = buffer
+        keyframe_points.foreach_set(attribute, values.ravel())
+
+    # Handle types go first, setting them must not move the handles written after
+    if handle_left_type is not None:
+        set_all("handle_left_type", _enum_buffer(handle_left_type, HANDLE_TYPE, count))
+    if handle_right_type is not None:
+        set_all("handle_right_type", _enum_buffer(handle_right_type, HANDLE_TYPE, count))
+    set_all("interpolation", _enum_buffer(interpolation, INTERPOLATION, count))
+
+    set_all("co", np.asarray(co, dtype=np.float32))
+    if handle_left is not None:
+        set_all("handle_left", np.asarray(handle_left, dtype=np.float32))
+    if handle_right is not None:
+        set_all("handle_right", np.asarray(handle_right, dtype=np.float32))
+
+    fcurve.update()
+
+def copy_keyframes(source_fcurve, target_fcurve):
+    """Copies keys, handles, handle types and interpolation from one fcurve to another."""
+    if len(source_fcurve.keyframe_points) == 0:
+        return
+    write_keyframes(target_fcurve, **read_keyframe_attributes(source_fcurve))
+
+def replace_keyframes(fcurve, **attributes):
+    """Removes every key of an fcurve and writes new ones, see write_keyframes for the arguments."""
+    fcurve.keyframe_points.clear()
+    if len(attributes['co']):
+        write_keyframes(fcurve, **attributes)
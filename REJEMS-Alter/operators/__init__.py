@@ -4,10 +4,20 @@ import bpy
 from .action_operators import ReJemsAlterPickActionOperator
 from .bone_operators import ReJemsAlterPickBoneOperator, ReJemsAlterAddBoneOperator, ReJemsAlterRemoveBoneOperator
 from .core_operators import ReJemsAlterOperator
+from .modal_operators import ReJemsAlterModalOperator
+from .batch_operators import ReJemsAlterBatchOperator
+from .export_operators import ReJemsAlterExportOperator
+from .update_operators import ReJemsAlterUpdateOperator
+from .import_operators import ReJemsAlterImportBvhOperator
 
 # List of operator classes for registration
 classes = [
     ReJemsAlterOperator,
+    ReJemsAlterModalOperator,
+    ReJemsAlterUpdateOperator,
+    ReJemsAlterBatchOperator,
+    ReJemsAlterExportOperator,
+    ReJemsAlterImportBvhOperator,
     ReJemsAlterPickBoneOperator,
     ReJemsAlterAddBoneOperator,
     ReJemsAlterRemoveBoneOperator,
@@ -0,0 +1,98 @@
+import csv
+import fnmatch
+import time
+
+import bpy
+from bpy.types import Operator
+
+from ..utils import ActionStats
+from .core_operators import (
+    action_jobs,
+    channel_name,
+    configure_cache,
+    new_simplified_action,
+    run_jobs,
+    run_summary,
+    store_run_stats,
+    write_simplified_fcurves,
+)
+
+SUMMARY_TEXT = "RE:JEMS-Alter Batch Summary"
+SUMMARY_FIELDS = ("action", "fcurves", "keys_in", "keys_out", "keys_saved_percent", "max_error", "fit_time")
+
+def batch_targets(context, props):
+    """Returns (action, armature or None) pairs to simplify, Simplified_ actions excluded."""
+    if props.batch_source == 'SELECTED':
+        targets = []
+        for obj in context.selected_objects:
+            if obj.type == 'ARMATURE' and obj.animation_data and obj.animation_data.action:
+                targets.append((obj.animation_data.action, obj))
+    else:
+        targets = [(action, None) for action in bpy.data.actions if fnmatch.fnmatchcase(action.name, props.batch_filter)]
+    return [(action, obj) for action, obj in targets if not action.name.startswith("Simplified_")]
+
+def write_batch_summary(rows, total, elapsed):
+    """Writes one line per action to the summary text block and returns it."""
+    text = bpy.data.texts.get(SUMMARY_TEXT) or bpy.data.texts.new(SUMMARY_TEXT)
+    text.clear()
+    # Action names may hold commas or quotes, the csv module quotes them
+    writer = csv.writer(text, lineterminator="\n")
+    writer.writerow(SUMMARY_FIELDS)
+    for action_name, stats in rows:
+        saved = 100.0 * stats.keys_removed / stats.keys_in if stats.keys_in else 0.0
+        writer.writerow([action_name, stats.fcurves, stats.keys_in, stats.keys_out, f"{saved:.1f}", f"{stats.max_error:.6f}", f"{stats.time:.3f}"])
+    text.write(f"# {len(rows)} actions, {total.keys_in} -> {total.keys_out} keys in {elapsed:.2f}s\n")
+    return text
+
+# --- Operator to Simplify Many Actions ---
+class ReJemsAlterBatchOperator(Operator):
+    bl_idname = "object.rejems_alter_batch"
+    bl_label = "Simplify All Matching Actions"
+    bl_description = "Simplify every action matching the filter, or the actions of all selected armatures, in one pass"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        props = context.scene.rejems_alter_props
+        start_time = time.perf_counter()
+
+        targets = batch_targets(context, props)
+        if not targets:
+            self.report({'WARNING'}, "No actions to simplify.")
+            return {'CANCELLED'}
+
+        # 1. One queue of jobs over every action, numbered across actions
+        groups = []
+        jobs = []
+        new_actions = []
+        for action, obj in targets:
+            new_action = new_simplified_action(action)
+            action_groups, jobs_of_action = action_jobs(action, new_action, props, first_index=len(groups))
+            new_actions.append((action, obj, new_action, range(len(groups), len(groups) + len(action_groups))))
+            groups.extend(action_groups)
+            jobs.extend(jobs_of_action)
+
+        # 2. Fit everything at once, sharing the worker pool and the result cache
+        cache = configure_cache(props)
+        results, cached, duplicates = run_jobs(jobs, props, cache)
+
+        # 3. Write back per action
+        total = ActionStats()
+        rows = []
+        for action, obj, new_action, indices in new_actions:
+            stats = ActionStats()
+            for index in indices:
+                result = results[index][1]
+                flags = dict(cached=index in cached, duplicate=index in duplicates, fcurves=len(groups[index]))
+                stats.add(result, channel_name(groups[index]), **flags)
+                total.add(result, f"{action.name}: {channel_name(groups[index])}", **flags)
+                if result.curve is not None:
+                    write_simplified_fcurves(new_action, groups[index], result)
+            if obj is not None:
+                obj.animation_data.action = new_action
+            rows.append((action.name, stats))
+
+        elapsed = time.perf_counter() - start_time
+        text = write_batch_summary(rows, total, elapsed)
+        store_run_stats(props.last_run, f"{len(rows)} actions", total, cache)
+        self.report({'INFO'}, f"Simplified {len(rows)} actions in {elapsed:.2f}s ({run_summary(props, total, cache)}), see the '{text.name}' text")
+        return {'FINISHED'}
@@ -1,8 +1,293 @@
 import bpy
 import numpy as np
-from ..utils import BezierCurve, mocap_cleaning_pipeline
+from ..channels import ChannelData
+from ..utils import ActionStats, LinearKeys, PiecewiseCubicCurve, distribute_group_budget, normalize_quaternion_keys
+from ..parallel import simplify_channels
+from ..cache import ResultCache, result_cache
+from ..incremental import FINGERPRINT_PROPERTY, encode_fingerprints, fingerprint
+from ..keyframe_io import HANDLE_TYPE, INTERPOLATION, read_channel, write_keyframes, copy_keyframes
 from bpy.types import Operator
 
+# Custom property of the Simplified_ action that holds the error threshold it was fitted with
+THRESHOLD_PROPERTY = "rejems_error_threshold"
+
+def pipeline_kwargs(props):
+    """Returns the mocap_cleaning_pipeline arguments for the current settings."""
+    # Determine parameters based on simplification mode
+    # (No changes needed here - we're changing the UI values instead)
+    if props.simplification_mode == 'BALANCED':
+        vw_tol = props.vw_tolerance
+        err_thresh = 0.05
+    elif props.simplification_mode == 'ACCURATE':
+        vw_tol = None  # No VW simplification
+        err_thresh = props.error_threshold
+    else:  # CUSTOM
+        vw_tol = props.vw_tolerance
+        err_thresh = props.error_threshold
+
+    return dict(
+        vw_tolerance=vw_tol,
+        error_threshold=err_thresh,
+        max_iterations=props.max_iterations,
+        initial_learning_rate=props.initial_learning_rate,
+        outlier_threshold=props.outlier_threshold,
+        use_outlier_detection=props.use_outlier_detection,
+        outlier_method=props.outlier_method,
+        outlier_window=props.outlier_window,
+        solver=props.solver_mode,
+        gauss_newton_steps=props.gauss_newton_steps,
+        fit_mode=props.fit_mode,
+        parameterization=props.parameterization,
+        reducer=props.reducer,
+        stream_window=props.stream_window if props.use_streaming else 0,
+        target_keys=props.target_keys if props.budget_mode == 'CHANNEL_KEYS' else 0,
+        target_ratio=props.target_ratio if props.budget_mode == 'RATIO' else 0.0,
+        use_fast_path=props.use_fast_path,
+    )
+
+def bone_name_from_data_path(data_path):
+    data_path_parts = data_path.split('"')
+    if len(data_path_parts) > 1:
+        return data_path_parts[1]
+    return ""
+
+# Properties whose channels are fitted together as one curve with shared key times
+JOINT_PROPERTIES = {'location', 'rotation_quaternion', 'rotation_euler', 'rotation_axis_angle', 'scale'}
+
+def group_channels(channels, joint=True):
+    """
+    Groups (fcurve, (frame, value) array) channels for fitting. With joint on, the
+    channels of one JOINT_PROPERTIES data_path that share their key frames become
+    the (frame, value, value, ...) points of one ChannelData, of the channels' dtype.
+    Returns (fcurves, data) tuples in the order the groups first appear.
+    """
+    groups = []
+    by_path = {}
+    for fcurve, data in channels:
+        if joint and fcurve.data_path.rpartition('.')[2] in JOINT_PROPERTIES:
+            if fcurve.data_path in by_path:
+                by_path[fcurve.data_path].append((fcurve, data))
+                continue
+            by_path[fcurve.data_path] = [(fcurve, data)]
+            groups.append(by_path[fcurve.data_path])
+        else:
+            groups.append([(fcurve, data)])
+
+    jobs = []
+    for group in groups:
+        frames = group[0][1][:, 0]
+        if len(group) > 1 and all(np.array_equal(data[:, 0], frames) for _, data in group[1:]):
+            group.sort(key=lambda item: item[0].array_index)
+            channel = ChannelData(frames, [data[:, 1] for _, data in group], frames.dtype)
+            jobs.append(([fcurve for fcurve, _ in group], channel.points))
+        else:
+            jobs.extend(([fcurve], data) for fcurve, data in group)
+    return jobs
+
+def is_quaternion(fcurves):
+    return len(fcurves) == 4 and fcurves[0].data_path.endswith('rotation_quaternion')
+
+def write_simplified_fcurves(new_action, fcurves, result):
+    """Writes a result to one fcurve per value column, quaternion keys renormalized."""
+    co, handle_left, handle_right = result.keyframes()
+    if is_quaternion(fcurves):
+        co, handle_left, handle_right = normalize_quaternion_keys(co, handle_left, handle_right)
+    for column, fcurve in enumerate(fcurves, start=1):
+        columns = [0, column]
+        write_simplified_fcurve(new_action, fcurve, result.curve, co[:, columns], handle_left[:, columns], handle_right[:, columns])
+
+def write_simplified_fcurve(new_action, fcurve, curve, co, handle_left, handle_right):
+    new_fcurve = new_action.fcurves.new(data_path=fcurve.data_path, index=fcurve.array_index)
+
+    if isinstance(curve, LinearKeys):
+        # Constant, linear and stepped channels need no handles
+        write_keyframes(new_fcurve, co, interpolation=curve.INTERPOLATION)
+    else:
+        write_keyframes(new_fcurve, co, handle_left, handle_right, *keyframe_types(curve, len(co)))
+    return new_fcurve
+
+def keyframe_types(curve, count):
+    """Returns per-key (interpolation, handle_left_type, handle_right_type) values for the Bezier keys of a fit."""
+    interpolation = np.full(count, INTERPOLATION['BEZIER'])
+    if isinstance(curve, PiecewiseCubicCurve):
+        # Piecewise fits carry their own handles
+        return interpolation, np.full(count, HANDLE_TYPE['FREE']), np.full(count, HANDLE_TYPE['FREE'])
+    # Global fits get handles a third of the way to each neighbour, with AUTO handles on the end keys
+    handle_left_type = np.full(count, HANDLE_TYPE['AUTO_CLAMPED'])
+    handle_right_type = np.full(count, HANDLE_TYPE['AUTO_CLAMPED'])
+    handle_left_type[0] = HANDLE_TYPE['AUTO']
+    handle_right_type[-1] = HANDLE_TYPE['AUTO']
+    return interpolation, handle_left_type, handle_right_type
+
+def fcurve_key(fcurve):
+    """Names an fcurve in the fingerprints of a Simplified_ action."""
+    return f"{fcurve.data_path}[{fcurve.array_index}]"
+
+def copy_fcurve(new_action, fcurve):
+    # Copy the original fcurve to the new action without modification
+    new_fcurve = new_action.fcurves.new(data_path=fcurve.data_path, index=fcurve.array_index)
+    copy_keyframes(fcurve, new_fcurve)
+    return new_fcurve
+
+def cache_directory():
+    """Cache folder next to the .blend file, or None for an unsaved file (memory only)."""
+    if not bpy.data.filepath:
+        return None
+    return bpy.path.abspath("//rejems_cache")
+
+def configure_cache(props):
+    """Returns the shared result cache set up from the current settings, or None if it is off."""
+    if not props.use_cache:
+        return None
+    result_cache.directory = cache_directory()
+    result_cache.max_disk_bytes = props.cache_size_mb * 1024 * 1024
+    result_cache.reset_stats()
+    return result_cache
+
+def find_duplicates(jobs):
+    """
+    Hashes every (index, data, kwargs) job. Returns the content key of each index
+    and, for each index, the index of the first job with the same key.
+    """
+    keys = {}
+    sources = {}
+    first = {}
+    for index, data, kwargs in jobs:
+        keys[index] = ResultCache.key(data, kwargs)
+        sources[index] = first.setdefault(keys[index], index)
+    return keys, sources
+
+def run_jobs(jobs, props, cache=None):
+    """
+    Fits (index, data, kwargs) jobs, answering unchanged channels from the cache
+    and fitting channels with identical keys only once.
+    Returns the (index, PipelineResult) tuples in job order, the set of cached
+    indices and the set of duplicate indices.
+    """
+    results = {}
+    keys, sources = find_duplicates(jobs)
+    pending = []
+    for job in jobs:
+        index, data, kwargs = job
+        if sources[index] != index:
+            continue
+        if cache is not None:
+            result = cache.get(keys[index])
+            if result is not None:
+                results[index] = (index, result)
+                continue
+        pending.append(job)
+
+    cached = set(results)
+
+    # Fit the remaining channels, in worker processes unless parallel processing is off
+    workers = props.worker_count if props.use_parallel else 1
+    for index, result in simplify_channels(pending, workers):
+        if cache is not None:
+            cache.put(keys[index], result)
+        results[index] = (index, result)
+
+    if cache is not None:
+        cache.prune_disk()
+    duplicates = {index for index, source in sources.items() if source != index}
+    return [(job[0], results[sources[job[0]]][1]) for job in jobs], cached, duplicates
+
+def channel_name(fcurves):
+    indices = ",".join(str(fcurve.array_index) for fcurve in fcurves)
+    return f"{fcurves[0].data_path}[{indices}]"
+
+def run_summary(props, stats, cache=None):
+    solver_name = 'PIECEWISE' if props.fit_mode == 'PIECEWISE' else props.solver_mode
+    summary = f"{solver_name}: {stats.summary()}"
+    if cache:
+        summary += f", cache {cache.hits} hits / {cache.misses} misses"
+    return summary
+
+def store_run_stats(last_run, action_name, stats, cache=None):
+    """Copies an ActionStats into the scene's last-run property group shown in the panel."""
+    last_run.action_name = action_name
+    last_run.fcurves = stats.fitted_fcurves
+    last_run.keys_in = stats.keys_in
+    last_run.keys_out = stats.keys_out
+    last_run.outliers_removed = stats.outliers_removed
+    last_run.max_error = stats.max_error
+    last_run.outlier_time = stats.stage_times.get('outliers', 0.0)
+    last_run.reduction_time = stats.stage_times.get('reduction', 0.0)
+    last_run.fit_time = stats.stage_times.get('fit', 0.0)
+    last_run.slowest_channel = stats.slowest[0][1] if stats.slowest else ""
+    last_run.slowest_time = stats.slowest[0][0] if stats.slowest else 0.0
+    last_run.fast_path_fcurves = stats.fast_path_fcurves
+    last_run.duplicate_fcurves = stats.duplicate_fcurves
+    last_run.cache_hits = cache.hits if cache else 0
+    last_run.cache_misses = cache.misses if cache else 0
+
+def prepare_simplification(operator, context):
+    """
+    Validates the context, creates the Simplified_ action and copies whitelisted bones into it.
+    Returns (obj, new_action, groups, jobs), or None after reporting a warning.
+    groups[index] lists the fcurves that the job with that index was built from.
+    """
+    scene = context.scene
+    props = scene.rejems_alter_props
+    obj = context.active_object
+
+    if not obj or not obj.animation_data or obj.type != 'ARMATURE':
+        operator.report({'WARNING'}, "Active object must be an armature with animation data.")
+        return None
+
+    action = bpy.data.actions.get(props.action_name)
+
+    if not action:
+        operator.report({'WARNING'}, "Selected action not found.")
+        return None
+
+    new_action = new_simplified_action(action)
+    groups, jobs = action_jobs(action, new_action, props)
+    return obj, new_action, groups, jobs
+
+def new_simplified_action(action):
+    new_action = bpy.data.actions.new(name=f"Simplified_{action.name}")
+    new_action.use_fake_user = True
+    return new_action
+
+def action_jobs(action, new_action, props, first_index=0):
+    """
+    Copies whitelisted bones of an action into new_action and builds the fitting jobs
+    for the rest, numbered from first_index. Returns (groups, jobs) where
+    groups[i] lists the fcurves of the job with index first_index + i.
+    The fingerprints of every source fcurve and the error threshold are stored
+    on new_action, for the incremental update and the export.
+    """
+    # Create a set of whitelisted bone names for faster lookup
+    whitelisted_bones = {item.name for item in props.bone_whitelist}
+
+    # Extract float32 channels on the main thread, whitelisted bones are copied as they are
+    kwargs = pipeline_kwargs(props)
+    channels = []
+    fingerprints = {}
+    for fcurve in action.fcurves:
+        data = read_channel(fcurve).points
+        fingerprints[fcurve_key(fcurve)] = fingerprint(data)
+        if bone_name_from_data_path(fcurve.data_path) in whitelisted_bones:
+            copy_fcurve(new_action, fcurve)
+            continue  # Skip to the next fcurve
+
+        channels.append((fcurve, data))
+    new_action[FINGERPRINT_PROPERTY] = encode_fingerprints(fingerprints)
+    new_action[THRESHOLD_PROPERTY] = kwargs['error_threshold']
+
+    groups = []
+    jobs = []
+    for index, (fcurves, data) in enumerate(group_channels(channels, props.use_joint_fitting), start=first_index):
+        groups.append(fcurves)
+        jobs.append((index, data, kwargs))
+
+    if props.budget_mode == 'ACTION_KEYS':
+        budgets = distribute_group_budget(props.target_keys, [len(data) for _, data, _ in jobs], [len(fcurves) for fcurves in groups])
+        jobs = [(index, data, dict(kwargs, target_keys=budget)) for (index, data, kwargs), budget in zip(jobs, budgets)]
+
+    return groups, jobs
+
 # --- Operator to Simplify Keyframes ---
 class ReJemsAlterOperator(Operator):
     bl_idname = "object.rejems_alter"
@@ -10,98 +295,26 @@ class ReJemsAlterOperator(Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        scene = context.scene
-        props = scene.rejems_alter_props
-        obj = context.active_object
+        props = context.scene.rejems_alter_props
 
-        if not obj or not obj.animation_data or obj.type != 'ARMATURE':
-            self.report({'WARNING'}, "Active object must be an armature with animation data.")
+        # 1. Extract keyframe arrays and copy whitelisted bones
+        prepared = prepare_simplification(self, context)
+        if prepared is None:
             return {'CANCELLED'}
+        obj, new_action, groups, jobs = prepared
 
-        action = bpy.data.actions.get(props.action_name)
-
-        if not action:
-            self.report({'WARNING'}, "Selected action not found.")
-            return {'CANCELLED'}
+        # 2. Fit every channel that is not cached yet
+        cache = configure_cache(props)
+        results, cached, duplicates = run_jobs(jobs, props, cache)
 
-        new_action = bpy.data.actions.new(name=f"Simplified_{action.name}")
-        new_action.use_fake_user = True
-
-        # Create a set of whitelisted bone names for faster lookup
-        whitelisted_bones = {item.name for item in props.bone_whitelist}
-
-        for fcurve in action.fcurves:
-            # Check if the bone associated with this fcurve is whitelisted
-            data_path_parts = fcurve.data_path.split('"')
-            if len(data_path_parts) > 1:
-                bone_name = data_path_parts[1]
-            else:
-                bone_name = ""
-
-            if bone_name in whitelisted_bones:
-                # Copy the original fcurve to the new action without modification
-                new_fcurve = new_action.fcurves.new(data_path=fcurve.data_path, index=fcurve.array_index)
-                for kf in fcurve.keyframe_points:
-                    new_kf = new_fcurve.keyframe_points.insert(kf.co.x, kf.co.y)
-                    new_kf.interpolation = kf.interpolation
-                    new_kf.handle_left = kf.handle_left
-                    new_kf.handle_right = kf.handle_right
-                continue  # Skip to the next fcurve
-
-            keyframes = [(kf.co[0], kf.co[1]) for kf in fcurve.keyframe_points]
-
-            # Determine parameters based on simplification mode
-            # (No changes needed here - we're changing the UI values instead)
-            if props.simplification_mode == 'BALANCED':
-                vw_tol = props.vw_tolerance
-                err_thresh = 0.05
-            elif props.simplification_mode == 'ACCURATE':
-                vw_tol = None  # No VW simplification
-                err_thresh = props.error_threshold
-            else:  # CUSTOM
-                vw_tol = props.vw_tolerance
-                err_thresh = props.error_threshold
-
-            curve, iterations, simplified_data = mocap_cleaning_pipeline(
-                np.array(keyframes),
-                vw_tolerance=vw_tol,
-                error_threshold=err_thresh,
-                max_iterations=props.max_iterations,
-                initial_learning_rate=props.initial_learning_rate,
-                outlier_threshold=props.outlier_threshold,
-                use_outlier_detection=props.use_outlier_detection
-            )
-
-            if curve:
-                new_fcurve = new_action.fcurves.new(data_path=fcurve.data_path, index=fcurve.array_index)
-
-                # Use simplified data for keyframe placement and initial handle positions
-                if simplified_data is not None:
-                    for i in range(len(simplified_data)):
-                        frame = simplified_data[i][0]
-                        value = simplified_data[i][1]
-
-                        # Insert keyframe
-                        kf = new_fcurve.keyframe_points.insert(frame, value)
-                        kf.interpolation = 'BEZIER'
-
-                        # Set initial handle positions based on neighboring points
-                        if i > 0:
-                            kf.handle_left = (
-                                simplified_data[i - 1][0] + (frame - simplified_data[i - 1][0]) / 3,
-                                simplified_data[i - 1][1] + (value - simplified_data[i - 1][1]) / 3
-                            )
-                        else:
-                            kf.handle_left_type = 'AUTO'
-
-                        if i < len(simplified_data) - 1:
-                            kf.handle_right = (
-                                frame + (simplified_data[i + 1][0] - frame) / 3,
-                                value + (simplified_data[i + 1][1] - value) / 3
-                            )
-                        else:
-                            kf.handle_right_type = 'AUTO'
+        # 3. Write the results back on the main thread
+        stats = ActionStats()
+        for index, result in results:
+            stats.add(result, channel_name(groups[index]), cached=index in cached, duplicate=index in duplicates, fcurves=len(groups[index]))
+            if result.curve is not None:
+                write_simplified_fcurves(new_action, groups[index], result)
 
         obj.animation_data.action = new_action
-        self.report({'INFO'}, f"Simplified action created: {new_action.name}")
+        store_run_stats(props.last_run, new_action.name, stats, cache)
+        self.report({'INFO'}, f"Simplified action created: {new_action.name} ({run_summary(props, stats, cache)})")
         return {'FINISHED'}
\ No newline at end of file
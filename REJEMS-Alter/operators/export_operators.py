@@ -0,0 +1,59 @@
+import bpy
+from bpy.props import EnumProperty, StringProperty
+from bpy.types import Operator
+from bpy_extras.io_utils import ExportHelper
+
+from ..binary_export import FILE_EXTENSION, write_curve_file
+from ..keyframe_io import read_keyframe_attributes
+from .core_operators import THRESHOLD_PROPERTY, pipeline_kwargs
+from .update_operators import simplified_action
+
+def simplified_channels(action):
+    """Yields one write_curve_file channel per fcurve of an action."""
+    for fcurve in action.fcurves:
+        attributes = read_keyframe_attributes(fcurve)
+        yield dict(
+            name=f"{fcurve.data_path}[{fcurve.array_index}]",
+            data_path=fcurve.data_path,
+            array_index=fcurve.array_index,
+            co=attributes['co'],
+            handle_left=attributes['handle_left'],
+            handle_right=attributes['handle_right'],
+            interpolation=attributes['interpolation'],
+        )
+
+# --- Operator to Export the Simplified Action as a Binary Curve File ---
+class ReJemsAlterExportOperator(Operator, ExportHelper):
+    bl_idname = "object.rejems_alter_export"
+    bl_label = "Export Binary Curves"
+    bl_description = "Write the simplified action as a compact, memory-mappable binary curve file"
+
+    filename_ext = FILE_EXTENSION
+    filter_glob: StringProperty(default="*" + FILE_EXTENSION, options={'HIDDEN'})
+    quantization: EnumProperty(
+        name="Quantization",
+        description="How key values are stored, always within a share of the error threshold",
+        items=[
+            ('NONE', "Float32", "Store values as 32-bit floats"),
+            ('FLOAT16', "Float16", "Store values as 16-bit floats where they stay within the error bound"),
+            ('FIXED16', "Fixed16", "Store values as 16-bit fixed point where they stay within the error bound")
+        ],
+        default='FIXED16'
+    )
+
+    def execute(self, context):
+        props = context.scene.rejems_alter_props
+        source = bpy.data.actions.get(props.action_name)
+        if not source:
+            self.report({'WARNING'}, "Selected action not found.")
+            return {'CANCELLED'}
+        action = simplified_action(context.active_object, source)
+        if not action:
+            self.report({'ERROR'}, f"No simplified action for '{props.action_name}', run RE:JEMS-Alter first.")
+            return {'CANCELLED'}
+
+        # Quantize within the threshold the action was fitted with, actions from older versions only have the current one
+        error_threshold = action.get(THRESHOLD_PROPERTY, pipeline_kwargs(props)['error_threshold'])
+        size = write_curve_file(self.filepath, simplified_channels(action), self.quantization, error_threshold)
+        self.report({'INFO'}, f"Exported {len(action.fcurves)} fcurves of {action.name} ({size / 1024:.1f} KB)")
+        return {'FINISHED'}
@@ -0,0 +1,130 @@
+import math
+import os
+import time
+
+import bpy
+import numpy as np
+from bpy.props import FloatProperty, IntProperty, StringProperty
+from bpy.types import Operator
+from bpy_extras.io_utils import ImportHelper
+
+from ..bvh import read_bvh
+from ..utils import ActionStats
+from .core_operators import (
+    THRESHOLD_PROPERTY,
+    channel_name,
+    configure_cache,
+    group_channels,
+    pipeline_kwargs,
+    run_jobs,
+    run_summary,
+    store_run_stats,
+    write_simplified_fcurves,
+)
+
+# Joints whose channels are fitted per run_jobs call, bounds the keys held in memory at once
+IMPORT_BATCH_JOINTS = 16
+
+def create_armature(context, name, joints, scale=1.0):
+    """
+    Creates an armature with one bone per BVH joint. Every bone points along +Y
+    with no roll, so its rest orientation is the identity and the BVH channels
+    apply to the pose bones unchanged. The object is turned a quarter turn about
+    X, as BVH files are Y-up.
+    """
+    armature = bpy.data.armatures.new(name)
+    obj = bpy.data.objects.new(name, armature)
+    context.collection.objects.link(obj)
+    obj.rotation_euler = (math.pi / 2, 0.0, 0.0)
+    for other in context.selected_objects:
+        other.select_set(False)
+    obj.select_set(True)
+    context.view_layer.objects.active = obj
+
+    bpy.ops.object.mode_set(mode='EDIT')
+    heads = {}
+    for joint in joints:
+        head = joint.offset * scale + (heads[joint.parent.name] if joint.parent else 0.0)
+        heads[joint.name] = head
+        bone = armature.edit_bones.new(joint.name)
+        bone.head = head
+        bone.tail = head + np.array([0.0, joint.bone_length() * scale, 0.0])
+        bone.roll = 0.0
+        if joint.parent:
+            bone.parent = armature.edit_bones[joint.parent.name]
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+    for joint in joints:
+        if joint.rotation_order:
+            # BVH lists the rotation applied last first, Blender names the one applied first first
+            obj.pose.bones[joint.name].rotation_mode = joint.rotation_order[::-1]
+    return obj
+
+# --- Operator to Import a BVH File as a Simplified Action ---
+class ReJemsAlterImportBvhOperator(Operator, ImportHelper):
+    bl_idname = "object.rejems_alter_import_bvh"
+    bl_label = "Import BVH (Simplified)"
+    bl_description = "Import a BVH file as an armature with a simplified action, without creating the dense keys first"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".bvh"
+    filter_glob: StringProperty(default="*.bvh", options={'HIDDEN'})
+    global_scale: FloatProperty(
+        name="Scale",
+        description="Scale of the BVH units, e.g. 0.01 for centimetres",
+        default=1.0,
+        min=0.0001,
+        max=1000.0
+    )
+    frame_start: IntProperty(
+        name="Start Frame",
+        description="Frame of the first BVH frame",
+        default=1
+    )
+
+    def execute(self, context):
+        props = context.scene.rejems_alter_props
+        start_time = time.perf_counter()
+        name = os.path.splitext(os.path.basename(self.filepath))[0]
+
+        try:
+            motion = read_bvh(self.filepath, map_directory=bpy.app.tempdir or None)
+        except (OSError, ValueError) as e:
+            self.report({'ERROR'}, f"Could not read {self.filepath}: {e}")
+            return {'CANCELLED'}
+
+        with motion:
+            if context.mode != 'OBJECT':
+                bpy.ops.object.mode_set(mode='OBJECT')
+            obj = create_armature(context, name, motion.joints, self.global_scale)
+            new_action = bpy.data.actions.new(name=f"Simplified_{name}")
+            new_action.use_fake_user = True
+
+            kwargs = pipeline_kwargs(props)
+            new_action[THRESHOLD_PROPERTY] = kwargs['error_threshold']
+            if props.budget_mode == 'ACTION_KEYS':
+                # Every channel has one key per frame, so the action budget splits evenly
+                kwargs['target_keys'] = max(2, props.target_keys // max(motion.channel_count, 1))
+            cache = configure_cache(props)
+            stats = ActionStats()
+
+            # Channels are read from the map a few joints at a time and only the simplified keys are written
+            for first in range(0, len(motion.joints), IMPORT_BATCH_JOINTS):
+                joints = motion.joints[first:first + IMPORT_BATCH_JOINTS]
+                channels = list(motion.pose_channels(self.global_scale, self.frame_start, joints))
+                groups = []
+                jobs = []
+                for index, (fcurves, data) in enumerate(group_channels(channels, props.use_joint_fitting)):
+                    groups.append(fcurves)
+                    jobs.append((index, data, kwargs))
+                results, cached, duplicates = run_jobs(jobs, props, cache)
+                for index, result in results:
+                    stats.add(result, channel_name(groups[index]), cached=index in cached, duplicate=index in duplicates, fcurves=len(groups[index]))
+                    if result.curve is not None:
+                        write_simplified_fcurves(new_action, groups[index], result)
+
+        obj.animation_data_create().action = new_action
+        store_run_stats(props.last_run, new_action.name, stats, cache)
+        elapsed = time.perf_counter() - start_time
+        self.report({'INFO'}, f"Imported {name} as {new_action.name} in {elapsed:.2f}s ({run_summary(props, stats, cache)})")
+        return {'FINISHED'}
@@ -0,0 +1,151 @@
+import time
+from collections import deque
+
+import bpy
+from bpy.types import Operator
+
+from ..parallel import ChannelTask, submit_channels
+from ..utils import ActionStats, PipelineResult
+from .core_operators import (
+    channel_name,
+    configure_cache,
+    find_duplicates,
+    prepare_simplification,
+    run_summary,
+    store_run_stats,
+    write_simplified_fcurves,
+)
+
+# Seconds of work done per timer tick before control goes back to the UI
+TIME_BUDGET = 0.1
+TIMER_STEP = 0.01
+
+# --- Non-blocking Operator to Simplify Keyframes ---
+class ReJemsAlterModalOperator(Operator):
+    bl_idname = "object.rejems_alter_modal"
+    bl_label = "Simplify Keyframes (Background)"
+    bl_description = "Simplify keyframes without freezing Blender. Press ESC to cancel"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def invoke(self, context, event):
+        props = context.scene.rejems_alter_props
+
+        prepared = prepare_simplification(self, context)
+        if prepared is None:
+            return {'CANCELLED'}
+        self._obj, self._new_action, self._groups, jobs = prepared
+
+        self._cache = configure_cache(props)
+        self._stats = ActionStats()
+        self._total = sum(len(fcurves) for fcurves in self._groups)
+        self._done = 0
+
+        # Each pending entry is (job, cache key, cached PipelineResult or ChannelTask or None).
+        # Duplicates of an earlier fcurve get no entry of their own, they reuse its result.
+        # The other jobs are grouped and batched like run_jobs does, so both operators write the same keys
+        keys, self._sources = find_duplicates(jobs)
+        entries = {}
+        for job in jobs:
+            index = job[0]
+            if self._sources[index] == index and self._cache is not None:
+                entries[index] = self._cache.get(keys[index])
+        uncached = [job for job in jobs if self._sources[job[0]] == job[0] and entries.get(job[0]) is None]
+        entries.update(submit_channels(uncached, props.worker_count if props.use_parallel else 1))
+
+        self._results = {}
+        self._pending = deque((job, keys[job[0]], entries.get(job[0])) for job in jobs)
+
+        wm = context.window_manager
+        wm.progress_begin(0, max(self._total, 1))
+        self._timer = wm.event_timer_add(TIMER_STEP, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            return self._cancel(context)
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        try:
+            return self._step(context)
+        except Exception as e:
+            return self._fail(context, e)
+
+    def _step(self, context):
+        """Writes the results that are ready, for at most TIME_BUDGET seconds."""
+        start_time = time.perf_counter()
+        # Results are written in job order, so the new action matches the blocking operator
+        while self._pending and time.perf_counter() - start_time < TIME_BUDGET:
+            job, key, entry = self._pending[0]
+            index = job[0]
+            cached = isinstance(entry, PipelineResult)
+            duplicate = self._sources[index] != index
+
+            if duplicate:
+                result = self._results[self._sources[index]]
+            elif cached:
+                result = entry
+            else:
+                if not entry.done():
+                    break  # Wait for the worker, the UI stays responsive meanwhile
+                # Failed worker jobs run again in this process, see ChannelTask
+                result = entry.results()[index]
+
+            if self._cache is not None and not (cached or duplicate):
+                self._cache.put(key, result)
+
+            self._pending.popleft()
+            self._results[index] = result
+            self._stats.add(result, channel_name(self._groups[index]), cached=cached, duplicate=duplicate, fcurves=len(self._groups[index]))
+            if result.curve is not None:
+                write_simplified_fcurves(self._new_action, self._groups[index], result)
+            self._done += len(self._groups[index])
+
+        context.window_manager.progress_update(self._done)
+        context.workspace.status_text_set(
+            f"RE:JEMS-Alter: {self._done}/{self._total} fcurves, {self._stats.keys_removed} keys removed (ESC to cancel)")
+
+        if self._pending:
+            return {'RUNNING_MODAL'}
+        return self._finish(context)
+
+    def _cleanup(self, context):
+        wm = context.window_manager
+        if self._timer is not None:
+            wm.event_timer_remove(self._timer)
+            self._timer = None
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        for job, key, entry in self._pending:
+            if isinstance(entry, ChannelTask):
+                entry.cancel()
+        self._pending.clear()
+        self._results.clear()
+        if self._cache is not None:
+            self._cache.prune_disk()
+
+    def _finish(self, context):
+        props = context.scene.rejems_alter_props
+        self._cleanup(context)
+        self._obj.animation_data.action = self._new_action
+        store_run_stats(props.last_run, self._new_action.name, self._stats, self._cache)
+        self.report({'INFO'}, f"Simplified action created: {self._new_action.name} ({run_summary(props, self._stats, self._cache)})")
+        return {'FINISHED'}
+
+    def _cancel(self, context):
+        props = context.scene.rejems_alter_props
+        self._cleanup(context)
+        if props.keep_partial_on_cancel:
+            self._obj.animation_data.action = self._new_action
+            self.report({'WARNING'}, f"Cancelled, kept partial action {self._new_action.name} with {self._done}/{self._total} fcurves.")
+        else:
+            bpy.data.actions.remove(self._new_action)
+            self.report({'WARNING'}, "Cancelled, no action was created.")
+        return {'CANCELLED'}
+
+    def _fail(self, context, error):
+        """Cleans up after an unexpected error and removes the half-written action."""
+        self._cleanup(context)
+        bpy.data.actions.remove(self._new_action)
+        self.report({'ERROR'}, f"Simplification failed, no action was created: {error}")
+        return {'CANCELLED'}
\ No newline at end of file
@@ -0,0 +1,143 @@
+import time
+
+import bpy
+import numpy as np
+from bpy.types import Operator
+
+from ..incremental import (
+    FINGERPRINT_BLOCK,
+    FINGERPRINT_PROPERTY,
+    changed_ranges,
+    decode_fingerprints,
+    encode_fingerprints,
+    fingerprint,
+    merge_ranges,
+    resimplify_window,
+    splice_keyframes,
+)
+from ..keyframe_io import read_channel, read_keyframe_attributes, replace_keyframes
+from ..utils import ActionStats, normalize_quaternion_keys
+from .core_operators import (
+    THRESHOLD_PROPERTY,
+    bone_name_from_data_path,
+    channel_name,
+    fcurve_key,
+    group_channels,
+    is_quaternion,
+    keyframe_types,
+    pipeline_kwargs,
+)
+
+def simplified_action(obj, action):
+    """The Simplified_ action of an action, preferring the one assigned to obj."""
+    name = f"Simplified_{action.name}"
+    assigned = obj.animation_data.action if obj and obj.animation_data else None
+    if assigned and assigned.name.startswith(name):
+        return assigned
+    return bpy.data.actions.get(name)
+
+def _target_fcurve(simplified, fcurve):
+    target = simplified.fcurves.find(fcurve.data_path, index=fcurve.array_index)
+    return target or simplified.fcurves.new(data_path=fcurve.data_path, index=fcurve.array_index)
+
+def _stack(attributes, name):
+    """Stacks one key attribute of jointly fitted fcurves as (frame, value, value, ...)."""
+    return np.column_stack([attributes[0][name][:, 0]] + [values[name][:, 1] for values in attributes])
+
+def update_group(simplified, fcurves, data, ranges, kwargs, margin, stats):
+    """
+    Re-simplifies the frame ranges of one group of fcurves and splices the new keys
+    into their fcurves in the simplified action. Returns the number of ranges updated.
+    """
+    targets = [_target_fcurve(simplified, fcurve) for fcurve in fcurves]
+    attributes = [read_keyframe_attributes(target) for target in targets]
+    if len(fcurves) > 1 and not all(np.array_equal(values['co'][:, 0], attributes[0]['co'][:, 0]) for values in attributes[1:]):
+        # Simplified without joint fitting, splice every fcurve on its own
+        return sum(update_group(simplified, [fcurve], data[:, [0, column]], ranges, kwargs, margin, stats)
+                   for column, fcurve in enumerate(fcurves, start=1))
+
+    updated = 0
+    for start_frame, end_frame in ranges:
+        splice = resimplify_window(data, _stack(attributes, 'co'), _stack(attributes, 'handle_left'), _stack(attributes, 'handle_right'),
+                                   start_frame, end_frame, margin, **kwargs)
+        if splice is None:
+            continue
+        if is_quaternion(fcurves):
+            splice.co, splice.handle_left, splice.handle_right = normalize_quaternion_keys(splice.co, splice.handle_left, splice.handle_right)
+        types = keyframe_types(splice.result.curve, len(splice.co))
+        attributes = [splice_keyframes(values, splice, column, types) for column, values in enumerate(attributes, start=1)]
+        stats.add(splice.result, channel_name(fcurves), fcurves=len(fcurves))
+        updated += 1
+
+    if updated:
+        for target, values in zip(targets, attributes):
+            replace_keyframes(target, **values)
+    return updated
+
+# --- Operator to Update a Simplified Action ---
+class ReJemsAlterUpdateOperator(Operator):
+    bl_idname = "object.rejems_alter_update"
+    bl_label = "Update Simplified Action"
+    bl_description = "Re-simplify only the edited frames of the selected action and splice them into its Simplified_ action"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        props = context.scene.rejems_alter_props
+        start_time = time.perf_counter()
+
+        action = bpy.data.actions.get(props.action_name)
+        if not action:
+            self.report({'WARNING'}, "Selected action not found.")
+            return {'CANCELLED'}
+        simplified = simplified_action(context.active_object, action)
+        if not simplified:
+            self.report({'WARNING'}, f"No Simplified_{action.name} action, simplify the action first.")
+            return {'CANCELLED'}
+        stored = simplified.get(FINGERPRINT_PROPERTY)
+        if props.update_mode == 'CHANGED' and stored is None:
+            self.report({'WARNING'}, f"{simplified.name} has no fingerprints of its source, simplify the action again to detect changes.")
+            return {'CANCELLED'}
+        block_size, old = decode_fingerprints(stored) if stored is not None else (FINGERPRINT_BLOCK, {})
+
+        # 1. Fingerprint the source, whitelisted bones are copied again if they changed
+        whitelisted_bones = {item.name for item in props.bone_whitelist}
+        fingerprints = dict(old)
+        channels = []
+        for fcurve in action.fcurves:
+            data = read_channel(fcurve).points
+            name = fcurve_key(fcurve)
+            fingerprints[name] = fingerprint(data, block_size)
+            if bone_name_from_data_path(fcurve.data_path) in whitelisted_bones:
+                if fingerprints[name] != old.get(name):
+                    replace_keyframes(_target_fcurve(simplified, fcurve), **read_keyframe_attributes(fcurve))
+                continue
+            channels.append((fcurve, data))
+
+        # 2. Re-simplify the changed frames of every group and splice them in
+        kwargs = pipeline_kwargs(props)
+        stats = ActionStats()
+        regions = 0
+        for fcurves, data in group_channels(channels, props.use_joint_fitting):
+            if props.update_mode == 'RANGE':
+                ranges = [(props.update_frame_start, props.update_frame_end)]
+            else:
+                ranges = [frame_range for fcurve in fcurves
+                          for frame_range in changed_ranges(old.get(fcurve_key(fcurve), {}), fingerprints[fcurve_key(fcurve)], block_size)]
+            ranges = merge_ranges(ranges, 2 * props.update_margin)
+            if ranges:
+                regions += update_group(simplified, fcurves, data, ranges, kwargs, props.update_margin, stats)
+
+        # Spliced regions are fitted with the current threshold, the action stays within the looser of both
+        if regions:
+            simplified[THRESHOLD_PROPERTY] = max(simplified.get(THRESHOLD_PROPERTY, 0.0), kwargs['error_threshold'])
+
+        # A frame range update leaves the fingerprints alone, so edits outside the range are still found later
+        if props.update_mode == 'CHANGED':
+            simplified[FINGERPRINT_PROPERTY] = encode_fingerprints(fingerprints, block_size)
+
+        elapsed = time.perf_counter() - start_time
+        if not regions:
+            self.report({'INFO'}, f"{simplified.name} is up to date ({elapsed:.2f}s).")
+        else:
+            self.report({'INFO'}, f"Updated {regions} regions of {stats.fitted_fcurves} fcurves in {simplified.name} ({elapsed:.2f}s, {stats.keys_in} -> {stats.keys_out} keys)")
+        return {'FINISHED'}
@@ -1,12 +1,13 @@
 import bpy
 
 # Import panel classes from other files in the panels directory
-from .main_panel import ReJemsAlterPanel, ReJemsAlterBoneWhitelistPanel
+from .main_panel import ReJemsAlterPanel, ReJemsAlterBoneWhitelistPanel, ReJemsAlterLastRunPanel
 
 # List of panel classes for registration
 classes = [
     ReJemsAlterPanel,
     ReJemsAlterBoneWhitelistPanel,
+    ReJemsAlterLastRunPanel,
 ]
 
 def register():
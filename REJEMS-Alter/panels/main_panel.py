@@ -21,6 +21,29 @@ class ReJemsAlterPanel(Panel):
         row.operator("object.rejems_alter_pick_action", icon='EYEDROPPER', text="")
 
         layout.operator("object.rejems_alter")
+        layout.operator("object.rejems_alter_modal", icon='TIME')
+        layout.prop(props, "use_live_preview", icon='GRAPH')
+        layout.operator("object.rejems_alter_export", icon='EXPORT')
+        layout.operator("object.rejems_alter_import_bvh", icon='IMPORT')
+
+        # Incremental update
+        box = layout.box()
+        row = box.row()
+        row.prop(props, "update_mode", expand=True)
+        if props.update_mode == 'RANGE':
+            row = box.row(align=True)
+            row.prop(props, "update_frame_start")
+            row.prop(props, "update_frame_end")
+        box.prop(props, "update_margin")
+        box.operator("object.rejems_alter_update", icon='FILE_REFRESH')
+
+        # Batch
+        box = layout.box()
+        row = box.row()
+        row.prop(props, "batch_source", expand=True)
+        if props.batch_source == 'FILTER':
+            box.prop(props, "batch_filter")
+        box.operator("object.rejems_alter_batch", icon='ACTION')
 
         # Advanced Mode
         layout.prop(props, "advanced_mode")
@@ -33,24 +56,58 @@ class ReJemsAlterPanel(Panel):
             row.prop(props, "simplification_mode", expand=True)
 
             if props.simplification_mode == 'BALANCED':
+                box.prop(props, "reducer")
                 box.prop(props, "vw_tolerance", slider=True)
             elif props.simplification_mode == 'ACCURATE':
                 box.prop(props, "error_threshold")
             elif props.simplification_mode == 'CUSTOM':
+                box.prop(props, "reducer")
                 box.prop(props, "vw_tolerance", slider=True)
                 box.prop(props, "error_threshold")
 
+            box.prop(props, "budget_mode")
+            if props.budget_mode in {'CHANNEL_KEYS', 'ACTION_KEYS'}:
+                box.prop(props, "target_keys")
+            elif props.budget_mode == 'RATIO':
+                box.prop(props, "target_ratio", slider=True)
+
+            box.prop(props, "fit_mode")
+            box.prop(props, "use_joint_fitting")
+
             box.prop(props, "show_advanced_settings")
-            if props.show_advanced_settings:
-                box.prop(props, "max_iterations")
-                box.prop(props, "initial_learning_rate")
+            if props.show_advanced_settings and props.fit_mode == 'GLOBAL':
+                box.prop(props, "solver_mode")
+                box.prop(props, "parameterization")
+                if props.solver_mode == 'LEAST_SQUARES':
+                    box.prop(props, "gauss_newton_steps")
+                else:
+                    box.prop(props, "max_iterations")
+                    box.prop(props, "initial_learning_rate")
+
+            # Performance
+            box = layout.box()
+            box.label(text="Performance:")
+            box.prop(props, "use_parallel")
+            if props.use_parallel:
+                box.prop(props, "worker_count")
+            box.prop(props, "use_fast_path")
+            box.prop(props, "use_streaming")
+            if props.use_streaming:
+                box.prop(props, "stream_window")
+            box.prop(props, "keep_partial_on_cancel")
+            box.prop(props, "use_cache")
+            if props.use_cache:
+                box.prop(props, "cache_size_mb")
 
             # Outlier Detection
             box = layout.box()
             box.label(text="Outlier Detection:")
             box.prop(props, "use_outlier_detection")
             if props.use_outlier_detection:
+                box.prop(props, "outlier_method")
                 box.prop(props, "outlier_threshold", slider=True)
+                if props.outlier_method == 'HAMPEL':
+                    box.prop(props, "outlier_window")
 
 # --- Bone Whitelist Panel ---
 class ReJemsAlterBoneWhitelistPanel(Panel):
@@ -85,4 +142,42 @@ class ReJemsAlterBoneWhitelistPanel(Panel):
         for i, item in enumerate(props.bone_whitelist):
             row = layout.row()
             row.prop(item, "name", text="", emboss=False)
-            row.operator("object.rejems_alter_remove_bone", icon='REMOVE', text="").index = i
\ No newline at end of file
+            row.operator("object.rejems_alter_remove_bone", icon='REMOVE', text="").index = i
+
+# --- Last Run Statistics Panel ---
+class ReJemsAlterLastRunPanel(Panel):
+    bl_label = "Last Run"
+    bl_idname = "VIEW3D_PT_rejems_alter_last_run"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "JEMS Tools"
+    bl_parent_id = "VIEW3D_PT_rejems_alter"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        last_run = context.scene.rejems_alter_props.last_run
+
+        if not last_run.action_name:
+            layout.label(text="No simplification run yet")
+            return
+
+        col = layout.column(align=True)
+        col.label(text=last_run.action_name, icon='ACTION')
+        col.label(text=f"{last_run.fcurves} fcurves, {last_run.keys_in} -> {last_run.keys_out} keys")
+        col.label(text=f"Outliers removed: {last_run.outliers_removed}")
+        col.label(text=f"Max error: {last_run.max_error:.4f}")
+        if last_run.fast_path_fcurves:
+            col.label(text=f"Constant, linear or stepped: {last_run.fast_path_fcurves}")
+        if last_run.duplicate_fcurves:
+            col.label(text=f"Duplicates: {last_run.duplicate_fcurves}")
+
+        col = layout.column(align=True)
+        col.label(text="Stage times:")
+        col.label(text=f"Outlier detection: {last_run.outlier_time:.2f}s")
+        col.label(text=f"Reduction: {last_run.reduction_time:.2f}s")
+        col.label(text=f"Fitting: {last_run.fit_time:.2f}s")
+        if last_run.slowest_channel:
+            col.label(text=f"Slowest: {last_run.slowest_channel} ({last_run.slowest_time:.2f}s)")
+        if last_run.cache_hits or last_run.cache_misses:
+            col.label(text=f"Cache: {last_run.cache_hits} hits / {last_run.cache_misses} misses")
\ No newline at end of file
@@ -0,0 +1,205 @@
+import multiprocessing
+import os
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .batched import BATCH_MAX_KEYS, simplify_batch
+from .streaming import run_pipeline
+
+# --- Worker Pool ---
+# One pool is kept alive between operator runs, starting worker processes
+# costs far more than a typical fit.
+_pool = None
+_pool_workers = 0
+
+def default_worker_count():
+    return max(1, os.cpu_count() or 1)
+
+def get_pool(workers: int):
+    """Returns a shared process pool with `workers` processes, recreating it if the size changed."""
+    global _pool, _pool_workers
+    if _pool is not None and _pool_workers != workers:
+        shutdown_pool()
+    if _pool is None:
+        # Spawn instead of fork: forking Blender's process is not safe
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        _pool_workers = workers
+    return _pool
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+    _pool_workers = 0
+
+def run_pipeline_job(job):
+    """
+    Runs the pipeline for one (key, data, kwargs) job, streaming long channels.
+    Returns (key, PipelineResult). Must stay importable without bpy.
+    """
+    key, data, kwargs = job
+    return key, run_pipeline(data, **kwargs)
+
+# Fewer short channels with the same settings than this are not worth a batch
+BATCH_MIN_CHANNELS = 4
+
+def run_batch_job(job):
+    """
+    Runs simplify_batch for one (keys, channels, kwargs) job.
+    Returns a list of (key, PipelineResult). Must stay importable without bpy.
+    """
+    keys, channels, kwargs = job
+    return list(zip(keys, simplify_batch(channels, **kwargs)))
+
+def split_jobs(jobs, workers: int):
+    """
+    Groups the short channels of (key, data, kwargs) jobs into batch jobs, one group per
+    setting, split so every worker gets a share. Returns (batches, singles), where batches
+    holds (job positions, batch job) pairs and singles the positions of the other jobs.
+    """
+    groups = {}
+    singles = []
+    for position, (_, data, kwargs) in enumerate(jobs):
+        stream_window = kwargs.get('stream_window', 0)
+        if len(data) <= BATCH_MAX_KEYS and not (stream_window and len(data) > stream_window):
+            groups.setdefault(tuple(sorted(kwargs.items())), []).append(position)
+        else:
+            singles.append(position)
+
+    batches = []
+    for settings, positions in groups.items():
+        if len(positions) < BATCH_MIN_CHANNELS:
+            singles += positions
+            continue
+        kwargs = {name: value for name, value in settings if name != 'stream_window'}
+        size = max(BATCH_MIN_CHANNELS, -(-len(positions) // workers))
+        for start in range(0, len(positions), size):
+            chunk = positions[start:start + size]
+            batches.append((chunk, ([jobs[i][0] for i in chunk], [jobs[i][1] for i in chunk], kwargs)))
+    return batches, sorted(singles)
+
+def simplify_channels(jobs, workers: int=0):
+    """
+    Runs every job through run_pipeline_job and returns the results in job order.
+    Short channels are simplified together through run_batch_job instead.
+
+    Args:
+        jobs (list): (key, data, kwargs) tuples, data being the (frame, value) array of one channel.
+        workers (int, optional): Number of worker processes. 0 uses every available core,
+            1 runs serially in this process, which is deterministic and easy to debug.
+            If the pool fails, the jobs run serially and the reason is kept in the
+            `fallback` of each result.
+    """
+    jobs = list(jobs)
+    workers = workers or default_worker_count()
+    batches, singles = split_jobs(jobs, workers)
+    workers = min(workers, len(batches) + len(singles))
+    results = [None] * len(jobs)
+    fallback = None
+
+    if workers > 1:
+        try:
+            pool = get_pool(workers)
+            chunksize = max(1, len(singles) // (workers * 4))
+            # Submit both kinds of job before waiting on either
+            single_results = pool.map(run_pipeline_job, [jobs[i] for i in singles], chunksize=chunksize)
+            batch_results = pool.map(run_batch_job, [job for _, job in batches])
+            for position, result in zip(singles, single_results):
+                results[position] = result
+            for (positions, _), batch in zip(batches, batch_results):
+                for position, result in zip(positions, batch):
+                    results[position] = result
+            return results
+        except (BrokenProcessPool, OSError) as e:
+            fallback = f"Worker pool failed: {e}"
+            shutdown_pool()
+
+    for position in singles:
+        results[position] = run_pipeline_job(jobs[position])
+    for positions, job in batches:
+        for position, result in zip(positions, run_batch_job(job)):
+            results[position] = result
+    if fallback:
+        for _, result in results:
+            result.fallback = result.fallback or fallback
+    return results
+
+class ChannelTask:
+    """
+    One run_pipeline_job or run_batch_job of split_jobs. It runs in the pool if it was
+    submitted there, otherwise in this process when its results are first asked for.
+    """
+    def __init__(self, function, job, future=None, fallback=None):
+        self.function = function
+        self.job = job
+        self.future = future
+        self.fallback = fallback
+        self._results = None
+
+    def done(self):
+        return self.future is None or self.future.done()
+
+    def cancel(self):
+        if self.future is not None:
+            self.future.cancel()
+
+    def results(self):
+        """Returns {key: PipelineResult} for the channels of the job, blocking until they are fitted."""
+        if self._results is None:
+            output = None
+            if self.future is not None:
+                try:
+                    output = self.future.result()
+                except (Exception, CancelledError) as e:
+                    # The worker died or the job failed there, run it in this process instead
+                    if isinstance(e, BrokenProcessPool):
+                        shutdown_pool()
+                    self.fallback = f"Worker failed: {e}"
+            if output is None:
+                output = self.function(self.job)
+            self._results = dict([output] if self.function is run_pipeline_job else output)
+            if self.fallback:
+                for result in self._results.values():
+                    result.fallback = result.fallback or self.fallback
+        return self._results
+
+def submit_channels(jobs, workers: int=0):
+    """
+    Groups (key, data, kwargs) jobs like simplify_channels and submits them without
+    waiting for any. Returns {key: ChannelTask}, jobs batched together share a task.
+
+    Args:
+        jobs (list): (key, data, kwargs) tuples, data being the (frame, value) array of one channel.
+        workers (int, optional): Number of worker processes. 0 uses every available core,
+            1 runs every task in this process when its results are asked for.
+    """
+    jobs = list(jobs)
+    workers = workers or default_worker_count()
+    batches, singles = split_jobs(jobs, workers)
+    workers = min(workers, len(batches) + len(singles))
+    pool = None
+    fallback = None
+    if workers > 1:
+        try:
+            pool = get_pool(workers)
+        except OSError as e:
+            fallback = f"Worker pool failed: {e}"
+            shutdown_pool()
+
+    tasks = {}
+    work = [(run_pipeline_job, jobs[position], [position]) for position in singles]
+    work += [(run_batch_job, job, positions) for positions, job in batches]
+    for function, job, positions in work:
+        task = ChannelTask(function, job, fallback=fallback)
+        if pool is not None:
+            try:
+                task.future = pool.submit(function, job)
+            except (BrokenProcessPool, OSError) as e:
+                # The remaining tasks run in this process
+                fallback = task.fallback = f"Worker pool failed: {e}"
+                shutdown_pool()
+                pool = None
+        for position in positions:
+            tasks[jobs[position][0]] = task
+    return tasks
@@ -0,0 +1,164 @@
+import math
+import time
+
+import bpy
+import gpu
+import numpy as np
+from gpu_extras.batch import batch_for_shader
+
+from .cache import stage_cache
+from .keyframe_io import read_channel
+from .utils import ConstantKeys, LinearKeys, PiecewiseCubicCurve, mocap_cleaning_pipeline, normalize_quaternion_keys
+from .operators.core_operators import bone_name_from_data_path, group_channels, is_quaternion, pipeline_kwargs
+
+# --- Live Preview ---
+# A timer polls the settings and the bone selection. Once they have been stable
+# for DEBOUNCE seconds, the selected bones' channels are re-simplified in this
+# process, through the stage cache so only the stages after the changed setting
+# run again, and the result is drawn over the Graph Editor. No action is created.
+
+DEBOUNCE = 0.3
+POLL_INTERVAL = 0.1
+SAMPLES_PER_SEGMENT = 12
+PREVIEW_COLOR = (1.0, 0.6, 0.1, 1.0)
+
+_draw_handle = None
+_pending_signature = None
+_shown_signature = None
+_changed_at = 0.0
+_batches = []
+
+def _shader():
+    try:
+        return gpu.shader.from_builtin('UNIFORM_COLOR')
+    except ValueError:  # Blender before 3.4
+        return gpu.shader.from_builtin('2D_UNIFORM_COLOR')
+
+def selected_bone_names(obj):
+    return tuple(sorted(pose_bone.name for pose_bone in obj.pose.bones if pose_bone.bone.select))
+
+def preview_signature(context, props):
+    """Everything the preview depends on, compared between polls to detect changes."""
+    obj = context.active_object
+    if not obj or obj.type != 'ARMATURE':
+        return None
+    kwargs = pipeline_kwargs(props)
+    return (props.action_name, obj.name, selected_bone_names(obj), props.use_joint_fitting, tuple(sorted(kwargs.items())))
+
+def _unit_scale(context, data_path):
+    # The Graph Editor draws rotations in the scene's rotation unit
+    if data_path.endswith('rotation_euler') and context.scene.unit_settings.system_rotation == 'DEGREES':
+        return 180.0 / math.pi
+    return 1.0
+
+def _curve_points(curve, co, handle_left, handle_right):
+    """Samples the simplified keys of one fcurve the way Blender interpolates them."""
+    if isinstance(curve, ConstantKeys):
+        # Hold each value until the next key
+        return np.column_stack([np.repeat(co[:, 0], 2)[1:], np.repeat(co[:, 1], 2)[:-1]])
+    if isinstance(curve, LinearKeys) or len(co) < 2:
+        return co
+    chain = PiecewiseCubicCurve.from_keyframes(co, handle_left, handle_right)
+    return chain.evaluate_multi(np.linspace(0.0, 1.0, SAMPLES_PER_SEGMENT * len(chain.segments) + 1))
+
+def build_preview(context, props):
+    """Simplifies the selected bones' channels and returns (line points, key points) per fcurve."""
+    obj = context.active_object
+    action = bpy.data.actions.get(props.action_name)
+    if not obj or obj.type != 'ARMATURE' or not action:
+        return []
+
+    bones = set(selected_bone_names(obj))
+    channels = [(fcurve, read_channel(fcurve).points) for fcurve in action.fcurves
+                if bone_name_from_data_path(fcurve.data_path) in bones]
+
+    kwargs = pipeline_kwargs(props)
+    kwargs.pop('stream_window')  # A handful of channels, streaming would only slow the preview down
+    lines = []
+    for fcurves, data in group_channels(channels, props.use_joint_fitting):
+        result = mocap_cleaning_pipeline(data, stage_cache=stage_cache, **kwargs)
+        if result.curve is None:
+            continue
+        co, handle_left, handle_right = result.keyframes()
+        if is_quaternion(fcurves):
+            co, handle_left, handle_right = normalize_quaternion_keys(co, handle_left, handle_right)
+        for column, fcurve in enumerate(fcurves, start=1):
+            columns = [0, column]
+            scale = np.array([1.0, _unit_scale(context, fcurve.data_path)])
+            points = _curve_points(result.curve, co[:, columns], handle_left[:, columns], handle_right[:, columns])
+            lines.append((points * scale, co[:, columns] * scale))
+    return lines
+
+def update_preview(context, props):
+    global _batches
+    shader = _shader()
+    _batches = []
+    for points, keys in build_preview(context, props):
+        _batches.append(batch_for_shader(shader, 'LINE_STRIP', {"pos": points.astype(np.float32)}))
+        _batches.append(batch_for_shader(shader, 'POINTS', {"pos": keys.astype(np.float32)}))
+    tag_graph_editors()
+
+def tag_graph_editors():
+    window_manager = bpy.context.window_manager
+    if window_manager is None:
+        return
+    for window in window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'GRAPH_EDITOR':
+                area.tag_redraw()
+
+def draw_preview():
+    if not _batches:
+        return
+    shader = _shader()
+    gpu.state.blend_set('ALPHA')
+    gpu.state.line_width_set(2.0)
+    gpu.state.point_size_set(6.0)
+    shader.bind()
+    shader.uniform_float("color", PREVIEW_COLOR)
+    for batch in _batches:
+        batch.draw(shader)
+    gpu.state.line_width_set(1.0)
+    gpu.state.point_size_set(1.0)
+    gpu.state.blend_set('NONE')
+
+def _poll():
+    global _pending_signature, _shown_signature, _changed_at
+    context = bpy.context
+    props = context.scene.rejems_alter_props
+    if not props.use_live_preview:
+        _clear()
+        return None  # Unregisters the timer
+
+    signature = preview_signature(context, props)
+    now = time.perf_counter()
+    if signature != _pending_signature:
+        # Still changing, wait until the settings have been stable for DEBOUNCE seconds
+        _pending_signature = signature
+        _changed_at = now
+    elif signature != _shown_signature and now - _changed_at >= DEBOUNCE:
+        _shown_signature = signature
+        update_preview(context, props)
+    return POLL_INTERVAL
+
+def start():
+    global _draw_handle
+    if _draw_handle is None:
+        _draw_handle = bpy.types.SpaceGraphEditor.draw_handler_add(draw_preview, (), 'WINDOW', 'POST_VIEW')
+    if not bpy.app.timers.is_registered(_poll):
+        bpy.app.timers.register(_poll, first_interval=POLL_INTERVAL)
+
+def stop():
+    if bpy.app.timers.is_registered(_poll):
+        bpy.app.timers.unregister(_poll)
+    _clear()
+
+def _clear():
+    global _draw_handle, _pending_signature, _shown_signature, _batches
+    if _draw_handle is not None:
+        bpy.types.SpaceGraphEditor.draw_handler_remove(_draw_handle, 'WINDOW')
+        _draw_handle = None
+    _pending_signature = _shown_signature = None
+    _batches = []
+    stage_cache.clear()
+    tag_graph_editors()
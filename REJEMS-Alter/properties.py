@@ -10,6 +10,8 @@ from bpy.props import (
 )
 from bpy.types import PropertyGroup
 
+from . import preview
+
 # --- Bone Whitelist Item ---
 class BoneWhitelistItem(PropertyGroup):
     name: StringProperty(
@@ -17,6 +19,30 @@ class BoneWhitelistItem(PropertyGroup):
         description="Name of the bone to exclude from simplification"
     )
 
+# --- Statistics of the Last Run ---
+class ReJemsAlterRunStats(PropertyGroup):
+    action_name: StringProperty(name="Action")
+    fcurves: IntProperty(name="Fcurves")
+    keys_in: IntProperty(name="Keys In")
+    keys_out: IntProperty(name="Keys Out")
+    outliers_removed: IntProperty(name="Outliers Removed")
+    max_error: FloatProperty(name="Max Error", precision=4)
+    outlier_time: FloatProperty(name="Outlier Detection", unit='TIME_ABSOLUTE')
+    reduction_time: FloatProperty(name="Reduction", unit='TIME_ABSOLUTE')
+    fit_time: FloatProperty(name="Fitting", unit='TIME_ABSOLUTE')
+    slowest_channel: StringProperty(name="Slowest Channel")
+    slowest_time: FloatProperty(name="Slowest Time", unit='TIME_ABSOLUTE')
+    fast_path_fcurves: IntProperty(name="Constant, Linear or Stepped")
+    duplicate_fcurves: IntProperty(name="Duplicates")
+    cache_hits: IntProperty(name="Cache Hits")
+    cache_misses: IntProperty(name="Cache Misses")
+
+def update_live_preview(self, context):
+    if self.use_live_preview:
+        preview.start()
+    else:
+        preview.stop()
+
 # --- Property Group ---
 class ReJemsAlterProperties(PropertyGroup):
     use_outlier_detection: BoolProperty(
@@ -24,16 +50,42 @@ class ReJemsAlterProperties(PropertyGroup):
         description="Enable outlier detection",
         default=True
     )
+    outlier_method: EnumProperty(
+        name="Outlier Method",
+        description="How outliers are detected",
+        items=[
+            ('NEIGHBOR', "Neighbour", "Flags points that deviate from the midpoint of their two neighbours"),
+            ('HAMPEL', "Hampel", "Flags values that deviate from the rolling median by more than the threshold times the scaled MAD")
+        ],
+        default='NEIGHBOR'
+    )
+    outlier_window: IntProperty(
+        name="Hampel Window",
+        description="Number of frames in the rolling median window of the Hampel filter",
+        default=7,
+        min=3,
+        max=101
+    )
     outlier_threshold: FloatProperty(
         name="Threshold for outlier detection",
-        description="Threshold for outlier detection",
+        description="Threshold for outlier detection (a distance for Neighbour, a number of scaled MADs for Hampel)",
         default=3.0,
         min=0.0,
         max=10.0
     )
+    reducer: EnumProperty(
+        name="Reducer",
+        description="How keys are dropped before fitting",
+        items=[
+            ('VW', "Visvalingam-Whyatt", "Drops the keys that span the smallest triangle areas"),
+            ('RDP', "Ramer-Douglas-Peucker", "Keeps the keys farthest from the line between their neighbours, faster on long channels"),
+            ('STRIDE', "Uniform Stride", "Keeps every n-th key, the fastest and coarsest, meant for previews")
+        ],
+        default='VW'
+    )
     vw_tolerance: FloatProperty(
-        name="VW Tolerance",
-        description="Simplification tolerance for Visvalingam-Whyatt",
+        name="Reduction Tolerance",
+        description="Simplification tolerance of the reducer, a triangle area for Visvalingam-Whyatt and a distance for the others",
         default=0.05,
         min=0.0,
         max=1.0
@@ -58,6 +110,135 @@ class ReJemsAlterProperties(PropertyGroup):
         min=0.0,
         max=1.0
     )
+    fit_mode: EnumProperty(
+        name="Fit Mode",
+        description="Shape of the fitted curve",
+        items=[
+            ('GLOBAL', "Global", "Fits one Bezier curve over the whole channel"),
+            ('PIECEWISE', "Piecewise Cubic", "Fits cubic segments between keys and writes their handles")
+        ],
+        default='GLOBAL'
+    )
+    solver_mode: EnumProperty(
+        name="Solver",
+        description="How the Bezier control points are fitted",
+        items=[
+            ('GRADIENT', "Gradient", "Iteratively nudges control points toward the worst sample"),
+            ('LEAST_SQUARES', "Least Squares", "Solves the control points in one linear least-squares fit")
+        ],
+        default='GRADIENT'
+    )
+    parameterization: EnumProperty(
+        name="Parameterization",
+        description="How the global solvers place the keys along the curve",
+        items=[
+            ('CHORD', "Chord Length", "Spaces the keys by the distance between them"),
+            ('TIME', "Frame Time", "Spaces the keys by their frame"),
+            ('UNIFORM', "Uniform", "Evenly spaced samples of the keys, as in earlier versions")
+        ],
+        default='CHORD'
+    )
+    gauss_newton_steps: IntProperty(
+        name="Newton Steps",
+        description="Newton-Raphson reparameterization steps after the least-squares solve",
+        default=0,
+        min=0,
+        max=20
+    )
+    use_live_preview: BoolProperty(
+        name="Live Preview",
+        description="Draw the simplified curves of the selected bones in the Graph Editor while the settings change, without creating an action",
+        default=False,
+        update=update_live_preview
+    )
+    batch_source: EnumProperty(
+        name="Batch",
+        description="Which actions the batch operator simplifies",
+        items=[
+            ('FILTER', "Name Filter", "Every action whose name matches the filter"),
+            ('SELECTED', "Selected Armatures", "The active action of every selected armature")
+        ],
+        default='FILTER'
+    )
+    batch_filter: StringProperty(
+        name="Filter",
+        description="Action name pattern, * and ? are wildcards",
+        default="*"
+    )
+    update_mode: EnumProperty(
+        name="Update",
+        description="Which frames the update re-simplifies",
+        items=[
+            ('CHANGED', "Changed Frames", "Frames whose source keys changed since the action was simplified"),
+            ('RANGE', "Frame Range", "The frames between Start and End")
+        ],
+        default='CHANGED'
+    )
+    update_frame_start: IntProperty(
+        name="Start",
+        description="First frame to re-simplify",
+        default=1
+    )
+    update_frame_end: IntProperty(
+        name="End",
+        description="Last frame to re-simplify",
+        default=250
+    )
+    update_margin: IntProperty(
+        name="Margin",
+        description="Frames re-simplified on each side of an edit, so the new keys blend into the existing ones",
+        default=8,
+        min=0,
+        max=1000
+    )
+    use_joint_fitting: BoolProperty(
+        name="Joint Vector Fitting",
+        description="Fit the channels of location, rotation and scale together so they share key times. Quaternion keys are renormalized",
+        default=True
+    )
+    use_fast_path: BoolProperty(
+        name="Detect Simple Channels",
+        description="Write constant and linear fcurves as two keys and stepped fcurves as one key per step, with CONSTANT or LINEAR interpolation instead of a fit",
+        default=True
+    )
+    use_streaming: BoolProperty(
+        name="Stream Long Channels",
+        description="Simplify long channels in overlapping windows so memory stays bounded. The windows are joined with matching keys, so the result is written as a chain of keys with free handles",
+        default=False
+    )
+    stream_window: IntProperty(
+        name="Window Size",
+        description="Keys per streaming window, channels up to this length are fitted in one piece",
+        default=2000,
+        min=100
+    )
+    use_parallel: BoolProperty(
+        name="Parallel Processing",
+        description="Fit fcurves in worker processes. Turn off for deterministic serial processing while debugging",
+        default=True
+    )
+    worker_count: IntProperty(
+        name="Workers",
+        description="Number of worker processes, 0 uses all available cores",
+        default=0,
+        min=0
+    )
+    use_cache: BoolProperty(
+        name="Cache Results",
+        description="Reuse the results of unchanged fcurves, in memory and in a rejems_cache folder next to the .blend file",
+        default=True
+    )
+    cache_size_mb: IntProperty(
+        name="Cache Size (MB)",
+        description="Disk space the result cache may use before the least recently used entries are removed",
+        default=256,
+        min=1
+    )
+    keep_partial_on_cancel: BoolProperty(
+        name="Keep Partial Result on Cancel",
+        description="Keep the partially simplified action when the background operator is cancelled",
+        default=False
+    )
     action_name: StringProperty(
         name="Action",
         description="Select the action to simplify"
@@ -69,6 +250,9 @@ class ReJemsAlterProperties(PropertyGroup):
     bone_whitelist: CollectionProperty(
         type=BoneWhitelistItem
     )
+    last_run: PointerProperty(
+        type=ReJemsAlterRunStats
+    )
     advanced_mode: BoolProperty(
         name="Advanced Mode",
         description="Show advanced settings",
@@ -89,13 +273,39 @@ class ReJemsAlterProperties(PropertyGroup):
         ],
         default='BALANCED'
     )
+    budget_mode: EnumProperty(
+        name="Key Budget",
+        description="Search the VW tolerance automatically to stay within a keyframe budget",
+        items=[
+            ('NONE', "None", "Use the VW tolerance as set"),
+            ('CHANNEL_KEYS', "Keys per Channel", "At most this many keys per fcurve"),
+            ('ACTION_KEYS', "Keys per Action", "At most this many keys in the whole action, shared between fcurves by their key counts"),
+            ('RATIO', "Compression Ratio", "At most this fraction of the original keys per fcurve")
+        ],
+        default='NONE'
+    )
+    target_keys: IntProperty(
+        name="Target Keys",
+        description="Keyframe budget per fcurve or per action",
+        default=100,
+        min=2
+    )
+    target_ratio: FloatProperty(
+        name="Target Ratio",
+        description="Fraction of the original keys to keep",
+        default=0.1,
+        min=0.001,
+        max=1.0
+    )
 
 def register():
     bpy.utils.register_class(BoneWhitelistItem)
+    bpy.utils.register_class(ReJemsAlterRunStats)
     bpy.utils.register_class(ReJemsAlterProperties)
     bpy.types.Scene.rejems_alter_props = PointerProperty(type=ReJemsAlterProperties)
 
 def unregister():
     del bpy.types.Scene.rejems_alter_props
     bpy.utils.unregister_class(ReJemsAlterProperties)
+    bpy.utils.unregister_class(ReJemsAlterRunStats)
     bpy.utils.unregister_class(BoneWhitelistItem)
\ No newline at end of file
@@ -0,0 +1,201 @@
+import time
+
+import numpy as np
+
+from .utils import (
+    PiecewiseCubicCurve,
+    PipelineResult,
+    StageStats,
+    _normalize,
+    detect_outliers,
+    fit_curve,
+    key_budget,
+    keyframes_from_fit,
+    mocap_cleaning_pipeline,
+    piecewise_key_counter,
+    reduce_points,
+    reduce_to_budget,
+)
+
+# --- Streaming Simplification ---
+# Very long takes are processed in windows through a generator pipeline:
+# chunks -> overlapping windows -> outlier detection -> reduction -> fitting.
+# Only a few windows are held at a time, so peak memory does not grow with the take.
+
+def iter_chunks(source, chunk_size: int=4096):
+    """
+    Yields (n, 2) float64 point chunks from an array (views of float64 arrays, also for
+    np.memmap, float32 channels are converted a chunk at a time) or from an iterable of chunks.
+    """
+    if isinstance(source, np.ndarray):
+        for start in range(0, len(source), chunk_size):
+            yield np.asarray(source[start:start + chunk_size], dtype=float)
+    else:
+        for chunk in source:
+            yield np.asarray(chunk, dtype=float)
+
+def iter_windows(chunks, window_size: int=2000, margin: int=16):
+    """
+    Yields (points, core_start, core_end) windows. points[core_start:core_end]
+    is the window's own core, consecutive cores do not overlap, and up to
+    `margin` context points on each side let local filters see past the core.
+    """
+    buffer = None
+    position = 0  # Start of the next core in buffer
+    for chunk in chunks:
+        buffer = chunk if buffer is None else np.concatenate([buffer, chunk])
+        while len(buffer) - position >= window_size + margin:
+            start = max(0, position - margin)
+            yield buffer[start:position + window_size + margin], position - start, position + window_size - start
+            position += window_size
+            # Drop everything no later window can see
+            drop = max(0, position - margin)
+            buffer = buffer[drop:]
+            position -= drop
+
+    if buffer is None:
+        return
+    while position < len(buffer):
+        start = max(0, position - margin)
+        end = min(position + window_size, len(buffer))
+        yield buffer[start:end + margin], position - start, end - start
+        position = end
+
+def _add_stage(stages, name, start_time, points_in, points_out, **values):
+    stage = stages.setdefault(name, StageStats(name))
+    stage.time += time.perf_counter() - start_time
+    stage.points_in += points_in
+    stage.points_out += points_out
+    for key, value in values.items():
+        setattr(stage, key, getattr(stage, key) + value)
+
+def simplify_stream(source, window_size: int=2000, margin: int=16, chunk_size: int=4096, vw_tolerance: float=None, error_threshold: float=0.05, max_iterations: int=100, initial_learning_rate: float=0.2, outlier_threshold: float=3, use_outlier_detection: bool=True, outlier_method: str='NEIGHBOR', outlier_window: int=7, solver: str='GRADIENT', gauss_newton_steps: int=0, fit_mode: str='GLOBAL', parameterization: str='CHORD', reducer: str='VW', target_ratio: float=0.0, stages: dict=None):
+    """
+    Simplifies a channel window by window and yields (co, handle_left, handle_right)
+    key blocks in frame order. Takes the same settings as mocap_cleaning_pipeline.
+
+    Consecutive windows share their seam key: it is the last cleaned point of one
+    window and the first point of the next, and in 'PIECEWISE' mode both fits
+    are pinned to the same seam tangent, so the handles line up as well.
+
+    Args:
+        source (np.ndarray or iterable): (frame, value) points, or an iterable of point chunks.
+        window_size (int, optional): Points per window. Defaults to 2000.
+        margin (int, optional): Context points on each side of a window for outlier detection,
+            must be at least half the outlier window. Defaults to 16.
+        chunk_size (int, optional): Points read at a time from an array source. Defaults to 4096.
+        target_ratio (float, optional): Key budget as a fraction of the input keys, applied per window. Defaults to 0.0 (no budget).
+        stages (dict, optional): Receives one StageStats per stage, summed over all windows.
+    """
+    stages = {} if stages is None else stages
+    margin = max(margin, outlier_window // 2 + 1)
+    seam = None          # Last point of the previous window
+    seam_tangent = None  # Left tangent the next window starts with
+    pending = None       # (co, handle_left) of the seam key, its right handle comes from the next window
+
+    windows = iter_windows(iter_chunks(source, chunk_size), window_size, margin)
+    next_window = next(windows, None)
+    while next_window is not None:
+        points, core_start, core_end = next_window
+        next_window = next(windows, None)
+        is_last = next_window is None
+
+        # 1. Outlier detection on the window with its context
+        start_time = time.perf_counter()
+        keep = np.ones(len(points), dtype=bool)
+        if use_outlier_detection:
+            keep = ~detect_outliers(points, threshold=outlier_threshold, method=outlier_method, window=outlier_window)
+        core = points[core_start:core_end][keep[core_start:core_end]]
+        after = points[core_end:][keep[core_end:]]
+        _add_stage(stages, 'outliers', start_time, core_end - core_start, len(core), outliers_removed=int(np.count_nonzero(~keep[core_start:core_end])))
+        if seam is not None:
+            core = np.concatenate([seam[np.newaxis], core[core[:, 0] > seam[0]]])
+
+        if len(core) < 2:
+            continue  # Nothing new in this window, the seam carries over
+
+        # 2. Reduction, the window ends always survive
+        start_time = time.perf_counter()
+        budget = key_budget(core_end - core_start, target_ratio=target_ratio)
+        if budget:
+            count_keys = piecewise_key_counter(error_threshold) if fit_mode == 'PIECEWISE' else None
+            reduced = core[reduce_to_budget(core, budget, count_keys)]
+        elif vw_tolerance is not None:
+            reduced = reduce_points(core, vw_tolerance, reducer)
+        else:
+            reduced = core
+        _add_stage(stages, 'reduction', start_time, len(core), len(reduced))
+
+        # 3. Fit with the seam tangents pinned
+        start_time = time.perf_counter()
+        right_tangent = None
+        if not is_last and len(after):
+            right_tangent = _normalize(reduced[-2] - after[0])
+        fit_stats = StageStats('fit')
+        curve, iterations = fit_curve(reduced, error_threshold, fit_mode, solver, max_iterations, initial_learning_rate, gauss_newton_steps,
+                                      left_tangent=seam_tangent, right_tangent=right_tangent, stats=fit_stats, parameterization=parameterization)
+        if curve is None:
+            continue
+        co, handle_left, handle_right = keyframes_from_fit(curve, reduced)
+        fit = stages.setdefault('fit', StageStats('fit'))
+        fit.max_error = max(fit.max_error or 0.0, fit_stats.max_error or 0.0)
+        _add_stage(stages, 'fit', start_time, len(reduced), len(co) - (pending is not None), iterations=fit_stats.iterations)
+
+        # Join the seam key: left handle from the previous window, right handle from this one
+        if pending is not None:
+            handle_left = handle_left.copy()
+            handle_left[0] = pending[1]
+        if is_last:
+            pending = None
+            yield co, handle_left, handle_right
+        else:
+            pending = (co[-1], handle_left[-1])
+            seam = co[-1]
+            seam_tangent = -right_tangent if right_tangent is not None else None
+            yield co[:-1], handle_left[:-1], handle_right[:-1]
+
+    if pending is not None:
+        co, handle_left = pending
+        yield co[np.newaxis], handle_left[np.newaxis], (2 * co - handle_left)[np.newaxis]
+
+def stream_pipeline(mocap_data, window_size: int=2000, target_keys: int=0, use_fast_path: bool=True, **kwargs):
+    """
+    Runs simplify_stream over a whole channel and returns a PipelineResult,
+    like mocap_cleaning_pipeline. The keys end up in a PiecewiseCubicCurve.
+    A target_keys budget is spread over the windows as a ratio.
+    use_fast_path is ignored: classify_channel needs float64 copies of the whole
+    channel, and the windows reduce constant, linear and stepped channels anyway.
+    """
+    mocap_data = np.asarray(mocap_data)
+    if target_keys > 0 and len(mocap_data):
+        ratio = target_keys / len(mocap_data)
+        kwargs['target_ratio'] = min(ratio, kwargs.get('target_ratio') or ratio)
+    result = PipelineResult(points_in=len(mocap_data))
+    try:
+        blocks = list(simplify_stream(mocap_data, window_size, stages=result.stages, **kwargs))
+        if not blocks:
+            result.error = "Not enough points to fit a Bezier curve."
+            return result
+
+        co, handle_left, handle_right = (np.concatenate(arrays) for arrays in zip(*blocks))
+        if len(co) < 2:
+            result.error = "Not enough points to fit a Bezier curve."
+            return result
+        result.curve = PiecewiseCubicCurve.from_keyframes(co, handle_left, handle_right)
+        result.data = co
+        result.iterations = result.stages['fit'].iterations
+        result.solver = 'STREAMING'
+        return result
+    except Exception as e:
+        result.curve = None
+        result.error = f"An error occurred in the stream_pipeline: {e}"
+        return result
+
+def run_pipeline(mocap_data, stream_window: int=0, **kwargs):
+    """
+    Simplifies one channel, streaming it when it is longer than stream_window points.
+    A stream_window of 0 always runs mocap_cleaning_pipeline on the whole channel.
+    """
+    if stream_window and len(mocap_data) > stream_window:
+        return stream_pipeline(mocap_data, stream_window, **kwargs)
+    return mocap_cleaning_pipeline(mocap_data, **kwargs)
\ No newline at end of file
@@ -1,85 +1,253 @@
+import heapq
+import struct
+import time
 import numpy as np
-from math import comb
+from array import array
+from collections import OrderedDict
+from math import comb, lgamma
+
+from .channels import ChannelData
+
+# Degrees above this switch to the log-space basis, where comb(n, i) * t**i
+# would overflow or underflow a float64.
+STABLE_BASIS_DEGREE = 30
+# Maximum number of (degree, t-grid) basis matrices kept in memory.
+BASIS_CACHE_SIZE = 32
+# Maximum total size of the cached basis matrices. A matrix is (n, degree + 1)
+# floats, so a global fit of n points alone is 8 * n^2 bytes.
+BASIS_CACHE_BYTES = 64 * 1024 * 1024
+
+_basis_cache = OrderedDict()
+_basis_cache_bytes = 0
+
+def _bernstein_basis_direct(degree, t_values):
+    i = np.arange(degree + 1)
+    coeffs = np.array([comb(degree, k) for k in i], dtype=float)
+    t = t_values[..., np.newaxis]
+    return coeffs * t ** i * (1 - t) ** (degree - i)
+
+def _bernstein_basis_log(degree, t_values):
+    i = np.arange(degree + 1)
+    log_coeffs = np.array([lgamma(degree + 1) - lgamma(k + 1) - lgamma(degree - k + 1) for k in i])
+    with np.errstate(divide='ignore'):
+        log_t = np.log(t_values)[..., np.newaxis]
+        log_one_minus_t = np.log1p(-t_values)[..., np.newaxis]
+    # Skip the 0 * -inf terms at t == 0 and t == 1, they contribute a factor of 1.
+    shape = t_values.shape + (degree + 1,)
+    log_basis = log_coeffs + np.multiply(i, log_t, out=np.zeros(shape), where=i > 0)
+    log_basis += np.multiply(degree - i, log_one_minus_t, out=np.zeros(shape), where=i < degree)
+    return np.exp(log_basis)
+
+def bernstein_basis(degree: int, t_values):
+    """
+    Returns the (len(t_values), degree + 1) Bernstein basis matrix.
+    Matrices are shared through an LRU cache bounded by BASIS_CACHE_SIZE entries and
+    BASIS_CACHE_BYTES, so every curve of the same degree evaluated on the same t-grid
+    reuses one matrix. Matrices larger than BASIS_CACHE_BYTES are not cached.
+    Treat it as read-only.
+    """
+    global _basis_cache_bytes
+    t_values = np.ascontiguousarray(t_values, dtype=float)
+    key = (degree, t_values.tobytes())
+    basis = _basis_cache.get(key)
+    if basis is not None:
+        _basis_cache.move_to_end(key)
+        return basis
+
+    if degree > STABLE_BASIS_DEGREE:
+        basis = _bernstein_basis_log(degree, t_values)
+    else:
+        basis = _bernstein_basis_direct(degree, t_values)
+    basis.flags.writeable = False
+    if basis.nbytes > BASIS_CACHE_BYTES:
+        return basis
+
+    _basis_cache[key] = basis
+    _basis_cache_bytes += basis.nbytes
+    while len(_basis_cache) > BASIS_CACHE_SIZE or _basis_cache_bytes > BASIS_CACHE_BYTES:
+        _basis_cache_bytes -= _basis_cache.popitem(last=False)[1].nbytes
+    return basis
+
+def basis_cache_bytes():
+    """Total size of the cached basis matrices."""
+    return _basis_cache_bytes
+
+def clear_basis_cache():
+    global _basis_cache_bytes
+    _basis_cache.clear()
+    _basis_cache_bytes = 0
+
+def _uncached_basis(degree, t_values):
+    # For one-off t-grids, such as reparameterized samples, that would only evict useful cache entries.
+    # t_values may have leading batch dimensions, the basis then has one more trailing dimension.
+    if degree > STABLE_BASIS_DEGREE:
+        return _bernstein_basis_log(degree, t_values)
+    return _bernstein_basis_direct(degree, t_values)
 
 class BezierCurve:
     """Represents a Bezier curve of any given degree."""
     def __init__(self, control_points: np.ndarray):
-        self.control_points = np.array(control_points)
+        self.control_points = np.array(control_points, dtype=float)
         self.degree = len(control_points) - 1
 
     def point(self, t):
-        n = self.degree
-        point = np.zeros(self.control_points.shape[1])
-        for i in range(n + 1):
-            bernstein_coeff = comb(n, i) * (t ** i) * ((1 - t) ** (n - i))
-            point += bernstein_coeff * self.control_points[i]
-        return point
+        return self.evaluate_multi([t])[0]
 
     def evaluate_multi(self, t_values):
-        points = np.array([self.point(t) for t in t_values])
-        return points
+        return bernstein_basis(self.degree, t_values) @ self.control_points
+
+    def derivative(self):
+        """Returns the derivative (hodograph) as a Bezier curve of one degree lower."""
+        if self.degree < 1:
+            return BezierCurve(np.zeros_like(self.control_points))
+        return BezierCurve(self.degree * np.diff(self.control_points, axis=0))
 
-def get_initial_control_points(points: np.ndarray, vw_tolerance=None):
+def get_initial_control_points(points: np.ndarray, tolerance=None, reducer: str='VW'):
     """
-    Initializes control points using simplified points from Visvalingam-Whyatt or directly
-    from input points.
+    Initializes control points from the input points, reduced with one of the
+    REDUCERS if a tolerance is given. The degree is determined by the returned points.
     """
     points = np.array(points)
-    simplified_points = points
-
-    if vw_tolerance:
-        simplified_points = visvalingam_whyatt(points, vw_tolerance)
+    if tolerance:
+        return reduce_points(points, tolerance, reducer)
+    return points
 
-    return simplified_points
+# Rows evaluated at a time by the outlier tests, bounds their float64 temporaries
+OUTLIER_CHUNK = 1 << 14
 
-def initial_control_points_heuristic(points, vw_tolerance=None):
+def detect_outliers(points, threshold=3, method: str='NEIGHBOR', window: int=7):
     """
-    Initializes control points using simplified points from Visvalingam-Whyatt.
-    The degree is determined by the simplified points.
-    """
-    points = np.array(points)
-    simplified_points = points
+    Detects outliers with one of two vectorized tests.
 
-    if vw_tolerance:
-        simplified_points = visvalingam_whyatt(points, vw_tolerance)
+    'NEIGHBOR' compares every point with the median (the mean) of its two
+    neighbours, with special handling for edges, and flags deviations above
+    `threshold`. 'HAMPEL' compares every value with the median of a rolling
+    window of `window` points and flags deviations above `threshold` scaled
+    median absolute deviations (MAD).
 
-    return simplified_points
-
-def detect_outliers(points, threshold=3):
-    """
-    Detects outliers using a median-based approach with special handling for edges.
+    Both tests run OUTLIER_CHUNK rows at a time in float64, so float32 channels
+    are never converted as a whole. Returns a boolean mask, True for outliers.
     """
+    points = np.asarray(points)
     outliers = np.zeros(len(points), dtype=bool)
     if len(points) < 3:
         return outliers
 
+    if method == 'HAMPEL':
+        return hampel_outliers(points, threshold, window)
+
     # Handle first and last points separately
-    if np.linalg.norm(points[0] - points[1]) > threshold:
-        outliers[0] = True
-    if np.linalg.norm(points[-1] - points[-2]) > threshold:
-        outliers[-1] = True
-
-    # Use median for central points
-    for i in range(1, len(points) - 1):
-        prev_point = points[i - 1]
-        current_point = points[i]
-        next_point = points[i + 1]
-
-        # Calculate the median point
-        median_point = np.median([prev_point, next_point], axis=0)
-
-        # Calculate the deviation from the median point
-        deviation = np.linalg.norm(current_point - median_point)
-
-        # Mark as outlier if deviation is above the threshold
-        if deviation > threshold:
-            outliers[i] = True
+    ends = np.asarray(points[[0, 1, -2, -1]], dtype=float)
+    outliers[0] = np.linalg.norm(ends[0] - ends[1]) > threshold
+    outliers[-1] = np.linalg.norm(ends[3] - ends[2]) > threshold
+
+    # The median of the two neighbours is their mean
+    for start in range(1, len(points) - 1, OUTLIER_CHUNK):
+        stop = min(start + OUTLIER_CHUNK, len(points) - 1)
+        rows = np.asarray(points[start - 1:stop + 1], dtype=float)
+        median_points = (rows[:-2] + rows[2:]) / 2
+        deviations = np.linalg.norm(rows[1:-1] - median_points, axis=1)
+        outliers[start:stop] = deviations > threshold
     return outliers
 
-def adaptive_jems_algorithm(points: np.ndarray, error_threshold: float=0.05, max_iterations: int=100, initial_learning_rate: float=0.2, convergence_window: int=5):
+# Scales a median absolute deviation to a standard deviation for normally distributed noise
+MAD_SCALE = 1.4826
+# Smallest MAD as a fraction of a column's value range, so flat stretches (MAD 0) do not flag tiny wobbles
+MAD_FLOOR = 1e-4
+
+def hampel_outliers(points, threshold: float=3, window: int=7):
+    """
+    Rolling-window Hampel filter over the value columns of (frame, value...) points.
+    Edges are padded with the edge values so every point gets a full window, and
+    the MAD is at least MAD_FLOOR times the column's value range.
+    """
+    points = np.asarray(points)
+    values = points[:, 1:] if points.ndim == 2 and points.shape[1] > 1 else points.reshape(len(points), -1)
+    half_window = max(1, window // 2)
+    outliers = np.zeros(len(points), dtype=bool)
+    min_mad = MAD_FLOOR * (values.max(axis=0).astype(float) - values.min(axis=0))
+
+    for start in range(0, len(values), OUTLIER_CHUNK):
+        stop = min(start + OUTLIER_CHUNK, len(values))
+        # The chunk's rows and half a window on each side, edge rows repeated past the ends
+        rows = np.clip(np.arange(start - half_window, stop + half_window), 0, len(values) - 1)
+        padded = np.asarray(values[rows], dtype=float)
+        # (chunk, num_columns, 2 * half_window + 1) strided view, no copy
+        windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * half_window + 1, axis=0)
+        medians = np.median(windows, axis=-1)
+        mad = np.maximum(np.median(np.abs(windows - medians[..., np.newaxis]), axis=-1), min_mad)
+
+        deviations = np.abs(padded[half_window:len(padded) - half_window] - medians)
+        outliers[start:stop] = np.any(deviations > threshold * MAD_SCALE * mad, axis=1)
+    return outliers
+
+# How the global fitters assign a curve parameter t to the data points
+PARAMETERIZATIONS = ('UNIFORM', 'CHORD', 'TIME')
+
+def _fit_samples(points: np.ndarray, parameterization: str='CHORD'):
+    """
+    Returns the t-grid the fitters evaluate on and the data sample matched to each t.
+
+    'CHORD' gives every point its own t from the cumulative chord length and
+    'TIME' from its frame, so unevenly spaced keys (as left by VW) keep their
+    spacing. 'UNIFORM' spreads max(100, 2n) evenly spaced t over truncated
+    sample indices, which repeats samples and ignores the frame spacing.
+    """
+    if parameterization == 'CHORD':
+        return _chord_length_parameters(points), points
+    if parameterization == 'TIME':
+        frames = points[:, 0]
+        span = frames[-1] - frames[0]
+        return ((frames - frames[0]) / span if span > 0 else np.linspace(0, 1, len(points))), points
+
+    num_points = len(points)
+    num_t_values = max(100, num_points * 2)
+    t_values = np.linspace(0, 1, num_t_values)
+    t_values_to_fit = np.linspace(0, num_points - 1, num_t_values, dtype=int)
+    return t_values, points[t_values_to_fit]
+
+def _fit_basis(degree: int, t_values, parameterization: str):
+    """
+    The basis of a fitter's t-grid. Only the 'UNIFORM' grid repeats between channels,
+    'CHORD' and 'TIME' grids depend on each channel's points and would only fill the cache.
+    """
+    if parameterization == 'UNIFORM':
+        return bernstein_basis(degree, t_values)
+    return _uncached_basis(degree, t_values)
+
+def _newton_parameters(control_points, t_values, target_points):
+    """
+    One Newton-Raphson step per sample towards its closest point on the Bezier
+    curve. Falls back to a Gauss-Newton step where the second-order denominator
+    is not positive. Also takes a batch of curves of one degree, with
+    (batch, degree + 1, dim) control points and (batch, samples) t_values.
+    """
+    degree = control_points.shape[-2] - 1
+    first = degree * np.diff(control_points, axis=-2)
+    second = (degree - 1) * np.diff(first, axis=-2) if degree > 1 else np.zeros_like(first[..., :1, :])
+    diff = _uncached_basis(degree, t_values) @ control_points - target_points
+    d1 = _uncached_basis(degree - 1, t_values) @ first
+    d2 = _uncached_basis(max(degree - 2, 0), t_values) @ second
+    numerator = np.einsum('...ij,...ij->...i', diff, d1)
+    gauss_newton = np.einsum('...ij,...ij->...i', d1, d1)
+    denominator = gauss_newton + np.einsum('...ij,...ij->...i', diff, d2)
+    denominator = np.where(denominator > 1e-12, denominator, np.maximum(gauss_newton, 1e-12))
+    return np.clip(t_values - numerator / denominator, 0.0, 1.0)
+
+def _record(stats, **values):
+    if stats is not None:
+        for name, value in values.items():
+            setattr(stats, name, value)
+
+def adaptive_jems_algorithm(points: np.ndarray, error_threshold: float=0.05, max_iterations: int=100, initial_learning_rate: float=0.2, convergence_window: int=5, stats: 'StageStats'=None, parameterization: str='CHORD', newton_interval: int=5):
     """
     JEMS algorithm that adapts to the number of input points, similar to VW.
-    It generates t_values based on the number of input points.
+    It generates t_values based on the number of input points, see _fit_samples
+    for the parameterizations. Every `newton_interval` iterations each sample's t
+    takes a Newton-Raphson step towards its closest point on the curve, kept only
+    where it brings the sample closer (0 disables this).
+    Returns (curve, iterations run).
+    If `stats` is given it receives the iterations, max error, average error and whether the fit converged.
     """
     points = np.array(points)
     control_points = get_initial_control_points(points)
@@ -87,24 +255,33 @@ def adaptive_jems_algorithm(points: np.ndarray, error_threshold: float=0.05, max
     num_points = len(points)
 
     if num_points < bezier_degree + 1:
-        print(f"Not enough points ({num_points}) to fit a Bezier curve with {bezier_degree} degree.")
         return None, 0
 
-    # Generate t_values and corresponding indices in the data points array
-    num_t_values = max(100, num_points * 2)
-    t_values = np.linspace(0, 1, num_t_values)
-    t_values_to_fit = np.linspace(0, num_points - 1, num_t_values, dtype=int)
+    # Generate t_values and corresponding samples in the data points array
+    t_values, target_points = _fit_samples(points, parameterization)
 
+    # The basis only depends on the degree and the t-grid, so build it once
+    basis = _fit_basis(bezier_degree, t_values, parameterization)
+    control_points = np.array(control_points, dtype=float)
     curve = BezierCurve(control_points)
     previous_errors = []
 
-    for iteration in range(max_iterations):
-        learning_rate = initial_learning_rate * (0.99 ** iteration)
+    # iteration counts the iterations run so far, this one included
+    for iteration in range(1, max_iterations + 1):
+        learning_rate = initial_learning_rate * (0.99 ** (iteration - 1))
+
+        if newton_interval and iteration > 1 and (iteration - 1) % newton_interval == 0:
+            new_t_values = _newton_parameters(control_points, t_values, target_points)
+            new_basis = _uncached_basis(bezier_degree, new_t_values)
+            closer = (np.linalg.norm(new_basis @ control_points - target_points, axis=1)
+                      < np.linalg.norm(basis @ control_points - target_points, axis=1))
+            t_values = np.where(closer, new_t_values, t_values)
+            basis = np.where(closer[:, np.newaxis], new_basis, basis)
 
-        curve_points = curve.evaluate_multi(t_values)
+        curve_points = basis @ control_points
 
         # --- More Vectorized Error Calculation ---
-        distances = np.linalg.norm(curve_points - points[t_values_to_fit], axis=1)
+        distances = np.linalg.norm(curve_points - target_points, axis=1)
         # ------------------------------------------
 
         max_error = np.max(distances)
@@ -116,27 +293,27 @@ def adaptive_jems_algorithm(points: np.ndarray, error_threshold: float=0.05, max
             if len(previous_errors) > convergence_window:
                 error_range = np.max(previous_errors[-convergence_window:]) - np.min(previous_errors[-convergence_window:])
                 if error_range < error_threshold / 10:
-                    print(f"Adaptive JEMS converged after {iteration+1} iterations with max error {max_error:.4f} and average error {average_error:.4f}.")
+                    _record(stats, iterations=iteration, max_error=float(max_error), average_error=float(average_error), converged=True)
                     return curve, iteration
             else:
-                print(f"Adaptive JEMS converged after {iteration+1} iterations with max error {max_error:.4f} and average error {average_error:.4f}.")
+                _record(stats, iterations=iteration, max_error=float(max_error), average_error=float(average_error), converged=True)
                 return curve, iteration
 
         # Convergence based on error change
         if len(previous_errors) > convergence_window:
             error_range = np.max(previous_errors[-convergence_window:]) - np.min(previous_errors[-convergence_window:])
             if error_range < error_threshold / 10 and max_error <= error_threshold:
-                print(f"Adaptive JEMS converged based on error change after {iteration+1} iterations, max error: {max_error:.4f}, avg error: {average_error:.4f}")
+                _record(stats, iterations=iteration, max_error=float(max_error), average_error=float(average_error), converged=True)
                 return curve, iteration
 
         # --- More Vectorized Control Point Adjustment ---
         max_error_index = np.argmax(distances)
 
-        # Calculate basis values for all control points at once
-        basis_values = np.array([comb(bezier_degree, i) * (t_values[max_error_index] ** i) * ((1 - t_values[max_error_index]) ** (bezier_degree - i)) for i in range(bezier_degree + 1)])
+        # Basis values for all control points at the worst sample
+        basis_values = basis[max_error_index]
 
         # Calculate error vector
-        error_vector = (points[t_values_to_fit][max_error_index] - curve_points[max_error_index])
+        error_vector = (target_points[max_error_index] - curve_points[max_error_index])
 
         # Vectorized adjustment calculation and update
         adjustment_vector = learning_rate * basis_values[:, np.newaxis] * error_vector
@@ -144,75 +321,1036 @@ def adaptive_jems_algorithm(points: np.ndarray, error_threshold: float=0.05, max
         # --------------------------------------------------
 
         curve = BezierCurve(control_points)
+    _record(stats, iterations=iteration, max_error=float(max_error), average_error=float(average_error), converged=False)
+    return curve, iteration
+
+def least_squares_jems_algorithm(points: np.ndarray, error_threshold: float=0.05, gauss_newton_steps: int=0, stats: 'StageStats'=None, parameterization: str='CHORD'):
+    """
+    Closed-form alternative to adaptive_jems_algorithm. The control points come
+    from one linear least-squares solve against the Bernstein basis matrix.
+
+    Each optional refinement step moves every sample's t by one Newton-Raphson
+    step toward its closest point on the curve and solves again, stopping early
+    once the max error is within `error_threshold`.
+    """
+    points = np.array(points, dtype=float)
+    bezier_degree = len(get_initial_control_points(points)) - 1
+    if bezier_degree < 1:
+        return None, 0
+
+    t_values, target_points = _fit_samples(points, parameterization)
+    basis = _fit_basis(bezier_degree, t_values, parameterization)
 
-    print(f"Adaptive JEMS did not converge within {max_iterations} iterations. Max error: {max_error:.4f}, Avg error: {average_error:.4f}")
+    def solve(basis):
+        control_points = np.linalg.lstsq(basis, target_points, rcond=None)[0]
+        return BezierCurve(control_points), np.linalg.norm(target_points - basis @ control_points, axis=1)
+
+    curve, distances = solve(basis)
+    iteration = 1
+
+    while iteration <= gauss_newton_steps and np.max(distances) > error_threshold:
+        new_t_values = _newton_parameters(curve.control_points, t_values, target_points)
+        new_curve, new_distances = solve(_uncached_basis(bezier_degree, new_t_values))
+        if np.sum(new_distances ** 2) >= np.sum(distances ** 2):
+            break  # The step did not reduce the squared error, keep the previous solve
+        curve, distances, t_values = new_curve, new_distances, new_t_values
+        iteration += 1
+
+    max_error = np.max(distances)
+    _record(stats, iterations=iteration, max_error=float(max_error), average_error=float(np.mean(distances)), converged=bool(max_error <= error_threshold))
     return curve, iteration
 
-def visvalingam_whyatt(points: np.ndarray, tolerance: float):
-    if len(points) < 3:
-        return np.array(points)
-
-    def triangle_area(p1, p2, p3):
-        return 0.5 * np.abs((p2[0] - p1[0]) * (p3[1] - p1[1]) - (p3[0] - p1[0]) * (p2[1] - p1[1]))
-
-    simplified_points = list(points)
-    areas = []
-    for i in range(1, len(simplified_points) - 1):
-        areas.append((triangle_area(simplified_points[i-1], simplified_points[i], simplified_points[i+1]), i))
-
-    while areas and min(areas)[0] < tolerance:
-        min_area, index_to_remove = min(areas)
-        del simplified_points[index_to_remove]
-        areas = []
-        if len(simplified_points) > 2:
-            for i in range(1, len(simplified_points) - 1):
-                areas.append((triangle_area(simplified_points[i-1], simplified_points[i], simplified_points[i+1]), i))
+class PiecewiseCubicCurve:
+    """A chain of cubic Bezier segments, each one joining two neighbouring keyframes."""
+    def __init__(self, segments: np.ndarray):
+        self.segments = np.array(segments, dtype=float)  # (num_segments, 4, dim)
+
+    def keyframes(self):
+        """
+        Returns the keyframe coordinates with their left and right handles.
+        Inner handles are the fitted control points, the outer handles of the
+        first and last keys mirror their inner ones.
+        """
+        segments = self.segments
+        co = np.concatenate([segments[:, 0], segments[-1:, 3]])
+        handle_left = np.concatenate([2 * segments[:1, 0] - segments[:1, 1], segments[:, 2]])
+        handle_right = np.concatenate([segments[:, 1], 2 * segments[-1:, 3] - segments[-1:, 2]])
+        return co, handle_left, handle_right
+
+    @classmethod
+    def from_keyframes(cls, co, handle_left, handle_right):
+        """Builds the chain that Blender would draw through keys with these handles."""
+        co = np.asarray(co, dtype=float)
+        return cls(np.stack([co[:-1], np.asarray(handle_right)[:-1], np.asarray(handle_left)[1:], co[1:]], axis=1))
+
+    def evaluate_multi(self, t_values):
+        """Evaluates the chain for t in [0, 1], each segment covering an equal share of t."""
+        t_values = np.clip(np.asarray(t_values, dtype=float), 0.0, 1.0) * len(self.segments)
+        index = np.minimum(t_values.astype(int), len(self.segments) - 1)
+        return _cubic_points(self.segments[index], t_values - index)
+
+def _cubic_basis(u):
+    mu = 1 - u
+    return np.stack([mu ** 3, 3 * u * mu ** 2, 3 * u ** 2 * mu, u ** 3], axis=-1)
+
+def _cubic_points(control_points, u):
+    # control_points is (4, dim) for one segment or (len(u), 4, dim) for one segment per u
+    basis = _cubic_basis(u)
+    if control_points.ndim == 2:
+        return basis @ control_points
+    return np.einsum('ij,ijk->ik', basis, control_points)
+
+def _normalize(vector):
+    length = np.linalg.norm(vector)
+    return vector / length if length > 1e-12 else vector
+
+def _generate_cubic(points, u, left_tangent, right_tangent):
+    """Least-squares handle lengths along fixed end tangents (Schneider's GenerateBezier)."""
+    first, last = points[0], points[-1]
+    basis = _cubic_basis(u)
+    a1 = basis[:, 1, np.newaxis] * left_tangent
+    a2 = basis[:, 2, np.newaxis] * right_tangent
+    rest = points - np.outer(basis[:, 0] + basis[:, 1], first) - np.outer(basis[:, 2] + basis[:, 3], last)
+
+    c00, c01, c11 = np.sum(a1 * a1), np.sum(a1 * a2), np.sum(a2 * a2)
+    x0, x1 = np.sum(a1 * rest), np.sum(a2 * rest)
+    det = c00 * c11 - c01 * c01
+    alpha_left = (x0 * c11 - x1 * c01) / det if det != 0 else 0.0
+    alpha_right = (c00 * x1 - c01 * x0) / det if det != 0 else 0.0
+
+    segment_length = np.linalg.norm(last - first)
+    epsilon = 1e-6 * segment_length
+    if alpha_left < epsilon or alpha_right < epsilon:
+        alpha_left = alpha_right = segment_length / 3
+
+    handle_left = left_tangent * alpha_left
+    handle_right = right_tangent * alpha_right
+
+    # Keep the handles inside the segment's frame range, otherwise Blender rescales them on evaluation
+    frame_span = last[0] - first[0]
+    if frame_span > 0:
+        if handle_left[0] > frame_span:
+            handle_left = handle_left * (frame_span / handle_left[0])
+        if -handle_right[0] > frame_span:
+            handle_right = handle_right * (frame_span / -handle_right[0])
+
+    return np.array([first, first + handle_left, last + handle_right, last])
+
+def _reparameterize(control_points, points, u):
+    """One Newton-Raphson step per sample towards its closest point on the cubic."""
+    d1 = 3 * np.diff(control_points, axis=0)
+    d2 = 2 * np.diff(d1, axis=0)
+    mu = 1 - u
+    q = _cubic_points(control_points, u)
+    q1 = np.outer(mu ** 2, d1[0]) + np.outer(2 * u * mu, d1[1]) + np.outer(u ** 2, d1[2])
+    q2 = np.outer(mu, d2[0]) + np.outer(u, d2[1])
+    diff = q - points
+    numerator = np.sum(diff * q1, axis=1)
+    denominator = np.sum(q1 * q1, axis=1) + np.sum(diff * q2, axis=1)
+    safe = np.abs(denominator) > 1e-12
+    u = u - np.where(safe, numerator / np.where(safe, denominator, 1.0), 0.0)
+    return np.clip(u, 0.0, 1.0)
+
+def _chord_length_parameters(points):
+    lengths = np.concatenate([[0.0], np.cumsum(np.linalg.norm(np.diff(points, axis=0), axis=1))])
+    return lengths / lengths[-1] if lengths[-1] > 0 else np.linspace(0, 1, len(points))
+
+def fit_piecewise_cubic(points: np.ndarray, error_threshold: float=0.05, max_reparameterizations: int=4, left_tangent=None, right_tangent=None, stats: 'StageStats'=None):
+    """
+    Fits a chain of cubic Bezier segments in the style of Schneider's algorithm.
+    A segment is split at its point of maximum error until every segment is
+    within `error_threshold`, so the cost is linear in the channel length.
+
+    Args:
+        points (np.ndarray): The (frame, value) points to fit.
+        error_threshold (float, optional): Maximum distance of any point from the fitted chain. Defaults to 0.05.
+        max_reparameterizations (int, optional): Newton reparameterization passes tried before splitting. Defaults to 4.
+        left_tangent, right_tangent (np.ndarray, optional): Unit tangents to pin at the first and last point.
+        stats (StageStats, optional): Receives the iterations, max error and average error.
+    """
+    points = np.array(points, dtype=float)
+    num_points = len(points)
+    if num_points < 2:
+        return None, 0
+
+    if left_tangent is None:
+        left_tangent = _normalize(points[1] - points[0])
+    if right_tangent is None:
+        right_tangent = _normalize(points[-2] - points[-1])
+
+    segments = []
+    errors = np.zeros(num_points)
+    iterations = 0
+    # Depth-first with the left half on top of the stack keeps the segments in order
+    stack = [(0, num_points - 1, np.asarray(left_tangent, dtype=float), np.asarray(right_tangent, dtype=float))]
+
+    while stack:
+        first, last, tangent_1, tangent_2 = stack.pop()
+        segment_points = points[first:last + 1]
+        iterations += 1
+
+        if last - first == 1:
+            distance = np.linalg.norm(points[last] - points[first]) / 3
+            segments.append(np.array([points[first], points[first] + tangent_1 * distance, points[last] + tangent_2 * distance, points[last]]))
+            continue
+
+        u = _chord_length_parameters(segment_points)
+        control_points = _generate_cubic(segment_points, u, tangent_1, tangent_2)
+        distances = np.linalg.norm(_cubic_points(control_points, u) - segment_points, axis=1)
+
+        if np.max(distances) > error_threshold and np.max(distances) < error_threshold * 4:
+            for _ in range(max_reparameterizations):
+                u = _reparameterize(control_points, segment_points, u)
+                control_points = _generate_cubic(segment_points, u, tangent_1, tangent_2)
+                distances = np.linalg.norm(_cubic_points(control_points, u) - segment_points, axis=1)
+                iterations += 1
+                if np.max(distances) <= error_threshold:
+                    break
+
+        if np.max(distances) <= error_threshold:
+            segments.append(control_points)
+            errors[first:last + 1] = np.maximum(errors[first:last + 1], distances)
+            continue
+
+        # Split at the worst interior point and fit both halves
+        split = first + 1 + int(np.argmax(distances[1:-1]))
+        center_tangent = _normalize(points[split - 1] - points[split + 1])
+        stack.append((split, last, -center_tangent, tangent_2))
+        stack.append((first, split, tangent_1, center_tangent))
+
+    _record(stats, iterations=iterations, max_error=float(np.max(errors)), average_error=float(np.mean(errors)), converged=True)
+    return PiecewiseCubicCurve(segments), iterations
+
+# --- Fast Path ---
+# Constant, linear and stepped channels need no fitting, a couple of keys with
+# LINEAR or CONSTANT interpolation reproduce them exactly within the error threshold.
+
+# A stepped channel needs at least this many keys per step on average
+MIN_STEP_LENGTH = 4
+FAST_PATH_KINDS = ('CONSTANT', 'LINEAR', 'STEPPED')
+
+class LinearKeys:
+    """Keys joined by straight lines, written with LINEAR interpolation."""
+    INTERPOLATION = 'LINEAR'
+
+    def __init__(self, co: np.ndarray):
+        self.co = np.array(co, dtype=float)
+
+    def keyframes(self):
+        return self.co, self.co.copy(), self.co.copy()
+
+    def evaluate_multi(self, t_values):
+        """Evaluates the keys for t in [0, 1] spanning their frame range."""
+        x = self.co[0, 0] + np.clip(np.asarray(t_values, dtype=float), 0.0, 1.0) * (self.co[-1, 0] - self.co[0, 0])
+        return np.column_stack([x, self.values_at(x)])
+
+    def values_at(self, x):
+        """Returns the (len(x), num_values) key values at frames x."""
+        return np.column_stack([np.interp(x, self.co[:, 0], values) for values in self.co[:, 1:].T])
+
+class ConstantKeys(LinearKeys):
+    """Keys that hold their value until the next key, written with CONSTANT interpolation."""
+    INTERPOLATION = 'CONSTANT'
+
+    def values_at(self, x):
+        index = np.searchsorted(self.co[:, 0], x, side='right') - 1
+        return self.co[np.maximum(index, 0), 1:]
+
+def classify_channel(points: np.ndarray, error_threshold: float):
+    """
+    Checks whether a channel is constant, linear or stepped within error_threshold,
+    in O(n). Returns (kind, curve) with kind 'CONSTANT', 'LINEAR' or 'STEPPED'
+    and a LinearKeys or ConstantKeys curve holding the keys to write, or
+    (None, None) when the channel needs the full pipeline.
+    Points with several value columns only qualify if every column does, with
+    shared keys, so each column gets error_threshold / sqrt(columns).
+    The tests run OUTLIER_CHUNK rows at a time in float64, like detect_outliers.
+    """
+    points = np.asarray(points)
+    if len(points) < 2:
+        return None, None
+    x, y = points[:, 0], points[:, 1:]
+    tolerance = error_threshold / np.sqrt(y.shape[1])
+    chunks = range(0, len(points), OUTLIER_CHUNK)
+
+    def rows(array, start, before=0):
+        """float64 rows of a chunk, with up to `before` rows of the previous chunk."""
+        return np.asarray(array[max(start - before, 0):start + OUTLIER_CHUNK], dtype=float)
+
+    low, high = y.min(axis=0).astype(float), y.max(axis=0).astype(float)
+    if np.all(high - low <= 2 * tolerance):
+        value = (high + low) / 2
+        return 'CONSTANT', ConstantKeys([np.r_[x[0], value], np.r_[x[-1], value]])
+
+    # Least-squares line, keyed at the first and last frame
+    x_mean = sum(np.sum(rows(x, start)) for start in chunks) / len(points)
+    y_mean = sum(np.sum(rows(y, start), axis=0) for start in chunks) / len(points)
+    denominator = sum(np.dot(rows(x, start) - x_mean, rows(x, start) - x_mean) for start in chunks)
+    if denominator > 0:
+        slope = sum((rows(x, start) - x_mean) @ (rows(y, start) - y_mean) for start in chunks) / denominator
+        if all(np.max(np.abs(rows(y, start) - (y_mean + np.outer(rows(x, start) - x_mean, slope)))) <= tolerance for start in chunks):
+            ends = np.asarray(x[[0, -1]], dtype=float)
+            return 'LINEAR', LinearKeys(np.column_stack([ends, y_mean + np.outer(ends - x_mean, slope)]))
+
+    # Steps: split at every jump, each plateau must stay within the threshold.
+    # A plateau may span chunks, its extremes are then merged with the previous chunk's
+    starts, step_high, step_low = [], [], []
+    step_count = 0
+    for start in chunks:
+        values = rows(y, start, before=1)
+        jumps = np.flatnonzero(np.any(np.abs(np.diff(values, axis=0)) > tolerance, axis=1))
+        if start == 0:
+            local = np.concatenate([[0], jumps + 1])
         else:
+            values = values[1:]
+            local = jumps
+        step_count += len(local)
+        if step_count * MIN_STEP_LENGTH > len(y):
+            return None, None
+        continued = not len(local) or local[0] != 0
+        segments = np.concatenate([[0], local]) if continued else local
+        high, low = np.maximum.reduceat(values, segments, axis=0), np.minimum.reduceat(values, segments, axis=0)
+        if continued:
+            step_high[-1][-1] = np.maximum(step_high[-1][-1], high[0])
+            step_low[-1][-1] = np.minimum(step_low[-1][-1], low[0])
+            high, low = high[1:], low[1:]
+        if len(high):
+            starts.append(start + local)
+            step_high.append(high)
+            step_low.append(low)
+    starts = np.concatenate(starts)
+    step_high, step_low = np.concatenate(step_high), np.concatenate(step_low)
+    if np.any(step_high - step_low > 2 * tolerance):
+        return None, None
+    co = np.column_stack([np.asarray(x[starts], dtype=float), (step_high + step_low) / 2])
+    if starts[-1] != len(y) - 1:
+        co = np.vstack([co, np.r_[x[-1], co[-1, 1:]]])  # Hold the last step to the end of the channel
+    return 'STEPPED', ConstantKeys(co)
+
+def normalize_quaternion_keys(co, handle_left, handle_right):
+    """
+    Scales the (w, x, y, z) value columns of quaternion keys back to unit length.
+    Each key's handles are scaled about the origin by the same factor, so they
+    keep their direction relative to the key.
+    """
+    scale = np.linalg.norm(co[:, 1:], axis=1, keepdims=True)
+    scale = np.where(scale > 1e-12, 1.0 / np.where(scale > 1e-12, scale, 1.0), 1.0)
+    co, handle_left, handle_right = (np.array(array, dtype=float) for array in (co, handle_left, handle_right))
+    co[:, 1:] *= scale
+    handle_left[:, 1:] *= scale
+    handle_right[:, 1:] *= scale
+    return co, handle_left, handle_right
+
+def keyframes_from_fit(curve, fitted_data: np.ndarray):
+    """
+    Returns keyframe coordinates and left/right handles for a pipeline result.
+    Piecewise fits use their fitted control points. Global fits place a key on
+    every fitted point with handles one third of the way to its neighbours.
+    """
+    if isinstance(curve, (PiecewiseCubicCurve, LinearKeys)):
+        return curve.keyframes()
+
+    co = np.asarray(fitted_data, dtype=float)
+    handle_left = co.copy()
+    handle_right = co.copy()
+    handle_left[1:] = co[:-1] + (co[1:] - co[:-1]) / 3
+    handle_right[:-1] = co[:-1] + (co[1:] - co[:-1]) / 3
+    return co, handle_left, handle_right
+
+def _triangle_area(x, y, i, j, k):
+    return 0.5 * abs((x[j] - x[i]) * (y[k] - y[i]) - (x[k] - x[i]) * (y[j] - y[i]))
+
+def _triangle_area_nd(columns, i, j, k):
+    # Gram determinant, |a|^2 |b|^2 - (a.b)^2 is the squared parallelogram area in any dimension
+    a = [column[j] - column[i] for column in columns]
+    b = [column[k] - column[i] for column in columns]
+    aa = sum(v * v for v in a)
+    bb = sum(v * v for v in b)
+    ab = sum(v * w for v, w in zip(a, b))
+    return 0.5 * max(aa * bb - ab * ab, 0.0) ** 0.5
+
+def _triangle_areas(points):
+    """Vectorized effective areas of every interior point of (frame, value...) points."""
+    a = points[1:-1] - points[:-2]
+    b = points[2:] - points[:-2]
+    if points.shape[1] == 2:
+        return 0.5 * np.abs(a[:, 0] * b[:, 1] - b[:, 0] * a[:, 1])
+    gram = np.sum(a * a, axis=1) * np.sum(b * b, axis=1) - np.sum(a * b, axis=1) ** 2
+    return 0.5 * np.sqrt(np.maximum(gram, 0.0))
+
+# Rows the reducers evaluate at a time, bounds their float64 temporaries
+REDUCER_CHUNK = 1 << 14
+# Low bits of a VW heap entry that hold the point index
+_INDEX_BITS = 32
+_DOUBLE = struct.Struct('<d')
+
+def _float_bits(value: float):
+    """The IEEE bits of a double. For non-negative doubles they sort like the doubles themselves."""
+    return int.from_bytes(_DOUBLE.pack(value), 'little')
+
+def _compact(typecode: str, count: int):
+    """
+    A zeroed array.array of `count` items and a numpy view of its memory. The array
+    stores 8 bytes per item where a list stores a pointer and a Python object, and
+    still hands out plain Python numbers one item at a time.
+    """
+    storage = array(typecode, bytes(count * array(typecode).itemsize))
+    return storage, np.frombuffer(storage, dtype=typecode)
+
+def _vw_effective_areas(points: np.ndarray, tolerance: float=np.inf, keep: np.ndarray=None):
+    """
+    Runs Visvalingam-Whyatt until every remaining area is at least `tolerance`
+    and returns the effective area of every point: the largest area removed so
+    far at the moment the point was removed, inf for points that were kept.
+    Effective areas only grow in removal order, so for any tolerance t <= `tolerance`
+    the points VW keeps are exactly those with an effective area of at least t.
+    Points with several value columns use the triangle area in that many dimensions.
+    With a `keep` mask only the points it selects are simplified, the others
+    get an effective area of -inf and are never kept.
+
+    Areas live in a lazy-deletion min-heap and the surviving points form a
+    linked list (prev/next index arrays), so each removal only recomputes the
+    two neighbouring areas. Runs in O(n log n). The working set is held in
+    compact arrays, and each heap entry is one int holding the bits of the
+    area above the point index, which orders like (area, index).
+    """
+    points = np.asarray(points)
+    num_points = len(points)
+    effective_bits, effective = _compact('Q', num_points)
+    effective = effective.view(float)
+    effective[:] = np.inf
+    indices = np.arange(num_points) if keep is None else np.flatnonzero(keep)
+    if keep is not None:
+        effective[~keep] = -np.inf
+    if len(indices) < 3 or not tolerance > 0:
+        return effective
+
+    # Neighbour updates are scalar, plain Python floats are much faster there
+    columns = []
+    for column in range(points.shape[1]):
+        storage, view = _compact('d', num_points)
+        view[:] = points[:, column]
+        columns.append(storage)
+    views = [np.frombuffer(column, dtype=float) for column in columns]
+    planar = len(columns) == 2
+    if planar:
+        x, y = columns
+
+    prev_idx, prev_view = _compact('q', num_points)
+    next_idx, next_view = _compact('q', num_points)
+    prev_view[indices[1:]] = indices[:-1]
+    next_view[indices[:-1]] = indices[1:]
+    removed = bytearray(num_points)
+    first, last = int(indices[0]), int(indices[-1])
+
+    area_bits, areas = _compact('Q', num_points)
+    areas = areas.view(float)
+    for start in range(1, len(indices) - 1, REDUCER_CHUNK):
+        rows = indices[start - 1:start + REDUCER_CHUNK + 1]
+        areas[rows[1:-1]] = _triangle_areas(np.column_stack([view[rows] for view in views]))
+    del indices, prev_view, next_view, views, areas
+
+    # (area, index) ordering breaks ties on the leftmost point, same as a linear min() scan
+    heap = []
+    i = next_idx[first]
+    while i != last:
+        heap.append((area_bits[i] << _INDEX_BITS) | i)
+        i = next_idx[i]
+    heapq.heapify(heap)
+    index_mask = (1 << _INDEX_BITS) - 1
+    tolerance_bits = _float_bits(tolerance)
+    largest = 0
+
+    while heap:
+        entry = heap[0]
+        i, bits = entry & index_mask, entry >> _INDEX_BITS
+        if removed[i] or bits != area_bits[i]:
+            heapq.heappop(heap)  # Stale entry
+            continue
+        if bits >= tolerance_bits:
+            break
+        heapq.heappop(heap)
+
+        removed[i] = 1
+        largest = max(largest, bits)
+        effective_bits[i] = largest
+        left, right = prev_idx[i], next_idx[i]
+        next_idx[left] = right
+        prev_idx[right] = left
+
+        for j in (left, right):
+            if j != first and j != last:
+                if planar:
+                    area = _triangle_area(x, y, prev_idx[j], j, next_idx[j])
+                else:
+                    area = _triangle_area_nd(columns, prev_idx[j], j, next_idx[j])
+                bits = area_bits[j] = _float_bits(area)
+                heapq.heappush(heap, (bits << _INDEX_BITS) | j)
+
+    return effective
+
+def visvalingam_whyatt(points: np.ndarray, tolerance: float, return_indices: bool=False):
+    """
+    Removes the point with the smallest effective triangle area until every
+    remaining area is at least `tolerance`.
+
+    Args:
+        points (np.ndarray): The (frame, value) points to simplify.
+        tolerance (float): Minimum triangle area a point needs to be kept.
+        return_indices (bool, optional): Return the indices of the retained points
+            instead of a copy of them. Defaults to False.
+    """
+    points = np.asarray(points)
+    keep = np.isposinf(_vw_effective_areas(points, tolerance))
+    if return_indices:
+        return np.flatnonzero(keep)
+    return points[keep]
+
+# --- Reducers ---
+# Every reducer takes (points, tolerance, keep=None) and returns the sorted indices
+# of the points it keeps, always including both end points. A boolean `keep` mask
+# limits it to the points the mask selects, so the outlier stage can hand over
+# a mask instead of a copy of the cleaned points. Add an entry to REDUCERS to
+# make a new strategy available to the pipeline.
+
+def _selected(points, keep=None):
+    """Indices of the points a keep mask selects, all of them without a mask."""
+    return np.arange(len(points)) if keep is None else np.flatnonzero(keep)
+
+def _line_distances(points, start, end):
+    """Perpendicular distances of points to the line through start and end, in all columns."""
+    offsets = points - start
+    direction = end - start
+    length_squared = direction @ direction
+    if length_squared == 0:
+        return np.linalg.norm(offsets, axis=1)
+    projections = (offsets @ direction) / length_squared
+    return np.linalg.norm(offsets - projections[:, np.newaxis] * direction, axis=1)
+
+def _farthest(points, start, end, keep=None):
+    """(index, distance) of the selected point between start and end farthest from their line, -1.0 if there is none."""
+    first, last = np.asarray(points[start], dtype=float), np.asarray(points[end], dtype=float)
+    farthest, distance = start, -1.0
+    for low in range(start + 1, end, REDUCER_CHUNK):
+        high = min(low + REDUCER_CHUNK, end)
+        distances = _line_distances(np.asarray(points[low:high], dtype=float), first, last)
+        if keep is not None:
+            distances[~keep[low:high]] = -1.0
+        best = int(np.argmax(distances))
+        if distances[best] > distance:
+            farthest, distance = low + best, float(distances[best])
+    return farthest, distance
+
+def ramer_douglas_peucker(points: np.ndarray, tolerance: float, keep: np.ndarray=None):
+    """
+    Ramer-Douglas-Peucker with an explicit stack instead of recursion. Each
+    segment's distances are computed in vectorized passes of REDUCER_CHUNK rows,
+    and the farthest point splits the segment while it is more than `tolerance`
+    from the line.
+
+    Args:
+        points (np.ndarray): The (frame, value, ...) points to reduce.
+        tolerance (float): Largest distance of a dropped point to the line between the kept points around it.
+        keep (np.ndarray, optional): Boolean mask of the points to reduce. Defaults to None, all of them.
+    """
+    points = np.asarray(points)
+    selected = _selected(points, keep)
+    if len(selected) < 3:
+        return selected
+    kept = np.zeros(len(points), dtype=bool)
+    kept[selected[[0, -1]]] = True
+    stack = [(int(selected[0]), int(selected[-1]))]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        split, distance = _farthest(points, start, end, keep)
+        if distance > tolerance:
+            kept[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return np.flatnonzero(kept)
+
+def uniform_stride(points: np.ndarray, tolerance: float, keep: np.ndarray=None):
+    """
+    Keeps every k-th point (and the last one) for the largest power of two k whose
+    straight lines stay within `tolerance` of every point's values. A few vectorized
+    passes instead of a per-point search, meant for previews.
+    """
+    selected = _selected(points, keep)
+    points = np.asarray(np.asarray(points)[selected], dtype=float)
+    count = len(points)
+    stride = 1 << max(int(count - 1).bit_length() - 1, 0)
+    while stride > 1:
+        indices = np.union1d(np.arange(0, count, stride), [count - 1])
+        interpolated = np.column_stack([np.interp(points[:, 0], points[indices, 0], points[indices, column])
+                                        for column in range(1, points.shape[1])])
+        if np.max(np.linalg.norm(interpolated - points[:, 1:], axis=1)) <= tolerance:
+            return selected[indices]
+        stride //= 2
+    return selected
+
+def _visvalingam_whyatt_indices(points, tolerance, keep=None):
+    return np.flatnonzero(np.isposinf(_vw_effective_areas(points, tolerance, keep)))
+
+REDUCERS = {
+    'VW': _visvalingam_whyatt_indices,
+    'RDP': ramer_douglas_peucker,
+    'STRIDE': uniform_stride,
+}
+
+def reduce_points(points: np.ndarray, tolerance: float, reducer: str='VW'):
+    """Returns the points kept by the named reducer, see REDUCERS."""
+    points = np.asarray(points)
+    return points[REDUCERS[reducer](points, tolerance)]
+
+def channel_rows(points: np.ndarray, rows=None):
+    """
+    Returns the selected rows (indices or a boolean mask, all rows by default) as a
+    float64 array. The stages hand masks and indices to each other, only the
+    points that go into a fit are copied out of the channel, here.
+    """
+    points = np.asarray(points)
+    return np.asarray(points if rows is None else points[rows], dtype=float)
+
+# --- Keyframe Budgets ---
+BUDGET_SEARCH_STEPS = 12
+
+def visvalingam_whyatt_ranks(points: np.ndarray, keep: np.ndarray=None):
+    """
+    Runs Visvalingam-Whyatt to the end and returns the effective area of every
+    point (inf for the two end points, -inf for points outside `keep`).
+    visvalingam_whyatt(points, t) keeps exactly the points whose effective area
+    is at least t, so once the ranks are known any tolerance can be tried with
+    a single comparison.
+    """
+    return _vw_effective_areas(np.asarray(points), keep=keep)
+
+def budget_tolerance(ranks: np.ndarray, max_points: int):
+    """Returns the smallest VW tolerance that keeps at most max_points points (never fewer than the two ends)."""
+    ranks = np.sort(ranks)
+    max_points = max(2, int(max_points))
+    if max_points >= len(ranks):
+        return 0.0
+    return float(np.nextafter(ranks[len(ranks) - max_points - 1], np.inf))
+
+def key_budget(num_points: int, target_keys: int=0, target_ratio: float=0.0):
+    """Returns the key budget for a channel of num_points keys, 0 if neither target is set."""
+    budgets = []
+    if target_keys > 0:
+        budgets.append(int(target_keys))
+    if target_ratio > 0:
+        budgets.append(int(np.ceil(target_ratio * num_points)))
+    return max(2, min(budgets)) if budgets else 0
+
+def distribute_key_budget(total_keys: int, lengths):
+    """Splits an action-wide key budget over its channels in proportion to their key counts."""
+    lengths = np.asarray(lengths, dtype=float)
+    if not len(lengths) or lengths.sum() == 0:
+        return [0] * len(lengths)
+    shares = np.floor(total_keys * lengths / lengths.sum()).astype(int)
+    return [max(2, int(share)) for share in shares]
+
+def distribute_group_budget(total_keys: int, lengths, sizes):
+    """
+    Splits an action-wide key budget over groups of jointly fitted fcurves. The shared keys
+    of a group are written once per fcurve, so each group gets its share of the fcurve keys
+    divided by its size, and never fewer than 2 keys (0 would mean no budget at all).
+
+    Args:
+        total_keys (int): The action-wide key budget.
+        lengths (iterable): The number of keys of each group.
+        sizes (iterable): The number of fcurves of each group.
+    """
+    sizes = list(sizes)
+    budgets = distribute_key_budget(total_keys, [length * size for length, size in zip(lengths, sizes)])
+    return [max(2, budget // size) for budget, size in zip(budgets, sizes)]
+
+def piecewise_key_counter(error_threshold: float):
+    """Returns a count_keys function for reduce_to_budget that counts the keys of a piecewise fit."""
+    def count_keys(points):
+        curve, _ = fit_piecewise_cubic(points, error_threshold)
+        return len(curve.keyframes()[0]) if curve is not None else 0
+    return count_keys
+
+def reduce_to_budget(points: np.ndarray, max_keys: int, count_keys=None, search_steps: int=BUDGET_SEARCH_STEPS, keep: np.ndarray=None):
+    """
+    Returns the indices of the points to fit so that the output has at most max_keys keys.
+
+    Points are dropped in Visvalingam-Whyatt order, so the result is the
+    highest-fidelity VW reduction within the budget. If the fit itself removes
+    keys (count_keys returns fewer keys than points), the number of kept points
+    is binary-searched upwards so the fit gets as much of the data as the budget allows.
+
+    Args:
+        points (np.ndarray): The (frame, value) points to reduce.
+        max_keys (int): Maximum number of output keys.
+        count_keys (callable, optional): Returns the number of keys the fit writes for
+            a set of points. Defaults to None, one key per point.
+        search_steps (int, optional): Maximum number of fits tried. Defaults to BUDGET_SEARCH_STEPS.
+        keep (np.ndarray, optional): Boolean mask of the points to reduce. Defaults to None, all of them.
+    """
+    points = np.asarray(points)
+    ranks = visvalingam_whyatt_ranks(points, keep)
+    selected = _selected(points, keep)
+
+    def kept(num_points):
+        return np.flatnonzero(ranks >= budget_tolerance(ranks, num_points))
+
+    best = kept(max_keys)
+    if count_keys is None or len(best) >= len(selected):
+        return best
+    if count_keys(channel_rows(points, selected)) <= max_keys:
+        return selected  # The fit alone stays within the budget
+
+    # The fit writes at most one key per point, so max_keys points always fit
+    low, high = len(best), len(selected)
+    for _ in range(search_steps):
+        if low >= high:
             break
+        middle = (low + high + 1) // 2
+        indices = kept(middle)
+        if count_keys(channel_rows(points, indices)) <= max_keys:
+            best, low = indices, middle
+        else:
+            high = middle - 1
+    return best
+
+def fit_curve(points: np.ndarray, error_threshold: float=0.05, fit_mode: str='GLOBAL', solver: str='GRADIENT', max_iterations: int=100, initial_learning_rate: float=0.2, gauss_newton_steps: int=0, left_tangent=None, right_tangent=None, stats: 'StageStats'=None, parameterization: str='CHORD'):
+    """
+    Fits points with the selected fit mode and solver. Returns (curve, iterations).
+    The end tangents are only used by the 'PIECEWISE' fit mode, which always
+    uses chord-length parameters, the parameterization only by the global solvers.
+    """
+    if fit_mode == 'PIECEWISE':
+        return fit_piecewise_cubic(points, error_threshold, left_tangent=left_tangent, right_tangent=right_tangent, stats=stats)
+    if solver == 'LEAST_SQUARES':
+        return least_squares_jems_algorithm(points, error_threshold, gauss_newton_steps, stats=stats, parameterization=parameterization)
+    return adaptive_jems_algorithm(points, error_threshold, max_iterations, initial_learning_rate, stats=stats, parameterization=parameterization)
+
+# --- Instrumentation ---
+class StageStats:
+    """Timing and counters of one pipeline stage ('outliers', 'reduction' or 'fit')."""
+    def __init__(self, name: str, points_in: int=0):
+        self.name = name
+        self.time = 0.0
+        self.iterations = 0
+        self.points_in = points_in
+        self.points_out = 0
+        self.outliers_removed = 0
+        self.max_error = None
+        self.average_error = None
+        self.converged = None
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, values: dict):
+        stats = cls(values['name'])
+        stats.__dict__.update(values)
+        return stats
+
+class PipelineResult:
+    """
+    Outcome of mocap_cleaning_pipeline for one channel: the fitted curve, the
+    points it was fitted to and the statistics of every stage that ran.
+    `curve` is None when the channel could not be fitted, `error` then says why.
+    `fallback` says why the channel was simplified on its own in this process
+    when it was meant for a batch or a worker pool.
+    """
+    def __init__(self, points_in: int=0):
+        self.curve = None
+        self.iterations = 0
+        self.data = None
+        self.solver = None
+        self.error = None
+        self.fallback = None
+        self.points_in = points_in
+        self.stages = {}
+
+    def keyframes(self):
+        """Returns (co, handle_left, handle_right) of the keys to write."""
+        return keyframes_from_fit(self.curve, self.data)
+
+    @property
+    def points_out(self):
+        stage = self.stages.get('fit')
+        return stage.points_out if stage else 0
+
+    @property
+    def time(self):
+        return sum(stage.time for stage in self.stages.values())
+
+    @property
+    def outliers_removed(self):
+        stage = self.stages.get('outliers')
+        return stage.outliers_removed if stage else 0
 
-    return np.array(simplified_points)
+    @property
+    def max_error(self):
+        stage = self.stages.get('fit')
+        return stage.max_error if stage and stage.max_error is not None else 0.0
 
-def mocap_cleaning_pipeline(mocap_data: np.ndarray, vw_tolerance:float=None, error_threshold:float=0.05, max_iterations:int=100, initial_learning_rate:float=0.2, outlier_threshold:float=3, use_outlier_detection:bool=True):
+    @property
+    def average_error(self):
+        stage = self.stages.get('fit')
+        return stage.average_error if stage and stage.average_error is not None else 0.0
+
+    def to_dict(self):
+        """Everything except the curve and data arrays, as plain JSON-friendly values."""
+        return dict(
+            iterations=self.iterations,
+            solver=self.solver,
+            error=self.error,
+            points_in=self.points_in,
+            stages=[stage.to_dict() for stage in self.stages.values()],
+        )
+
+    @classmethod
+    def from_dict(cls, values: dict, curve=None, data=None):
+        result = cls(values['points_in'])
+        result.curve = curve
+        result.data = data
+        result.iterations = values['iterations']
+        result.solver = values['solver']
+        result.error = values['error']
+        result.stages = {stage['name']: StageStats.from_dict(stage) for stage in values['stages']}
+        return result
+
+class ActionStats:
+    """Aggregates the PipelineResults of every fcurve in a run."""
+    # Number of slowest channels kept for the report
+    SLOWEST_COUNT = 5
+
+    def __init__(self):
+        self.fcurves = 0
+        self.fitted_fcurves = 0
+        self.failed_fcurves = 0
+        self.cached_fcurves = 0
+        self.fast_path_fcurves = 0
+        self.duplicate_fcurves = 0
+        self.fallback_fcurves = 0
+        self.keys_in = 0
+        self.keys_out = 0
+        self.outliers_removed = 0
+        self.total_iterations = 0
+        self.max_error = 0.0
+        self.stage_times = {}
+        self.slowest = []  # (seconds, channel name), slowest first
+
+    @property
+    def keys_removed(self):
+        return self.keys_in - self.keys_out
+
+    @property
+    def time(self):
+        """Seconds spent fitting this run, cached and duplicate fcurves excluded."""
+        return sum(self.stage_times.values())
+
+    def add(self, result: PipelineResult, channel: str="", cached: bool=False, duplicate: bool=False, fcurves: int=1):
+        """
+        Adds the result of one fcurve, or of `fcurves` fcurves fitted jointly with shared keys.
+        Duplicates reuse the result of identical fcurves in the same run.
+        """
+        self.fcurves += fcurves
+        self.keys_in += result.points_in * fcurves
+        if cached:
+            self.cached_fcurves += fcurves
+        if duplicate:
+            self.duplicate_fcurves += fcurves
+        if result.fallback and not (cached or duplicate):
+            self.fallback_fcurves += fcurves
+        if result.curve is None:
+            self.failed_fcurves += fcurves
+            self.keys_out += result.points_in * fcurves
+            return
+
+        self.fitted_fcurves += fcurves
+        if result.solver in FAST_PATH_KINDS:
+            self.fast_path_fcurves += fcurves
+        self.keys_out += result.points_out * fcurves
+        self.outliers_removed += result.outliers_removed
+        self.total_iterations += result.iterations
+        self.max_error = max(self.max_error, result.max_error)
+
+        # Cached and duplicate results cost nothing this run
+        if not (cached or duplicate):
+            for name, stage in result.stages.items():
+                self.stage_times[name] = self.stage_times.get(name, 0.0) + stage.time
+            self.slowest.append((result.time, channel))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[self.SLOWEST_COUNT:]
+
+    def summary(self):
+        summary = (f"{self.fitted_fcurves} fcurves, {self.keys_in} -> {self.keys_out} keys, "
+                   f"{self.outliers_removed} outliers, {self.total_iterations} iterations, max error {self.max_error:.4f}")
+        if self.stage_times:
+            summary += ", " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.stage_times.items())
+        if self.fast_path_fcurves:
+            summary += f", {self.fast_path_fcurves} constant/linear/stepped"
+        if self.duplicate_fcurves:
+            summary += f", {self.duplicate_fcurves} duplicates"
+        if self.fallback_fcurves:
+            summary += f", {self.fallback_fcurves} simplified one by one"
+        if self.failed_fcurves:
+            summary += f", {self.failed_fcurves} failed"
+        return summary
+
+def classify_stage(mocap_data: np.ndarray, error_threshold: float):
+    """Runs classify_channel as a pipeline stage. Returns ((kind, curve), StageStats)."""
+    stage = StageStats('fit', len(mocap_data))
+    kind, curve = classify_channel(mocap_data, error_threshold)
+    if curve is not None:
+        errors = np.linalg.norm(curve.values_at(mocap_data[:, 0]) - mocap_data[:, 1:], axis=1)
+        stage.points_out = len(curve.co)
+        stage.max_error = float(errors.max())
+        stage.average_error = float(errors.mean())
+        stage.converged = True
+    return (kind, curve), stage
+
+def reduction_stage(points: np.ndarray, vw_tolerance: float, budget: int, fit_mode: str, error_threshold: float, reducer: str='VW', keep: np.ndarray=None):
+    """
+    Reduces the points a keep mask selects (all of them by default) to a key budget,
+    or with the tolerance and one of the REDUCERS. Budgets always drop points in VW
+    order. Returns (indices of the kept points, StageStats).
+    """
+    stage = StageStats('reduction', len(points) if keep is None else int(np.count_nonzero(keep)))
+    if budget:
+        count_keys = piecewise_key_counter(error_threshold) if fit_mode == 'PIECEWISE' else None
+        indices = reduce_to_budget(points, budget, count_keys, keep=keep)
+    else:
+        indices = REDUCERS[reducer](points, vw_tolerance, keep)
+    stage.points_out = len(indices)
+    return indices, stage
+
+def mocap_cleaning_pipeline(mocap_data: np.ndarray, vw_tolerance:float=None, error_threshold:float=0.05, max_iterations:int=100, initial_learning_rate:float=0.2, outlier_threshold:float=3, use_outlier_detection:bool=True, outlier_method:str='NEIGHBOR', outlier_window:int=7, solver:str='GRADIENT', gauss_newton_steps:int=0, fit_mode:str='GLOBAL', target_keys:int=0, target_ratio:float=0.0, use_fast_path:bool=True, parameterization:str='CHORD', reducer:str='VW', left_tangent=None, right_tangent=None, on_stage=None, stage_cache=None):
     """
     A pipeline for cleaning mocap data using outlier detection and Bezier curve fitting.
 
+    The stages pass a mask of the points that survived outlier detection and the
+    indices the reducer kept instead of copies of the points. Outlier detection
+    and the reducers read the channel in float64 chunks, only the points that
+    go into the fit are copied out.
+
     Args:
-        mocap_data (np.ndarray): The raw mocap data points.
-        vw_tolerance (float, optional): Tolerance for Visvalingam-Whyatt simplification. Defaults to None (no simplification).
+        mocap_data (np.ndarray or ChannelData): The raw mocap data points.
+        vw_tolerance (float, optional): Tolerance of the reducer, an area for 'VW' and a distance for 'RDP' and 'STRIDE'. Defaults to None (no simplification).
         error_threshold (float, optional): Error threshold for JEMS convergence. Defaults to 0.05.
         max_iterations (int, optional): Maximum iterations for JEMS. Defaults to 100.
         learning_rate (float, optional): Learning rate for JEMS. Defaults to 0.2.
         outlier_threshold (float, optional): Threshold for outlier detection. Defaults to 3.
         use_outlier_detection (bool, optional): Enable or disable outlier detection. Defaults to True.
+        outlier_method (str, optional): 'NEIGHBOR' or 'HAMPEL', see detect_outliers. Defaults to 'NEIGHBOR'.
+        outlier_window (int, optional): Window size of the 'HAMPEL' filter. Defaults to 7.
+        solver (str, optional): 'GRADIENT' for the iterative JEMS loop or 'LEAST_SQUARES' for the closed-form solve. Defaults to 'GRADIENT'.
+        gauss_newton_steps (int, optional): Gauss-Newton refinement steps for the 'LEAST_SQUARES' solver. Defaults to 0.
+        fit_mode (str, optional): 'GLOBAL' fits one Bezier curve over the whole channel, 'PIECEWISE' fits a chain of cubic segments. Defaults to 'GLOBAL'.
+        target_keys (int, optional): Maximum number of output keys. Replaces vw_tolerance with the tolerance that meets the budget. Defaults to 0 (no budget).
+        target_ratio (float, optional): Maximum output keys as a fraction of the input keys, combined with target_keys if both are set. Defaults to 0.0 (no budget).
+        use_fast_path (bool, optional): Write constant, linear and stepped channels directly, see classify_channel. Defaults to True.
+        parameterization (str, optional): 'CHORD', 'TIME' or 'UNIFORM' curve parameters for the global solvers, see _fit_samples. Defaults to 'CHORD'.
+        reducer (str, optional): 'VW', 'RDP' or 'STRIDE', the reducer applied with vw_tolerance, see REDUCERS. Defaults to 'VW'.
+        left_tangent, right_tangent (np.ndarray, optional): Unit tangents the 'PIECEWISE' fit mode is pinned to at
+            the first and last point, pointing into the curve. Defaults to None (estimated from the points).
+        on_stage (callable, optional): Profiling hook, called with the StageStats of each stage as soon as it finishes.
+        stage_cache (StageCache, optional): Memo of stage outputs keyed on each stage's own inputs and settings,
+            so changing a setting only re-runs the stages from the first one that uses it. Defaults to None.
 
     Returns:
-        tuple: The fitted Bezier curve object and the number of iterations, or None and 0 if fitting fails.
+        PipelineResult: The fitted curve, the points it was fitted to and the statistics of every stage.
+            Its curve is None if fitting fails, with the reason in its error.
     """
+    mocap_data = mocap_data.points if isinstance(mocap_data, ChannelData) else np.asarray(mocap_data)
+    result = PipelineResult(points_in=len(mocap_data))
+    data_key = stage_cache.data_key(mocap_data) if stage_cache is not None else None
+
+    def run_stage(key, compute):
+        """Runs compute() -> (output, StageStats), or takes both from the stage cache."""
+        start_time = time.perf_counter()
+        entry = stage_cache.get(key) if stage_cache is not None else None
+        if entry is not None:
+            output, values = entry
+            stage = StageStats.from_dict(values)
+        else:
+            output, stage = compute()
+            if stage_cache is not None:
+                stage_cache.put(key, (output, stage.to_dict()))
+        stage.time = time.perf_counter() - start_time
+        return output, stage
+
+    def finish(stage):
+        result.stages[stage.name] = stage
+        if on_stage is not None:
+            on_stage(stage)
+
+    def remove_outliers():
+        stage = StageStats('outliers', len(mocap_data))
+        keep = ~detect_outliers(mocap_data, threshold=outlier_threshold, method=outlier_method, window=outlier_window)
+        stage.points_out = int(np.count_nonzero(keep))
+        stage.outliers_removed = len(mocap_data) - stage.points_out
+        return keep, stage
+
+    def fit(simplified_data):
+        stage = StageStats('fit', len(simplified_data))
+        curve, _ = fit_curve(simplified_data, error_threshold, fit_mode, solver, max_iterations, initial_learning_rate, gauss_newton_steps, left_tangent=left_tangent, right_tangent=right_tangent, stats=stage, parameterization=parameterization)
+        if curve is not None:
+            stage.points_out = len(keyframes_from_fit(curve, simplified_data)[0])
+        return curve, stage
+
     try:
-        # 1. Detect and potentially remove outliers
+        # 0. Constant, linear and stepped channels skip the rest of the pipeline, unless they have more keys than the budget
+        budget = key_budget(len(mocap_data), target_keys, target_ratio)
+        if use_fast_path:
+            (kind, curve), stage = run_stage(('classify', data_key, error_threshold), lambda: classify_stage(mocap_data, error_threshold))
+            if curve is not None and (not budget or len(curve.co) <= budget):
+                finish(stage)
+                result.curve = curve
+                result.data = curve.co
+                result.solver = kind
+                return result
+
+        # 1. Detect outliers, the mask of the points that stay replaces a cleaned copy
+        stage_key = (data_key, use_outlier_detection)
+        keep = None
         if use_outlier_detection:
-            outlier_indices = detect_outliers(mocap_data, threshold=outlier_threshold)
-            cleaned_data = np.delete(mocap_data, outlier_indices, axis=0)
-            print(f"Detected {outlier_indices.sum()} outliers.")
-        else:
-            cleaned_data = mocap_data
-
-        if len(cleaned_data) < 2:
-            print("Not enough points after outlier removal to fit a Bezier curve of this degree.")
-            return None, 0
-
-        # 2. Apply Visvalingam-Whyatt simplification if a tolerance is provided
-        if vw_tolerance is not None:
-            simplified_data = visvalingam_whyatt(cleaned_data, vw_tolerance)
-            print(f"Simplified data from {len(cleaned_data)} to {len(simplified_data)} points using Visvalingam-Whyatt.")
-            if len(simplified_data) < 2:
-                print("Not enough points after simplification to fit a Bezier curve of this degree.")
-                return None, 0
-            curve, iterations = adaptive_jems_algorithm(simplified_data, error_threshold, max_iterations, initial_learning_rate)
-            return curve, iterations, simplified_data
+            stage_key += (outlier_threshold, outlier_method, outlier_window)
+            keep, stage = run_stage(('outliers',) + stage_key, remove_outliers)
+            finish(stage)
+            if stage.outliers_removed == 0:
+                keep = None
+
+        if (len(mocap_data) if keep is None else stage.points_out) < 2:
+            result.error = "Not enough points after outlier removal to fit a Bezier curve."
+            return result
+
+        # 2. Apply the reducer if a tolerance or a key budget is provided
+        if budget or vw_tolerance is not None:
+            # A piecewise budget search runs fits, so it depends on the fit settings as well
+            stage_key += (budget, vw_tolerance, reducer) if not (budget and fit_mode == 'PIECEWISE') else (budget, fit_mode, error_threshold)
+            indices, stage = run_stage(('reduction',) + stage_key, lambda: reduction_stage(mocap_data, vw_tolerance, budget, fit_mode, error_threshold, reducer, keep))
+            finish(stage)
+            if len(indices) < 2:
+                result.error = "Not enough points after simplification to fit a Bezier curve."
+                return result
+            simplified_data = channel_rows(mocap_data, indices)
         else:
-            curve, iterations = adaptive_jems_algorithm(cleaned_data, error_threshold, max_iterations, initial_learning_rate)
-            return curve, iterations, cleaned_data
+            simplified_data = channel_rows(mocap_data, keep)
+
+        # 3. Fit the Bezier curve with the selected solver
+        stage_key += (error_threshold, fit_mode, solver, max_iterations, initial_learning_rate, gauss_newton_steps, parameterization)
+        if fit_mode == 'PIECEWISE' and (left_tangent is not None or right_tangent is not None):
+            stage_key += tuple(None if tangent is None else tuple(np.asarray(tangent).tolist()) for tangent in (left_tangent, right_tangent))
+        curve, stage = run_stage(('fit',) + stage_key, lambda: fit(simplified_data))
+        finish(stage)
+
+        result.curve = curve
+        result.iterations = stage.iterations
+        result.data = simplified_data
+        result.solver = 'PIECEWISE' if fit_mode == 'PIECEWISE' else solver
+        if curve is None:
+            result.error = "Not enough points to fit a Bezier curve."
+        return result
     except Exception as e:
-        print(f"An error occurred in the mocap_cleaning_pipeline: {e}")
-        return None, 0, None
\ No newline at end of file
+        result.error = f"An error occurred in the mocap_cleaning_pipeline: {e}"
+        return result
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+Compares simplifying many short channels one by one against simplify_batch, without Blender.
+
+    python benchmarks/bench_batched.py --channels 500 --lengths 40 120 250
+
+Each case builds a facial- or finger-rig-like set of short channels from the
+synthetic generators, with a different seed and a slightly different length
+per channel. It reports both times and the largest difference in max error
+between the two paths.
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+utils = importlib.import_module("REJEMS-Alter.utils")
+batched = importlib.import_module("REJEMS-Alter.batched")
+
+from synthetic import GENERATORS
+
+def short_channels(count, length, seed):
+    rng = np.random.default_rng(seed)
+    generators = list(GENERATORS.values())
+    return [generators[i % len(generators)](int(length * rng.uniform(0.8, 1.0)), seed=seed + i) for i in range(count)]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare per-channel and batched simplification of short channels.")
+    parser.add_argument("--channels", type=int, default=300)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[40, 120, 250])
+    parser.add_argument("--solvers", nargs="+", choices=['GRADIENT', 'LEAST_SQUARES'], default=['GRADIENT', 'LEAST_SQUARES'])
+    parser.add_argument("--fit-mode", choices=['GLOBAL', 'PIECEWISE'], default='GLOBAL')
+    parser.add_argument("--vw-tolerance", type=float, default=0.05)
+    parser.add_argument("--error-threshold", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    for length in args.lengths:
+        channels = short_channels(args.channels, length, args.seed)
+        for solver in args.solvers:
+            kwargs = dict(vw_tolerance=args.vw_tolerance, error_threshold=args.error_threshold, solver=solver, fit_mode=args.fit_mode)
+
+            start_time = time.perf_counter()
+            single = [utils.mocap_cleaning_pipeline(channel, **kwargs) for channel in channels]
+            single_time = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            batch = batched.simplify_batch(channels, **kwargs)
+            batch_time = time.perf_counter() - start_time
+
+            difference = max(abs(a.max_error - b.max_error) for a, b in zip(single, batch))
+            print(f"{args.channels} x {length} keys, {solver}: one by one {single_time * 1000:.0f}ms, "
+                  f"batched {batch_time * 1000:.0f}ms ({single_time / batch_time:.1f}x), max error difference {difference:.2g}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
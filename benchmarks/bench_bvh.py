@@ -0,0 +1,91 @@
+"""
+Compares the streaming BVH reader with parsing the MOTION block into one dense array.
+
+    python benchmarks/bench_bvh.py --frames 10000 100000 --joints 60
+
+Each row reports the read time and the peak Python heap memory (tracemalloc,
+numpy arrays included, the memory-mapped file excluded) of both readers, and
+with --simplify the time and peak memory of reading every channel from the map
+and simplifying it, as the BVH import does. The dense reader is np.loadtxt into float64, as a
+whole-file parse would do.
+"""
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+bvh = importlib.import_module("REJEMS-Alter.bvh")
+utils = importlib.import_module("REJEMS-Alter.utils")
+
+from synthetic import write_bvh
+
+def measure(function):
+    """Runs function() and returns (result, seconds, peak MB)."""
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start_time
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return result, seconds, peak
+
+def dense_read(path):
+    with open(path) as f:
+        for line in f:
+            if line.strip() == 'MOTION':
+                break
+        f.readline()
+        f.readline()
+        return np.loadtxt(f, ndmin=2)
+
+def simplify_all(motion, kwargs):
+    keys = 0
+    for _, data in motion.pose_channels():
+        result = utils.mocap_cleaning_pipeline(data, **kwargs)
+        keys += result.points_out
+    return keys
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the streaming BVH reader with a dense parse.")
+    parser.add_argument("--frames", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--joints", type=int, default=60)
+    parser.add_argument("--vw-tolerance", type=float, default=0.05)
+    parser.add_argument("--error-threshold", type=float, default=0.05)
+    parser.add_argument("--simplify", action="store_true", help="Also simplify every channel read from the map")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    kwargs = dict(vw_tolerance=args.vw_tolerance, error_threshold=args.error_threshold, fit_mode='PIECEWISE')
+    print(f"{'take':<22} {'file MB':>8} {'dense s':>8} {'dense MB':>9} {'stream s':>9} {'stream MB':>10} {'simplify s':>11} {'simplify MB':>12} {'keys':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for num_frames in args.frames:
+            path = os.path.join(directory, f"take_{num_frames}.bvh")
+            expected = write_bvh(path, num_frames, args.joints, seed=args.seed)
+            size = os.path.getsize(path) / 2 ** 20
+
+            dense, dense_time, dense_peak = measure(lambda: dense_read(path))
+            del dense
+            motion, stream_time, stream_peak = measure(lambda: bvh.read_bvh(path, map_directory=directory))
+            take = f"{len(motion)} x {motion.channel_count}"
+            with motion:
+                if np.max(np.abs(motion.frames - expected)) > 1e-3:
+                    print(f"take_{num_frames}: streamed motion differs from the written one")
+                    return 1
+                simplify = keys = simplify_peak = 0
+                if args.simplify:
+                    keys, simplify, simplify_peak = measure(lambda: simplify_all(motion, kwargs))
+            print(f"{take:<22} {size:>8.1f} {dense_time:>8.2f} {dense_peak:>9.1f} {stream_time:>9.2f} {stream_peak:>10.1f} "
+                  f"{simplify:>11.2f} {simplify_peak:>12.1f} {keys:>9}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Round-trips simplified synthetic channels through the binary curve export, without Blender.
+
+    python benchmarks/bench_export.py --sizes 1000 10000
+
+Every take is simplified, written with each quantization and read back through
+the memory-mapped reader. The run reports file size and load time against an
+.npz of the same keys. The quantization bounds are checked by tests/test_binary_export.py.
+"""
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+utils = importlib.import_module("REJEMS-Alter.utils")
+binary_export = importlib.import_module("REJEMS-Alter.binary_export")
+
+from synthetic import GENERATORS
+
+def simplified_take(size, args):
+    """One channel per generator, simplified with the piecewise fit."""
+    channels = []
+    for name, generator in GENERATORS.items():
+        data = generator(size, seed=args.seed)
+        result = utils.mocap_cleaning_pipeline(data, args.vw_tolerance, args.error_threshold, fit_mode='PIECEWISE')
+        co, handle_left, handle_right = result.keyframes()
+        channels.append(dict(name=name, co=co, handle_left=handle_left, handle_right=handle_right))
+    return channels
+
+def timed_load(path, names, fields):
+    start_time = time.perf_counter()
+    curve_file = binary_export.read_curve_file(path)
+    for name in names:
+        for field in fields:
+            curve_file[name].field(field).sum()
+    return time.perf_counter() - start_time
+
+def timed_npz_load(path, keys):
+    start_time = time.perf_counter()
+    with np.load(path) as arrays:
+        for key in keys:
+            arrays[key].sum()
+    return time.perf_counter() - start_time
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Round-trip the RE:JEMS-Alter binary curve export on synthetic mocap.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--vw-tolerance", type=float, default=0.01)
+    parser.add_argument("--error-threshold", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    fields = binary_export.TIME_FIELDS + ('value', 'handle_left_value', 'handle_right_value')
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            channels = simplified_take(size, args)
+            keys = sum(len(channel['co']) for channel in channels)
+            names = [channel['name'] for channel in channels]
+
+            npz_path = os.path.join(directory, "take.npz")
+            arrays = {f"{channel['name']}/{part}": channel[part] for channel in channels for part in ('co', 'handle_left', 'handle_right')}
+            np.savez(npz_path, **arrays)
+            npz_time = timed_npz_load(npz_path, list(arrays))
+            print(f"{size} frames, {keys} keys: npz {os.path.getsize(npz_path)} bytes, load {npz_time * 1000:.2f}ms")
+
+            for quantization in binary_export.QUANTIZATIONS:
+                path = os.path.join(directory, f"take_{quantization}{binary_export.FILE_EXTENSION}")
+                file_size = binary_export.write_curve_file(path, channels, quantization, args.error_threshold)
+                load_time = timed_load(path, names, fields)
+                print(f"    {quantization:<8} {file_size} bytes, load {load_time * 1000:.2f}ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Times the incremental update of a simplified channel against simplifying it again.
+
+    python benchmarks/bench_incremental.py --sizes 10000 100000 --edits 10 100 1000
+
+Every take is simplified once, then a bump of `edit` frames is added in its
+middle. The update finds the edit through the fingerprints, re-simplifies it
+and splices the keys back in. Each row reports both times, the output keys and
+the max error against the edited source over the re-simplified window, of the
+spliced channel and of the channel simplified again.
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+utils = importlib.import_module("REJEMS-Alter.utils")
+incremental = importlib.import_module("REJEMS-Alter.incremental")
+
+from synthetic import GENERATORS
+
+def chain_error(co, handle_left, handle_right, points):
+    """Largest vertical distance of points to a chain of Bezier keys, sampled densely."""
+    chain = utils.PiecewiseCubicCurve.from_keyframes(co, handle_left, handle_right)
+    samples = chain.evaluate_multi(np.linspace(0.0, 1.0, 64 * len(co) + 1))
+    return float(np.max(np.abs(np.interp(points[:, 0], samples[:, 0], samples[:, 1]) - points[:, 1])))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Time incremental updates against full re-simplification.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--edits", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--generator", choices=list(GENERATORS), default='noisy_sinusoid')
+    parser.add_argument("--vw-tolerance", type=float, default=0.05)
+    parser.add_argument("--error-threshold", type=float, default=0.05)
+    parser.add_argument("--margin", type=int, default=incremental.SPLICE_MARGIN)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    kwargs = dict(vw_tolerance=args.vw_tolerance, error_threshold=args.error_threshold, fit_mode='PIECEWISE')
+    print(f"{'case':<16} {'edit':>6} {'full ms':>9} {'update ms':>10} {'speedup':>8} {'keys':>13} {'window error':>13} {'full error':>11}")
+    for size in args.sizes:
+        data = GENERATORS[args.generator](size, seed=args.seed)
+        co, handle_left, handle_right = utils.mocap_cleaning_pipeline(data, **kwargs).keyframes()
+        stored = incremental.fingerprint(data)
+        for edit in args.edits:
+            edited = data.copy()
+            middle = size // 2
+            edited[middle:middle + edit, 1] += 0.5 * np.sin(np.linspace(0.0, np.pi, edit))
+
+            start_time = time.perf_counter()
+            full_keys = utils.mocap_cleaning_pipeline(edited, **kwargs).keyframes()
+            full = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            count = len(co)
+            attributes = dict(co=co, handle_left=handle_left, handle_right=handle_right, interpolation=np.full(count, incremental.INTERPOLATION['BEZIER']),
+                              handle_left_type=np.zeros(count, dtype=int), handle_right_type=np.zeros(count, dtype=int))
+            ranges = incremental.changed_ranges(stored, incremental.fingerprint(edited))
+            windows = []
+            for start_frame, end_frame in incremental.merge_ranges(ranges, 2 * args.margin):
+                splice = incremental.resimplify_window(edited, attributes['co'], attributes['handle_left'], attributes['handle_right'],
+                                                       start_frame, end_frame, args.margin, **kwargs)
+                attributes = incremental.splice_keyframes(attributes, splice)
+                windows.append((splice.co[0, 0], splice.co[-1, 0]))
+            update = time.perf_counter() - start_time
+
+            cleaned = edited[~utils.detect_outliers(edited)]
+            in_windows = [cleaned[(cleaned[:, 0] >= start) & (cleaned[:, 0] <= end)] for start, end in windows]
+            error = max(chain_error(attributes['co'], attributes['handle_left'], attributes['handle_right'], points) for points in in_windows)
+            full_error = max(chain_error(*full_keys, points) for points in in_windows)
+            keys = f"{count} -> {len(attributes['co'])}"
+            print(f"{args.generator[:10]}/{size:<6} {edit:>6} {full * 1000:>9.1f} {update * 1000:>10.2f} {full / update:>7.0f}x "
+                  f"{keys:>13} {error:>13.4f} {full_error:>11.4f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
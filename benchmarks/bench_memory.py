@@ -0,0 +1,76 @@
+"""
+Measures the peak memory of mocap_cleaning_pipeline on long synthetic channels.
+
+    python benchmarks/bench_memory.py --sizes 100000 --reducers VW RDP
+
+Every channel runs twice, once as a float64 (frame, value) array and once as a
+float32 ChannelData. Each row reports the size of the channel, the time, the
+peak Python heap memory of the whole run (tracemalloc, numpy arrays included,
+the input excluded) as megabytes and as a multiple of the float64 points, and
+the peak of each stage. tracemalloc slows the reducers' Python loops down, so
+the times are only comparable between rows.
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+utils = importlib.import_module("REJEMS-Alter.utils")
+channels = importlib.import_module("REJEMS-Alter.channels")
+
+from synthetic import GENERATORS
+
+MB = 2 ** 20
+
+def measure(data, kwargs):
+    """Runs the pipeline on data. Returns (result, seconds, peak MB, {stage: peak MB})."""
+    stage_peaks = {}
+
+    def on_stage(stage):
+        stage_peaks[stage.name] = tracemalloc.get_traced_memory()[1] / MB
+        tracemalloc.reset_peak()
+
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = utils.mocap_cleaning_pipeline(data, on_stage=on_stage, **kwargs)
+    seconds = time.perf_counter() - start_time
+    peak = max([tracemalloc.get_traced_memory()[1] / MB] + list(stage_peaks.values()))
+    tracemalloc.stop()
+    return result, seconds, peak, stage_peaks
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the peak memory of the pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000])
+    parser.add_argument("--generators", nargs="+", choices=list(GENERATORS), default=['spiky'])
+    parser.add_argument("--reducers", nargs="+", choices=list(utils.REDUCERS), default=list(utils.REDUCERS))
+    parser.add_argument("--outlier-method", choices=['NEIGHBOR', 'HAMPEL'], default='NEIGHBOR')
+    parser.add_argument("--vw-tolerance", type=float, default=0.05)
+    parser.add_argument("--error-threshold", type=float, default=0.05)
+    parser.add_argument("--target-keys", type=int, default=0, help="Key budget instead of the tolerance, 0 for none")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"{'case':<22} {'reducer':<7} {'input':<19} {'data MB':>8} {'s':>7} {'peak MB':>8} {'x data':>7} {'keys':>6}  stage peaks MB")
+    for generator_name in args.generators:
+        for size in args.sizes:
+            points = GENERATORS[generator_name](size, seed=args.seed)
+            channel = channels.ChannelData.from_points(points)
+            case = f"{generator_name}/{size}"
+            for reducer in args.reducers:
+                kwargs = dict(vw_tolerance=args.vw_tolerance, error_threshold=args.error_threshold, fit_mode='PIECEWISE',
+                              outlier_method=args.outlier_method, reducer=reducer, target_keys=args.target_keys)
+                for label, data, data_bytes in (("float64 array", points, points.nbytes), ("float32 ChannelData", channel, channel.nbytes)):
+                    result, seconds, peak, stage_peaks = measure(data, kwargs)
+                    stages = " ".join(f"{name} {value:.1f}" for name, value in stage_peaks.items())
+                    print(f"{case:<22} {reducer:<7} {label:<19} {data_bytes / MB:>8.2f} {seconds:>7.2f} {peak:>8.2f} "
+                          f"{peak * MB / points.nbytes:>7.1f} {result.points_out:>6}  {stages}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Compares the curve parameterizations of the global fitters on synthetic mocap channels.
+
+    python benchmarks/bench_parameterization.py --sizes 100 1000
+
+Every channel is cleaned and reduced with visvalingam_whyatt first, as in the
+pipeline, so the keys the fitters see are unevenly spaced. Each row reports
+the solver iterations, the fit time and the max error for one combination of
+solver, parameterization and Newton reparameterization.
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+utils = importlib.import_module("REJEMS-Alter.utils")
+
+from synthetic import GENERATORS
+
+def fit(reduced, solver, parameterization, newton, args):
+    stats = utils.StageStats('fit')
+    start_time = time.perf_counter()
+    if solver == 'LEAST_SQUARES':
+        utils.least_squares_jems_algorithm(reduced, args.error_threshold, args.gauss_newton_steps if newton else 0,
+                                           stats=stats, parameterization=parameterization)
+    else:
+        utils.adaptive_jems_algorithm(reduced, args.error_threshold, args.max_iterations, stats=stats,
+                                      parameterization=parameterization, newton_interval=args.newton_interval if newton else 0)
+    return stats.iterations, time.perf_counter() - start_time, stats.max_error
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the fitter parameterizations on synthetic mocap.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--generators", nargs="+", choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--solvers", nargs="+", choices=['GRADIENT', 'LEAST_SQUARES'], default=['GRADIENT', 'LEAST_SQUARES'])
+    parser.add_argument("--vw-tolerance", type=float, default=0.05)
+    parser.add_argument("--error-threshold", type=float, default=0.05)
+    parser.add_argument("--max-iterations", type=int, default=100)
+    parser.add_argument("--newton-interval", type=int, default=5)
+    parser.add_argument("--gauss-newton-steps", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"{'case':<28} {'solver':<14} {'parameterization':<16} {'newton':<7} {'iterations':>10} {'fit ms':>9} {'max error':>10}")
+    for generator_name in args.generators:
+        for size in args.sizes:
+            data = GENERATORS[generator_name](size, seed=args.seed)
+            cleaned = data[~utils.detect_outliers(data)]
+            reduced = utils.visvalingam_whyatt(cleaned, args.vw_tolerance)
+            case = f"{generator_name}/{size} ({len(reduced)} keys)"
+            for solver in args.solvers:
+                for parameterization in utils.PARAMETERIZATIONS:
+                    for newton in (False, True):
+                        utils.clear_basis_cache()
+                        iterations, seconds, max_error = fit(reduced, solver, parameterization, newton, args)
+                        print(f"{case:<28} {solver:<14} {parameterization:<16} {'on' if newton else 'off':<7} "
+                              f"{iterations:>10} {seconds * 1000:>9.1f} {max_error:>10.4f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Times every pipeline stage on synthetic mocap channels, without Blender.
+
+    python benchmarks/bench_pipeline.py --output results.json
+    python benchmarks/bench_pipeline.py --baseline results.json
+
+Each run records the time of detect_outliers, visvalingam_whyatt, the fit and
+BezierCurve.evaluate_multi, plus compression ratio and max error, for every
+generator, size and simplification mode. With --baseline the run is compared
+against a saved result file and exits with status 1 on a regression.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+utils = importlib.import_module("REJEMS-Alter.utils")
+
+from synthetic import GENERATORS
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+
+# The operator's simplification modes with the add-on's default settings
+MODES = {
+    'BALANCED': dict(vw_tolerance=0.05, error_threshold=0.05),
+    'ACCURATE': dict(vw_tolerance=None, error_threshold=0.05),
+    'CUSTOM': dict(vw_tolerance=0.01, error_threshold=0.02),
+}
+
+def timed(function, *args, **kwargs):
+    start_time = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start_time
+
+def key_error(data, keys):
+    """Max vertical distance between the raw channel and straight lines through the keys."""
+    return float(np.max(np.abs(np.interp(data[:, 0], keys[:, 0], keys[:, 1]) - data[:, 1])))
+
+def bench_case(data, mode, args):
+    settings = MODES[mode]
+    stages = {}
+
+    outliers, stages['detect_outliers'] = timed(utils.detect_outliers, data, threshold=args.outlier_threshold, method=args.outlier_method, window=args.outlier_window)
+    cleaned = data[~outliers]
+
+    if settings['vw_tolerance'] is not None:
+        reduced, stages['visvalingam_whyatt'] = timed(utils.visvalingam_whyatt, cleaned, settings['vw_tolerance'])
+    else:
+        reduced = cleaned
+
+    case = dict(input_keys=len(data), outliers=int(outliers.sum()), stages=stages)
+
+    # A global fit has degree len(reduced) - 1, past the cap its basis no longer fits in memory
+    if args.fit_mode == 'GLOBAL' and len(reduced) > args.max_fit_points:
+        case['skipped_fit'] = f"{len(reduced)} points > --max-fit-points {args.max_fit_points}"
+        case['output_keys'] = len(reduced)
+        case['compression_ratio'] = len(reduced) / len(data)
+        return case
+
+    fit_stats = utils.StageStats('fit')
+    if args.fit_mode == 'PIECEWISE':
+        (curve, iterations), stages['fit'] = timed(utils.fit_piecewise_cubic, reduced, settings['error_threshold'], stats=fit_stats)
+    elif args.solver == 'LEAST_SQUARES':
+        (curve, iterations), stages['fit'] = timed(utils.least_squares_jems_algorithm, reduced, settings['error_threshold'], args.gauss_newton_steps, stats=fit_stats, parameterization=args.parameterization)
+    else:
+        (curve, iterations), stages['fit'] = timed(utils.adaptive_jems_algorithm, reduced, settings['error_threshold'], args.max_iterations, stats=fit_stats, parameterization=args.parameterization, newton_interval=args.newton_interval)
+
+    if isinstance(curve, utils.BezierCurve):
+        t_values = np.linspace(0, 1, max(100, len(reduced) * 2))
+        utils.clear_basis_cache()
+        _, stages['evaluate_multi'] = timed(curve.evaluate_multi, t_values)
+
+    keys = utils.keyframes_from_fit(curve, reduced)[0]
+    case.update(
+        output_keys=len(keys),
+        compression_ratio=len(keys) / len(data),
+        iterations=int(iterations),
+        fit_max_error=fit_stats.max_error,
+        key_max_error=key_error(data, keys),
+    )
+    return case
+
+def run(args):
+    results = dict(
+        created=time.strftime("%Y-%m-%d %H:%M:%S"),
+        python=platform.python_version(),
+        numpy=np.__version__,
+        settings=dict(fit_mode=args.fit_mode, solver=args.solver, parameterization=args.parameterization, newton_interval=args.newton_interval, outlier_method=args.outlier_method, max_fit_points=args.max_fit_points),
+        cases={},
+    )
+    for generator_name in args.generators:
+        for size in args.sizes:
+            data = GENERATORS[generator_name](size, seed=args.seed)
+            for mode in args.modes:
+                name = f"{generator_name}/{size}/{mode}"
+                runs = [bench_case(data, mode, args) for _ in range(args.repeat)]
+                case = runs[0]
+                # Keep the fastest run of every stage to damp scheduler noise
+                case['stages'] = {stage: min(run['stages'][stage] for run in runs) for stage in case['stages']}
+                results['cases'][name] = case
+                stage_times = ", ".join(f"{stage} {seconds * 1000:.1f}ms" for stage, seconds in case['stages'].items())
+                print(f"{name}: {case['input_keys']} -> {case['output_keys']} keys, {stage_times}")
+    return results
+
+def compare(results, baseline, tolerance, min_seconds=0.001):
+    """Returns a list of regressions of `results` against `baseline`."""
+    regressions = []
+    for name, case in results['cases'].items():
+        base = baseline['cases'].get(name)
+        if base is None:
+            continue
+        for stage, seconds in case['stages'].items():
+            base_seconds = base['stages'].get(stage)
+            if base_seconds is not None and seconds > base_seconds * (1 + tolerance) and seconds - base_seconds > min_seconds:
+                regressions.append(f"{name} {stage}: {base_seconds * 1000:.2f}ms -> {seconds * 1000:.2f}ms")
+        if case['output_keys'] > base['output_keys'] * (1 + tolerance):
+            regressions.append(f"{name} output keys: {base['output_keys']} -> {case['output_keys']}")
+        base_error, error = base.get('key_max_error'), case.get('key_max_error')
+        if base_error is not None and error is not None and error > base_error * (1 + tolerance) + 1e-9:
+            regressions.append(f"{name} max error: {base_error:.4f} -> {error:.4f}")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the RE:JEMS-Alter pipeline stages on synthetic mocap.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--generators", nargs="+", choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--fit-mode", choices=['GLOBAL', 'PIECEWISE'], default='GLOBAL')
+    parser.add_argument("--solver", choices=['GRADIENT', 'LEAST_SQUARES'], default='GRADIENT')
+    parser.add_argument("--parameterization", choices=list(utils.PARAMETERIZATIONS), default='CHORD')
+    parser.add_argument("--newton-interval", type=int, default=5, help="Gradient iterations between Newton reparameterizations, 0 disables them")
+    parser.add_argument("--gauss-newton-steps", type=int, default=0)
+    parser.add_argument("--max-iterations", type=int, default=100)
+    parser.add_argument("--outlier-threshold", type=float, default=3.0)
+    parser.add_argument("--outlier-method", choices=['NEIGHBOR', 'HAMPEL'], default='NEIGHBOR')
+    parser.add_argument("--outlier-window", type=int, default=7)
+    parser.add_argument("--max-fit-points", type=int, default=4000, help="Skip global fits with more points than this")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case, the fastest stage times are kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a saved JSON result file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before a regression is reported")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('settings') != results['settings']:
+            print(f"WARNING baseline settings {baseline.get('settings')} differ from {results['settings']}")
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
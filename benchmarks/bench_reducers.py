@@ -0,0 +1,65 @@
+"""
+Compares the reducers of utils.REDUCERS on synthetic mocap channels.
+
+    python benchmarks/bench_reducers.py --sizes 1000 10000
+
+Every channel is cleaned, reduced with each reducer and fitted piecewise, as in
+the pipeline. Each row reports the reduction time, the keys kept, the largest
+distance of a cleaned point to the line through the kept keys and the max
+error of the fit, so the fastest reducer that meets the error threshold can be
+picked per rig. VW tolerances are areas, the others distances, so the same
+tolerance does not give the same number of keys.
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+utils = importlib.import_module("REJEMS-Alter.utils")
+
+from synthetic import GENERATORS
+
+def line_error(points, reduced):
+    """Largest vertical distance of points to the polyline through the reduced points."""
+    return float(np.max(np.abs(np.interp(points[:, 0], reduced[:, 0], reduced[:, 1]) - points[:, 1])))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the reducers on synthetic mocap.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--generators", nargs="+", choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--reducers", nargs="+", choices=list(utils.REDUCERS), default=list(utils.REDUCERS))
+    parser.add_argument("--tolerance", type=float, default=0.05)
+    parser.add_argument("--error-threshold", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=3, help="Reductions timed per row, the fastest is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"{'case':<24} {'reducer':<8} {'reduce ms':>10} {'keys':>7} {'line error':>11} {'fit keys':>9} {'fit error':>10}")
+    for generator_name in args.generators:
+        for size in args.sizes:
+            data = GENERATORS[generator_name](size, seed=args.seed)
+            cleaned = data[~utils.detect_outliers(data)]
+            case = f"{generator_name}/{size}"
+            for reducer in args.reducers:
+                seconds = np.inf
+                for _ in range(args.repeat):
+                    start_time = time.perf_counter()
+                    indices = utils.REDUCERS[reducer](cleaned, args.tolerance)
+                    seconds = min(seconds, time.perf_counter() - start_time)
+                reduced = cleaned[indices]
+                stats = utils.StageStats('fit')
+                curve, _ = utils.fit_piecewise_cubic(reduced, args.error_threshold, stats=stats)
+                fit_keys = len(curve.keyframes()[0]) if curve is not None else 0
+                print(f"{case:<24} {reducer:<8} {seconds * 1000:>10.2f} {len(reduced):>7} "
+                      f"{line_error(cleaned, reduced):>11.4f} {fit_keys:>9} {stats.max_error:>10.4f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
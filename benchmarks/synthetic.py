@@ -0,0 +1,58 @@
+"""Synthetic mocap channels for the benchmarks, as (frame, value) arrays."""
+import numpy as np
+
+def noisy_sinusoid(num_frames: int, seed: int=0, noise: float=0.01):
+    """A few overlapping sinusoids with sensor noise, like a swinging arm."""
+    rng = np.random.default_rng(seed)
+    frames = np.arange(num_frames, dtype=float)
+    values = (np.sin(frames / 24.0) * 0.8
+              + np.sin(frames / 7.3 + 1.0) * 0.2
+              + np.sin(frames / 61.0 + 2.0) * 0.5)
+    return np.column_stack([frames, values + rng.normal(scale=noise, size=num_frames)])
+
+def foot_plant(num_frames: int, seed: int=0, noise: float=0.002, stride: int=30):
+    """A foot height channel: flat plants joined by smooth lifts."""
+    rng = np.random.default_rng(seed)
+    frames = np.arange(num_frames, dtype=float)
+    phase = (frames % stride) / stride
+    lift = np.where(phase < 0.5, 0.0, np.sin((phase - 0.5) * 2 * np.pi) ** 2 * 0.15)
+    drift = np.cumsum(rng.normal(scale=0.0005, size=num_frames))
+    return np.column_stack([frames, lift + drift + rng.normal(scale=noise, size=num_frames)])
+
+def spiky(num_frames: int, seed: int=0, noise: float=0.01, spike_rate: float=0.01, spike_size: float=5.0):
+    """A noisy sinusoid with marker-swap spikes injected on random frames."""
+    rng = np.random.default_rng(seed)
+    data = noisy_sinusoid(num_frames, seed, noise)
+    spikes = rng.random(num_frames) < spike_rate
+    data[spikes, 1] += rng.choice([-1.0, 1.0], size=spikes.sum()) * spike_size
+    return data
+
+GENERATORS = {
+    'noisy_sinusoid': noisy_sinusoid,
+    'foot_plant': foot_plant,
+    'spiky': spiky,
+}
+
+def write_bvh(path: str, num_frames: int, num_joints: int=20, seed: int=0):
+    """
+    Writes a BVH take of one chain of joints: a root with position and rotation
+    channels and num_joints - 1 children with rotation channels, every channel a
+    noisy sinusoid. Returns the (frames, channels) motion as written.
+    """
+    rng = np.random.default_rng(seed)
+    lines = ["HIERARCHY", "ROOT Hips", "{", "OFFSET 0.0 0.0 0.0",
+             "CHANNELS 6 Xposition Yposition Zposition Zrotation Xrotation Yrotation"]
+    for joint in range(1, num_joints):
+        lines += [f"JOINT Joint{joint}", "{", "OFFSET 0.0 10.0 0.0", "CHANNELS 3 Zrotation Xrotation Yrotation"]
+    lines += ["End Site", "{", "OFFSET 0.0 5.0 0.0", "}"] + ["}"] * num_joints
+    num_channels = 3 + 3 * num_joints
+    frames = np.arange(num_frames, dtype=float)[:, np.newaxis]
+    motion = (rng.uniform(5.0, 170.0, num_channels) * np.sin(frames / rng.uniform(10.0, 60.0, num_channels) + rng.uniform(0.0, 6.0, num_channels))
+              + rng.normal(scale=0.05, size=(num_frames, num_channels)))
+    motion[:, :3] = motion[:, :3] * 0.1 + [0.0, 90.0, 0.0]
+    motion = np.round(motion, 4)
+    with open(path, 'w') as f:
+        f.write("\n".join(lines + ["MOTION", f"Frames: {num_frames}", "Frame Time: 0.008333"]) + "\n")
+        for start in range(0, num_frames, 10000):
+            np.savetxt(f, motion[start:start + 10000], fmt='%.4f')
+    return motion
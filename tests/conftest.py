@@ -0,0 +1,12 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def utils():
+    """The add-on's utils module, importable without Blender."""
+    return importlib.import_module("REJEMS-Alter.utils")
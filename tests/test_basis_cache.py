@@ -0,0 +1,17 @@
+import numpy as np
+
+def test_basis_cache_stays_within_byte_cap(utils, monkeypatch):
+    monkeypatch.setattr(utils, "BASIS_CACHE_BYTES", 1024 * 1024)
+    utils.clear_basis_cache()
+    for count in range(200, 400, 10):
+        utils.bernstein_basis(count - 1, np.linspace(0.0, 1.0, count))
+        assert utils.basis_cache_bytes() <= utils.BASIS_CACHE_BYTES
+        assert utils.basis_cache_bytes() == sum(basis.nbytes for basis in utils._basis_cache.values())
+    utils.clear_basis_cache()
+
+def test_basis_larger_than_cap_is_not_cached(utils, monkeypatch):
+    monkeypatch.setattr(utils, "BASIS_CACHE_BYTES", 1024)
+    utils.clear_basis_cache()
+    basis = utils.bernstein_basis(99, np.linspace(0.0, 1.0, 100))
+    assert basis.shape == (100, 100)
+    assert utils.basis_cache_bytes() == 0 and not utils._basis_cache
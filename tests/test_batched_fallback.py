@@ -0,0 +1,34 @@
+import importlib
+
+import numpy as np
+import pytest
+
+batched = importlib.import_module("REJEMS-Alter.batched")
+
+def channels(count=4, length=60):
+    frames = np.arange(length, dtype=float)
+    return [np.column_stack([frames, np.sin(frames / (5 + i))]) for i in range(count)]
+
+def test_numerical_failure_falls_back_to_single_channels(utils, monkeypatch):
+    def fail(channels, **kwargs):
+        raise np.linalg.LinAlgError("singular matrix")
+    monkeypatch.setattr(batched, "_simplify_batch", fail)
+    results = batched.simplify_batch(channels(), vw_tolerance=0.01)
+    assert all(result.curve is not None for result in results)
+    assert all("singular matrix" in result.fallback for result in results)
+
+    stats = utils.ActionStats()
+    for result in results:
+        stats.add(result)
+    assert stats.fallback_fcurves == len(results)
+    assert "4 simplified one by one" in stats.summary()
+
+def test_other_failures_propagate(monkeypatch):
+    def fail(channels, **kwargs):
+        raise RuntimeError("bug")
+    monkeypatch.setattr(batched, "_simplify_batch", fail)
+    with pytest.raises(RuntimeError):
+        batched.simplify_batch(channels(), vw_tolerance=0.01)
+
+def test_batched_results_have_no_fallback():
+    assert all(result.fallback is None for result in batched.simplify_batch(channels(), vw_tolerance=0.01))
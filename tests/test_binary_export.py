@@ -0,0 +1,44 @@
+import importlib
+
+import numpy as np
+import pytest
+
+binary_export = importlib.import_module("REJEMS-Alter.binary_export")
+utils = importlib.import_module("REJEMS-Alter.utils")
+
+ERROR_THRESHOLD = 0.05
+
+@pytest.fixture(scope="module")
+def channels():
+    """A smooth, a noisy and a spiky channel, simplified with the piecewise fit."""
+    rng = np.random.default_rng(0)
+    frames = np.arange(2000, dtype=float)
+    curves = {
+        'smooth': np.sin(frames / 40) * 30,
+        'noisy': np.cumsum(rng.normal(0, 0.2, len(frames))),
+        'spiky': np.where(rng.random(len(frames)) < 0.01, 5.0, 0.0) + np.cos(frames / 15),
+    }
+    channels = []
+    for name, values in curves.items():
+        result = utils.mocap_cleaning_pipeline(np.column_stack([frames, values]), 0.01, ERROR_THRESHOLD, fit_mode='PIECEWISE')
+        co, handle_left, handle_right = result.keyframes()
+        channels.append(dict(name=name, co=co, handle_left=handle_left, handle_right=handle_right))
+    return channels
+
+@pytest.mark.parametrize("quantization", binary_export.QUANTIZATIONS)
+def test_round_trip_stays_within_the_quantization_bound(channels, quantization, tmp_path):
+    path = tmp_path / f"take{binary_export.FILE_EXTENSION}"
+    binary_export.write_curve_file(str(path), channels, quantization, ERROR_THRESHOLD)
+    curve_file = binary_export.read_curve_file(str(path))
+    assert curve_file.quantization == quantization
+    assert [channel.name for channel in curve_file] == [channel['name'] for channel in channels]
+
+    for channel in channels:
+        stored = curve_file[channel['name']]
+        expected = binary_export.channel_fields(channel['co'], channel['handle_left'], channel['handle_right'])
+        for field, values in expected.items():
+            if field == 'interpolation':
+                assert np.array_equal(stored.field(field), values)
+                continue
+            bound = binary_export.TIME_ERROR if field in binary_export.TIME_FIELDS else binary_export.ERROR_SHARE * ERROR_THRESHOLD
+            assert np.max(np.abs(stored.field(field) - values)) <= bound + 1e-12, f"{channel['name']} {field}"
@@ -0,0 +1,36 @@
+import importlib
+from concurrent.futures import Future
+
+import numpy as np
+
+parallel = importlib.import_module("REJEMS-Alter.parallel")
+
+def jobs(solver='LEAST_SQUARES'):
+    """Short channels that split_jobs batches, and a few long ones it runs singly."""
+    rng = np.random.default_rng(0)
+    kwargs = dict(vw_tolerance=0.01, solver=solver, parameterization='UNIFORM')
+    jobs = []
+    for index, length in enumerate([40] * 8 + [400] * 2):
+        frames = np.arange(length, dtype=float)
+        jobs.append((index, np.column_stack([frames, np.sin(frames / (7 + index)) + rng.normal(0, 0.01, length)]), kwargs))
+    return jobs
+
+def test_tasks_batch_like_simplify_channels():
+    batches, _ = parallel.split_jobs(jobs(), 1)
+    assert batches
+    tasks = parallel.submit_channels(jobs(), workers=1)
+    assert len(set(map(id, tasks.values()))) < len(tasks)
+    for key, expected in parallel.simplify_channels(jobs(), workers=1):
+        result = tasks[key].results()[key]
+        assert result.points_out == expected.points_out
+        assert result.max_error == expected.max_error
+        assert result.fallback is None
+
+def test_failed_future_runs_in_this_process():
+    job = jobs()[-1]
+    future = Future()
+    future.set_exception(RuntimeError("worker died"))
+    task = parallel.ChannelTask(parallel.run_pipeline_job, job, future)
+    result = task.results()[job[0]]
+    assert result.curve is not None
+    assert "worker died" in result.fallback
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+def channels():
+    rng = np.random.default_rng(0)
+    frames = np.arange(1000, dtype=float)
+    yield 'CONSTANT', np.column_stack([frames, 2 + rng.normal(0, 0.005, len(frames))])
+    yield 'LINEAR', np.column_stack([frames, 0.01 * frames + rng.normal(0, 0.005, len(frames))])
+    yield 'STEPPED', np.column_stack([frames, np.floor(frames / 37) + rng.normal(0, 0.005, len(frames))])
+    yield None, np.column_stack([frames, np.sin(frames / 20)])
+
+@pytest.mark.parametrize("chunk", [7, 64, 999])
+def test_chunked_classification_matches_a_single_chunk(utils, monkeypatch, chunk):
+    expected = {kind: utils.classify_channel(points, 0.05) for kind, points in channels()}
+    monkeypatch.setattr(utils, "OUTLIER_CHUNK", chunk)
+    for kind, points in channels():
+        for data in (points, points.astype(np.float32)):
+            found, curve = utils.classify_channel(data, 0.05)
+            assert found == kind == expected[kind][0]
+            if curve is not None:
+                assert np.allclose(curve.co, expected[kind][1].co, atol=1e-5)
@@ -0,0 +1,21 @@
+import numpy as np
+
+def channel(seed, count=300):
+    rng = np.random.default_rng(seed)
+    frames = np.cumsum(rng.integers(1, 4, count)).astype(float)
+    return np.column_stack([frames, np.sin(frames / 20.0) + rng.normal(scale=0.01, size=count)])
+
+def test_chord_and_time_grids_are_not_cached(utils):
+    utils.clear_basis_cache()
+    for seed in range(4):
+        for parameterization in ('CHORD', 'TIME'):
+            utils.adaptive_jems_algorithm(channel(seed), max_iterations=2, parameterization=parameterization)
+            utils.least_squares_jems_algorithm(channel(seed), parameterization=parameterization)
+    assert not utils._basis_cache
+
+def test_uniform_grid_is_cached(utils):
+    utils.clear_basis_cache()
+    for seed in range(4):
+        utils.least_squares_jems_algorithm(channel(seed), parameterization='UNIFORM')
+    assert len(utils._basis_cache) == 1
+    utils.clear_basis_cache()
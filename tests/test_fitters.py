@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+def points(count=40):
+    frames = np.arange(count, dtype=float)
+    return np.column_stack([frames, np.sin(frames / 4)])
+
+@pytest.mark.parametrize("max_iterations", [1, 3, 100])
+def test_gradient_fit_returns_the_iterations_it_records(utils, max_iterations):
+    stats = utils.StageStats('fit')
+    _, iterations = utils.adaptive_jems_algorithm(points(), max_iterations=max_iterations, stats=stats)
+    assert 1 <= iterations <= max_iterations
+    assert iterations == stats.iterations
+
+def test_least_squares_fit_returns_the_solves_it_records(utils):
+    stats = utils.StageStats('fit')
+    _, iterations = utils.least_squares_jems_algorithm(points(), error_threshold=1e-6, gauss_newton_steps=3, stats=stats)
+    assert 1 <= iterations <= 4
+    assert iterations == stats.iterations
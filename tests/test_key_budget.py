@@ -0,0 +1,33 @@
+import importlib
+
+import numpy as np
+import pytest
+
+def test_every_group_gets_a_budget_when_groups_outnumber_keys(utils):
+    # 3 keys for 10 joint groups of 3 fcurves, flooring would leave most groups at 0 (unlimited)
+    budgets = utils.distribute_group_budget(3, [100] * 10, [3] * 10)
+    assert budgets == [2] * 10
+
+def test_group_budgets_are_split_by_fcurve_keys(utils):
+    budgets = utils.distribute_group_budget(600, [100, 100], [1, 3])
+    assert budgets == [150, 150]
+
+def stepped(steps=100, length=20):
+    frames = np.arange(steps * length, dtype=float)
+    return np.column_stack([frames, np.floor(frames / length)])
+
+def test_stepped_channel_without_budget_takes_the_fast_path(utils):
+    result = utils.mocap_cleaning_pipeline(stepped(), vw_tolerance=0.05)
+    assert result.solver == 'STEPPED'
+
+@pytest.mark.parametrize("budget", [dict(target_keys=10), dict(target_ratio=0.01)])
+def test_stepped_channel_keeps_to_the_key_budget(utils, budget):
+    result = utils.mocap_cleaning_pipeline(stepped(), vw_tolerance=0.05, fit_mode='PIECEWISE', **budget)
+    assert result.solver != 'STEPPED'
+    assert 2 <= result.points_out <= 20
+
+@pytest.mark.parametrize("budget", [dict(target_keys=10), dict(target_ratio=0.02)])
+def test_batched_stepped_channels_keep_to_the_key_budget(budget):
+    batched = importlib.import_module("REJEMS-Alter.batched")
+    results = batched.simplify_batch([stepped(steps=25)] * 4, vw_tolerance=0.05, fit_mode='PIECEWISE', **budget)
+    assert all(result.solver != 'STEPPED' and 2 <= result.points_out <= 10 for result in results)
@@ -0,0 +1,17 @@
+import numpy as np
+
+def flat_with_wobble(count=200):
+    frames = np.arange(count, dtype=float)
+    values = np.where(frames < 100, 0.0, 2.0)
+    values[50] += 1e-9
+    return np.column_stack([frames, values])
+
+def test_hampel_ignores_wobbles_on_flat_stretches(utils):
+    outliers = utils.detect_outliers(flat_with_wobble(), threshold=3, method='HAMPEL')
+    assert not outliers.any()
+
+def test_hampel_flags_spikes_on_flat_stretches(utils):
+    points = flat_with_wobble()
+    points[50, 1] = 1.0
+    outliers = utils.detect_outliers(points, threshold=3, method='HAMPEL')
+    assert np.flatnonzero(outliers).tolist() == [50]
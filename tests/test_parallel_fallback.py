@@ -0,0 +1,17 @@
+import importlib
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+parallel = importlib.import_module("REJEMS-Alter.parallel")
+
+def test_pool_failure_runs_serially_and_records_the_fallback(monkeypatch):
+    def broken_pool(workers):
+        raise BrokenProcessPool("worker died")
+    monkeypatch.setattr(parallel, "get_pool", broken_pool)
+    frames = np.arange(3000, dtype=float)
+    jobs = [(index, np.column_stack([frames, np.sin(frames / (20 + index))]), dict(vw_tolerance=0.01, fit_mode='PIECEWISE')) for index in range(2)]
+    results = parallel.simplify_channels(jobs, workers=2)
+    assert [key for key, _ in results] == [0, 1]
+    assert all(result.curve is not None for _, result in results)
+    assert all("worker died" in result.fallback for _, result in results)
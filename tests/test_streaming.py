@@ -0,0 +1,19 @@
+import importlib
+import inspect
+
+import numpy as np
+
+streaming = importlib.import_module("REJEMS-Alter.streaming")
+
+def test_streaming_and_whole_channel_default_to_the_same_fit_mode(utils):
+    stream_default = inspect.signature(streaming.simplify_stream).parameters['fit_mode'].default
+    assert stream_default == inspect.signature(utils.mocap_cleaning_pipeline).parameters['fit_mode'].default
+
+def test_errors_in_a_window_land_in_the_result(monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("window failed")
+    monkeypatch.setattr(streaming, "fit_curve", fail)
+    frames = np.arange(5000, dtype=float)
+    result = streaming.stream_pipeline(np.column_stack([frames, np.sin(frames / 30)]), window_size=1000, vw_tolerance=0.01)
+    assert result.curve is None
+    assert "window failed" in result.error